@@ -0,0 +1,419 @@
+# benchmarks/dispatcher_load.py
+"""
+Benchmark de carga offline del Dispatcher de aiogram.
+
+Monta el mismo Dispatcher que ``main.py`` (middlewares incluidos) y le
+inyecta actualizaciones sintéticas con ``Dispatcher.feed_update``. Las
+llamadas a la Bot API las contesta una sesión falsa, así que no hace falta
+token ni red. La base de datos es un SQLite temporal o la indicada con
+``--database-url``.
+
+Uso:
+    python benchmarks/dispatcher_load.py --updates 5000 --concurrency 50
+    python benchmarks/dispatcher_load.py --mix join_storm --compare benchmarks/baseline.json
+    python benchmarks/dispatcher_load.py --save-baseline benchmarks/baseline.json
+
+Informa updates/s, latencia p50/p95/p99 (global y por escenario) y
+sentencias SQL por update. Con ``--compare`` sale con código 1 si el
+resultado empeora más de ``--tolerance`` respecto a la línea base.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Mezclas de tráfico: peso relativo de cada escenario.
+MIXES: Dict[str, Dict[str, float]] = {
+    "realistic": {"start": 0.15, "menu": 0.50, "mission_claim": 0.20, "story_choice": 0.15},
+    "join_storm": {"start": 1.0},
+    "browse": {"menu": 1.0},
+}
+MENU_CALLBACKS = ("missions", "vip_zone", "daily_gift", "profile", "backpack", "minigames")
+MISSION_IDS = ("m001", "m002", "m003", "m004", "m005")  # data/missions.json
+
+
+class _ErrorCounter(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+ERROR_COUNTER = _ErrorCounter()
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+    }
+
+
+def build_stub_session(api_latency: float):
+    from aiogram.client.session.base import BaseSession
+
+    class StubSession(BaseSession):
+        """Sesión de Bot API falsa: cuenta las llamadas y responde ``True``."""
+
+        def __init__(self):
+            super().__init__()
+            self.calls: Dict[str, int] = {}
+
+        async def make_request(self, bot, method, timeout=None):
+            name = type(method).__name__
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if api_latency:
+                await asyncio.sleep(api_latency)
+            return True
+
+        async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+            yield b""
+
+        async def close(self):
+            pass
+
+    return StubSession()
+
+
+class UpdateFactory:
+    """Construye las actualizaciones sintéticas de cada escenario."""
+
+    def __init__(self, users: int, seed: int):
+        from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+        self._types = (CallbackQuery, Chat, Message, Update, User)
+        self._random = random.Random(seed)
+        self._users = users
+        self._ids = itertools.count(1)
+
+    def _user(self):
+        _, _, _, _, User = self._types
+        user_id = 100_000 + self._random.randrange(self._users)
+        return User(id=user_id, is_bot=False, first_name="Bench", username=f"bench{user_id}")
+
+    def _message(self, user, text: str):
+        _, Chat, Message, _, _ = self._types
+        return Message(
+            message_id=next(self._ids),
+            date=datetime.now(),
+            chat=Chat(id=user.id, type="private"),
+            from_user=user,
+            text=text,
+        )
+
+    def _callback(self, data: str):
+        CallbackQuery, _, _, Update, _ = self._types
+        user = self._user()
+        return Update(update_id=next(self._ids), callback_query=CallbackQuery(
+            id=str(next(self._ids)), from_user=user, chat_instance="bench",
+            message=self._message(user, "menu"), data=data,
+        ))
+
+    def start(self):
+        _, _, _, Update, _ = self._types
+        return Update(update_id=next(self._ids), message=self._message(self._user(), "/start"))
+
+    def menu(self):
+        return self._callback(self._random.choice(MENU_CALLBACKS))
+
+    def mission_claim(self):
+        return self._callback(f"bench_mission_{self._random.choice(MISSION_IDS)}")
+
+    def story_choice(self):
+        return self._callback(f"bench_story_{self._random.randrange(3)}")
+
+
+def build_bench_router():
+    """
+    Router de los escenarios de misiones e historia.
+
+    Los handlers de producción de esos callbacks están rotos:
+    ``handle_claim_mission`` llama a ``MissionService.complete_mission`` y
+    ``handle_story_choice`` a ``story_engine.process_choice``, y ninguno de los
+    dos existe. Estos handlers recorren los caminos que sí funcionan, con la
+    sesión perezosa del middleware:
+
+    - Misión: ``MissionService`` la empieza si está pendiente y, si está en
+      curso, le suma un 50% con ``tick_missions`` (se completa al segundo tick).
+    - Historia: lee el nodo actual de ``user_progress``, elige una opción con
+      ``StoryService``, aplica su impacto con el ``PersonaService`` de Diana y
+      edita el mensaje con el nodo siguiente. Al llegar a un final vuelve al
+      nodo inicial.
+
+    Dos toques seguidos del mismo usuario pueden crear la misma fila a la vez
+    (``start_mission`` y el primer ``user_progress`` leen y luego insertan).
+    El segundo choca con la clave única: se deshace y se responde sin error,
+    igual que tendría que hacerlo un handler real.
+    """
+    from aiogram import F, Router
+    from sqlalchemy.exc import IntegrityError
+
+    from src.database.models import UserProgress
+    from src.database.repository import UserProgressRepository, UserRepository
+    from src.services.mission_service import MissionService
+    from src.services.persona_service import PersonaService
+    from src.services.story_service import StoryService
+
+    router = Router(name="benchmark")
+    story = StoryService()
+
+    @router.callback_query(F.data.startswith("bench_mission_"))
+    async def claim_mission(callback, session):
+        user_id = callback.from_user.id
+        mission_id = callback.data.removeprefix("bench_mission_")
+        missions = MissionService(session)
+        status = await missions.get_mission_status(user_id, mission_id)
+        try:
+            if status in ("pending", "failed"):
+                await missions.start_mission(user_id, mission_id)
+            elif status == "in_progress":
+                await missions.tick_missions([(user_id, mission_id, 50.0)])
+        except IntegrityError:
+            await session.rollback()
+        await callback.answer(status)
+
+    @router.callback_query(F.data.startswith("bench_story_"))
+    async def choose(callback, session):
+        user = callback.from_user
+        await UserRepository(session).get_or_create(user.id, user.username)
+        progress_repo = UserProgressRepository(session)
+        progress = await progress_repo.get_by_user_id(user.id)
+        if progress is None:
+            progress = UserProgress(user_id=user.id, current_story_node=story.get_initial_node())
+            session.add(progress)
+            try:
+                await session.flush()
+            except IntegrityError:
+                await session.rollback()
+                await callback.answer()
+                return
+        node = story.get_node(progress.current_story_node) or story.get_node(story.get_initial_node())
+        options = node.get("choices") or []
+        if not options:
+            progress.current_story_node = story.get_initial_node()
+            await callback.answer()
+            return
+        choice = options[int(callback.data.removeprefix("bench_story_")) % len(options)]
+        next_node = story.get_node(choice.get("next_scene"))
+        progress.current_story_node = choice["next_scene"] if next_node and next_node.get("choices") \
+            else story.get_initial_node()
+        if choice.get("impact"):
+            await PersonaService(progress_repo).apply_choice_effects(user.id, choice["impact"])
+        await callback.message.edit_text((next_node or node)["text"])
+
+    return router
+
+
+
+def load_routers(scenarios) -> List[Any]:
+    """Routers de ``main.py`` más los que atienden los escenarios de la mezcla."""
+    import importlib
+
+    import main
+
+    routers = [main.start_router, main.game_router]
+    optional = {
+        "menu": "src.telegram_bot.handlers.main_menu_handlers",
+    }
+    if {"mission_claim", "story_choice"} & set(scenarios):
+        routers.append(build_bench_router())
+    for scenario in scenarios:
+        module_name = optional.get(scenario)
+        if module_name is None:
+            continue
+        try:
+            routers.append(importlib.import_module(module_name).router)
+        except ImportError as e:
+            logging.warning(f"Escenario '{scenario}': no se pudo importar {module_name} ({e}); "
+                            f"sus updates sólo recorrerán los middlewares.")
+    routers.append(main.unrecognized_router)  # captura todo: siempre el último
+    return routers
+
+
+async def run(args) -> Dict[str, Any]:
+    from aiogram import Bot
+    from sqlalchemy import event
+
+    import main
+    from src.database.connection import engine, init_db
+    from src.security.rate_limiter import RateLimiter
+
+    mix = MIXES[args.mix]
+    await init_db()
+
+    statements = 0
+
+    def count_statement(*_):
+        nonlocal statements
+        statements += 1
+
+    session = build_stub_session(args.api_latency_ms / 1000)
+    bot = Bot(token="42:BENCHMARK", session=session)
+    # Límites inalcanzables: se mide el coste del limitador sin descartar tráfico sintético.
+    unlimited = {action: {"algorithm": "token_bucket", "limit": 1e9, "period": 1}
+                 for action in ("message", "callback", "reaction")}
+    dp = main.build_dispatcher(load_routers(mix), rate_limiter=RateLimiter.from_config(unlimited))
+
+    factory = UpdateFactory(args.users, args.seed)
+    scenario_names = list(mix)
+    weights = [mix[name] for name in scenario_names]
+    chooser = random.Random(args.seed + 1)
+    plan = chooser.choices(scenario_names, weights=weights, k=args.warmup + args.updates)
+    updates = [(name, getattr(factory, name)()) for name in plan]
+
+    latencies: Dict[str, List[float]] = {name: [] for name in scenario_names}
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def feed(name: str, update, record: bool):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            await dp.feed_update(bot, update)
+        except Exception:
+            errors += record
+        if record:
+            latencies[name].append(time.perf_counter() - start)
+
+    # Calentamiento: crea usuarios y llena cachés sin contar en el resultado.
+    for name, update in updates[:args.warmup]:
+        await feed(name, update, record=False)
+    ERROR_COUNTER.count = 0
+
+    for item in updates[args.warmup:]:
+        queue.put_nowait(item)
+
+    async def worker():
+        while not queue.empty():
+            name, update = queue.get_nowait()
+            await feed(name, update, record=True)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+    await engine.dispose()
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "mix": args.mix,
+        "updates": args.updates,
+        "concurrency": args.concurrency,
+        "users": args.users,
+        "api_latency_ms": args.api_latency_ms,
+        "database": engine.url.get_backend_name(),
+        "seconds": elapsed,
+        "throughput_ups": args.updates / elapsed if elapsed else 0.0,
+        "queries_per_update": statements / args.updates if args.updates else 0.0,
+        "errors": errors,
+        "logged_errors": ERROR_COUNTER.count,
+        "latency": latency_summary(all_latencies),
+        "scenarios": {name: latency_summary(values) for name, values in latencies.items()},
+        "bot_api_calls": dict(session.calls),
+        "python": platform.python_version(),
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Devuelve las regresiones respecto a la línea base (vacío si no hay)."""
+    reference = baseline.get(result["mix"])
+    if reference is None:
+        return [f"la línea base no tiene la mezcla '{result['mix']}'"]
+    problems = []
+    if result["throughput_ups"] < reference["throughput_ups"] * (1 - tolerance):
+        problems.append(f"throughput {result['throughput_ups']:.0f} < {reference['throughput_ups']:.0f} updates/s")
+    if result["latency"]["p95_ms"] > reference["latency"]["p95_ms"] * (1 + tolerance):
+        problems.append(f"p95 {result['latency']['p95_ms']:.1f} > {reference['latency']['p95_ms']:.1f} ms")
+    if result["queries_per_update"] > reference["queries_per_update"] + 0.05:
+        problems.append(f"queries/update {result['queries_per_update']:.2f} > {reference['queries_per_update']:.2f}")
+    return problems
+
+
+def print_report(result: Dict[str, Any]):
+    latency = result["latency"]
+    print(f"mix={result['mix']} updates={result['updates']} concurrency={result['concurrency']} "
+          f"db={result['database']}")
+    print(f"  throughput: {result['throughput_ups']:.0f} updates/s  "
+          f"queries/update: {result['queries_per_update']:.2f}  "
+          f"errors: {result['errors']} raised, {result['logged_errors']} logged")
+    print(f"  latency:    p50={latency['p50_ms']:.2f}ms p95={latency['p95_ms']:.2f}ms p99={latency['p99_ms']:.2f}ms")
+    for name, summary in result["scenarios"].items():
+        print(f"  {name:<14} n={summary['count']:<6} p50={summary['p50_ms']:.2f}ms "
+              f"p95={summary['p95_ms']:.2f}ms p99={summary['p99_ms']:.2f}ms")
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mix", choices=sorted(MIXES), default="realistic")
+    parser.add_argument("--updates", type=int, default=3000)
+    parser.add_argument("--warmup", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--api-latency-ms", type=float, default=0.0, help="latencia simulada de la Bot API")
+    parser.add_argument("--database-url", help="por defecto, un SQLite temporal")
+    parser.add_argument("--output", help="guarda el resultado en JSON")
+    parser.add_argument("--compare", help="fichero de línea base con el que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", help="añade/actualiza esta mezcla en el fichero de línea base")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    # Los handlers registran cada update en INFO y capturan sus propias
+    # excepciones: no se imprime nada, sólo se cuentan los ERROR.
+    logging.disable(logging.INFO)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(ERROR_COUNTER)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{tmp}/bench.db"
+        result = asyncio.run(run(args))
+    print_report(result)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        path = Path(args.save_baseline)
+        baseline = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+        baseline[result["mix"]] = result
+        path.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+    if args.compare:
+        problems = compare(result, json.loads(Path(args.compare).read_text(encoding="utf-8")), args.tolerance)
+        for problem in problems:
+            print(f"REGRESIÓN: {problem}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+# benchmarks/persona_render.py
+"""
+Micro-benchmark del render de mensajes de Lucien para un envío masivo.
+
+Compara ``PersonaService.create_response`` llamado una vez por usuario con
+``create_responses`` sobre los mismos usuarios ya cargados. El ``get_user``
+del camino por usuario es un ``dict.get`` (el mejor caso: en el bot cada
+llamada es una consulta), y el log queda en WARNING, así que no se escribe
+ninguna línea y sólo se paga el formateo de los f-strings de INFO.
+
+Uso:
+    python benchmarks/persona_render.py
+    python benchmarks/persona_render.py --users 100000 --repeat 7
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.models.user import User, UserRole  # noqa: E402
+from src.persona_system.persona_service import PersonaService  # noqa: E402
+
+
+def make_users(count: int, seed: int):
+    rng = random.Random(seed)
+    return [
+        User(id=i, username=f"user{i}", points=rng.randrange(0, 1000),
+             role=UserRole.VIP if rng.random() < 0.1 else UserRole.FREE,
+             unlocked_fragments=["fragment_5"] if rng.random() < 0.3 else [])
+        for i in range(count)
+    ]
+
+
+def best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    users = make_users(args.users, args.seed)
+    by_id = {user.id: user for user in users}
+    service = PersonaService(get_user=by_id.get)
+
+    per_user = best_of(args.repeat, lambda: [service.create_response(user.id) for user in users])
+    batch = best_of(args.repeat, lambda: service.create_responses(users))
+
+    print(f"users={args.users} repeat={args.repeat} (mejor tiempo)")
+    print(f"  create_response x N: {per_user * 1000:8.2f} ms  ({per_user / args.users * 1e6:.2f} µs/usuario)")
+    print(f"  create_responses:    {batch * 1000:8.2f} ms  ({batch / args.users * 1e6:.2f} µs/usuario)")
+    print(f"  speedup: {per_user / batch:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
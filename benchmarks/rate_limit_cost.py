@@ -0,0 +1,103 @@
+# benchmarks/rate_limit_cost.py
+"""
+Micro-benchmark del limitador de frecuencia.
+
+Para cada tamaño de población precarga ese número de usuarios en el
+limitador y mide el coste medio de ``hit`` sobre usuarios aleatorios, junto
+a la memoria por usuario (``tracemalloc``). Una fracción de las llamadas
+viene de unos pocos usuarios en flood. El coste por llamada debe ser
+plano aunque crezca el número de usuarios seguidos. Como referencia se mide
+también el conteo antiguo con una lista de timestamps por usuario, y los
+limitadores con el almacén compartido ``SqliteStore`` (la diferencia con los
+de memoria es la latencia añadida por comprobación en despliegues
+multiproceso; su estado está en disco, no en ``bytes/usuario``).
+
+Uso:
+    python benchmarks/rate_limit_cost.py
+    python benchmarks/rate_limit_cost.py --users 1000 10000 100000 --calls 200000
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.security.rate_limiter import SlidingWindowLimiter, SqliteStore, TokenBucketLimiter  # noqa: E402
+
+
+class TimestampListLimiter:
+    """El conteo previo de AntiAbuseSystem: lista de timestamps por usuario."""
+
+    def __init__(self, limit: int, period: float):
+        self.limit = limit
+        self.period = period
+        self.interactions = defaultdict(list)
+
+    def hit(self, key) -> bool:
+        now = time.monotonic()
+        recent = [t for t in self.interactions[key] if now - t < self.period]
+        recent.append(now)
+        self.interactions[key] = recent
+        return len(recent) <= self.limit
+
+    def __len__(self):
+        return len(self.interactions)
+
+
+def sqlite_store() -> SqliteStore:
+    return SqliteStore(str(Path(tempfile.mkdtemp(prefix="rate_limits_")) / "state.sqlite3"))
+
+
+FACTORIES = {
+    "sliding_window": lambda: SlidingWindowLimiter(20, 60, idle_ttl=3600),
+    "token_bucket": lambda: TokenBucketLimiter(60, 60, burst=10, idle_ttl=3600),
+    "timestamp_list": lambda: TimestampListLimiter(20, 60),
+    "sliding_window_sqlite": lambda: SlidingWindowLimiter(20, 60, idle_ttl=3600, store=sqlite_store()),
+    "token_bucket_sqlite": lambda: TokenBucketLimiter(60, 60, burst=10, idle_ttl=3600, store=sqlite_store()),
+}
+
+
+def measure(factory, users: int, calls: int, seed: int, hot_fraction: float = 0.2, hot_users: int = 50):
+    tracemalloc.start()
+    limiter = factory()
+    for user_id in range(users):
+        limiter.hit(user_id)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rng = random.Random(seed)
+    # Una parte de las llamadas viene de unos pocos usuarios haciendo flood.
+    keys = [rng.randrange(hot_users) if rng.random() < hot_fraction else rng.randrange(users)
+            for _ in range(calls)]
+    hit = limiter.hit
+    start = time.perf_counter()
+    for key in keys:
+        hit(key)
+    elapsed = time.perf_counter() - start
+    return elapsed / calls * 1e9, memory / users, len(limiter)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--hot-fraction", type=float, default=0.2, help="fracción de llamadas de usuarios en flood")
+    parser.add_argument("--algorithms", nargs="+", choices=sorted(FACTORIES), default=list(FACTORIES))
+    args = parser.parse_args()
+
+    print(f"{'algoritmo':<24}{'usuarios':>10}{'ns/llamada':>12}{'bytes/usuario':>15}{'seguidos':>10}")
+    for algorithm in args.algorithms:
+        for users in args.users:
+            ns, per_user, tracked = measure(FACTORIES[algorithm], users, args.calls, args.seed, args.hot_fraction)
+            print(f"{algorithm:<24}{users:>10}{ns:>12.0f}{per_user:>15.0f}{tracked:>10}")
+
+
+if __name__ == "__main__":
+    main()
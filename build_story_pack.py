@@ -0,0 +1,6 @@
+# build_story_pack.py
+# Uso: python build_story_pack.py data/story.json data/story.pack
+from src.story_system.story_pack import main
+
+if __name__ == "__main__":
+    main()
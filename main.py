@@ -5,12 +5,59 @@ from dotenv import load_dotenv
 
 from aiogram import Bot, Dispatcher
 
-from src.database.connection import init_db
-from src.telegram_bot.middleware import DbSessionMiddleware
+from src.core.config import settings
+from src.core.audit_sink import AuditSink
+from src.core.content_registry import content_registry
+from src.core.event_bus import event_bus
+from src.core.integration_hub import EventLogger, IntegrationHub
+from src.database.connection import init_db, AsyncSessionLocal
+from src.core.metrics import log_summary_periodically, start_metrics_server
+from src.security.rate_limiter import RateLimiter
+from src.telegram_bot.middleware import DbSessionMiddleware, MetricsMiddleware, RateLimitMiddleware, TelegramRequestMetrics
 from src.telegram_bot.handlers.start import router as start_router
 from src.telegram_bot.handlers.game_handlers import router as game_router
 from src.telegram_bot.handlers.unrecognized_handlers import router as unrecognized_router
+from src.core.scheduler_system import SchedulerSystem
+from src.data.mission_catalog import MissionCatalog
+from src.services.daily_reset import DailyReset
+from src.services.fragment_service import FragmentService
+from src.services.leaderboard import LeaderboardService
+from src.services.achievements_service import AchievementsService
+from src.services.ledger_archiver import LedgerArchiver
+from src.services.point_ledger import PointLedgerWriter
+from src.services.vip_checker import VIPChecker
+from src.services.vip_expiry import VipExpiryScheduler, channel_kicker
 from src.services.points_service import setup_points_listeners
+from src.story_system.unlock_system import unlock_system
+
+def build_dispatcher(routers=None, rate_limiter: RateLimiter | None = None) -> Dispatcher:
+    """
+    Crea el Dispatcher con los middlewares y routers del bot.
+
+    Args:
+        routers: Routers a registrar; por defecto los de producción. El
+                 benchmark de carga lo usa para montar el mismo Dispatcher.
+        rate_limiter: Limitador de frecuencia; por defecto, uno nuevo con
+                      ``RATE_LIMITS`` de la configuración.
+    """
+    dp = Dispatcher()
+
+    # Limitador de frecuencia como middleware externo: descarta floods antes de abrir sesión
+    rate_limit = RateLimitMiddleware(rate_limiter or RateLimiter.from_settings(settings))
+    dp.message.outer_middleware(rate_limit)
+    dp.callback_query.outer_middleware(rate_limit)
+    dp.message_reaction.outer_middleware(rate_limit)
+
+    # Registrar middleware (MetricsMiddleware primero para medir también la sesión)
+    dp.message.middleware(MetricsMiddleware())
+    dp.callback_query.middleware(MetricsMiddleware())
+    dp.message.middleware(DbSessionMiddleware())
+    dp.callback_query.middleware(DbSessionMiddleware())
+
+    # Registrar routers
+    for router in routers if routers is not None else (start_router, game_router, unrecognized_router):
+        dp.include_router(router)
+    return dp
 
 async def main():
     load_dotenv() # Cargar variables de entorno
@@ -18,24 +65,87 @@ async def main():
     # Inicializar la base de datos (crear tablas si no existen)
     await init_db()
 
+    # Ledger de transacciones de puntos con escritura por lotes
+    point_ledger = PointLedgerWriter.from_settings(settings, AsyncSessionLocal)
+    point_ledger.start()
+
+    # Workers del bus de eventos (sólo con EVENT_BUS_CONCURRENT)
+    if event_bus.concurrent:
+        event_bus.start()
+
     # Configurar listeners de eventos
-    setup_points_listeners()
+    setup_points_listeners(point_ledger)
+
+    # Desbloqueo de fragmentos sobre user_unlocked_fragments, con caché de bitsets
+    fragment_service = FragmentService.from_settings(settings, AsyncSessionLocal, event_bus=event_bus)
+    unlock_system.configure(fragment_service)
+
+    # Recarga en caliente de historia y misiones
+    content_registry.configure(settings.CONTENT_RELOAD_INTERVAL, event_bus)
+    content_registry.start()
 
     bot = Bot(token=os.environ.get("TELEGRAM_BOT_TOKEN"))
-    dp = Dispatcher()
+    bot.session.middleware(TelegramRequestMetrics())
 
-    # Registrar middleware
-    dp.message.middleware(DbSessionMiddleware())
-    dp.callback_query.middleware(DbSessionMiddleware())
+    # Caducidad de VIP: montículo reconstruido desde users.vip_expires_at
+    kick = channel_kicker(bot, settings.VIP_CHANNEL_ID) if settings.VIP_CHANNEL_ID else None
+    vip_expiry = VipExpiryScheduler.from_settings(settings, AsyncSessionLocal, kick=kick, event_bus=event_bus)
+    await vip_expiry.start()
 
-    # Registrar routers
-    dp.include_router(start_router)
-    dp.include_router(game_router)
-    dp.include_router(unrecognized_router)
+    # Auditoría del IntegrationHub por lotes (desactivada sin AUDIT_SINK_PATH)
+    audit_sink = AuditSink.from_settings(settings)
+    if audit_sink is not None:
+        audit_sink.start()
+    hub = IntegrationHub(EventLogger(sink=audit_sink))
+
+    # Rankings global y semanal en memoria, alimentados por points_changed
+    leaderboard = LeaderboardService.from_settings(settings, AsyncSessionLocal, event_bus=event_bus, ledger=point_ledger)
+    await leaderboard.start()
+
+    # Logros: reglas indexadas por tipo de evento, persistidas por lotes
+    achievements = AchievementsService.from_settings(settings, AsyncSessionLocal, event_bus=event_bus, hub=hub)
+    await achievements.start()
+    hub.register_handler("POINTS_AWARDED", achievements.check_for_achievement)
+
+    async def route_points_awarded(user_id: int, delta: int, reason: str, **kwargs):
+        await hub.route_event_async("POINTS_AWARDED", {"user_id": user_id, "points": delta, "reason": reason})
+
+    event_bus.subscribe("points_changed", route_points_awarded)
+
+    # Tareas programadas en el mismo event loop
+    scheduler = SchedulerSystem.from_settings(settings)
+    daily_reset = DailyReset.from_settings(settings, AsyncSessionLocal, MissionCatalog())
+    scheduler.add_job("@daily", daily_reset.reset_daily_missions, name="daily_reset", jitter=0)
+    scheduler.add_job("@hourly", VIPChecker(vip_expiry).revoke_expired_vip, name="vip_sweep")
+    scheduler.add_job("30 3 * * *", LedgerArchiver.from_settings(settings, AsyncSessionLocal).run, name="ledger_archive")
+    scheduler.start()
+
+    # Métricas: endpoint /metrics y resumen periódico en el log
+    metrics_runner = None
+    if settings.METRICS_PORT:
+        metrics_runner = await start_metrics_server(settings.METRICS_HOST, settings.METRICS_PORT)
+    metrics_log_task = asyncio.create_task(log_summary_periodically(settings.METRICS_LOG_INTERVAL))
+
+    dp = build_dispatcher()
 
     # Iniciar el bot
     print("Bot started...")
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        metrics_log_task.cancel()
+        # Despacha lo encolado mientras los servicios que escuchan siguen vivos
+        await event_bus.stop()
+        await content_registry.stop()
+        await scheduler.stop()
+        await vip_expiry.stop()
+        await leaderboard.stop()
+        await achievements.stop()
+        if audit_sink is not None:
+            await audit_sink.stop()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await point_ledger.stop()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,18 @@
+# run_achievement_backfill.py
+import asyncio
+import logging
+import sys
+from src.core.config import settings
+from src.database.connection import AsyncSessionLocal, init_db
+from src.services.achievements_service import AchievementsService
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+    await init_db()
+    service = AchievementsService.from_settings(settings, AsyncSessionLocal)
+    # Sin argumentos evalúa todas las reglas; p. ej. `python run_achievement_backfill.py mission_master`
+    unlocked = await service.backfill(sys.argv[1:] or None)
+    print(f"Backfill completed: {unlocked}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
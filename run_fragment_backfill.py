@@ -0,0 +1,14 @@
+# run_fragment_backfill.py
+import asyncio
+import logging
+from src.database.connection import AsyncSessionLocal, init_db
+from src.services.fragment_service import backfill_unlocked_fragments
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+    await init_db()
+    users = await backfill_unlocked_fragments(AsyncSessionLocal)
+    print(f"Backfill completed: {users} users copied to user_unlocked_fragments.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -26,9 +26,7 @@ class DashboardService:
         total_users = len(self._user_service._users_db)
         total_points = sum(self._points_service._user_points.values())
         
-        unlocked_achievements_count = sum(
-            len(achievements) for achievements in self._achievements_service._user_unlocked_achievements.values()
-        )
+        unlocked_achievements_count = self._achievements_service.count_unlocked()
 
         metrics = {
             "total_users": total_users,
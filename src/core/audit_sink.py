@@ -0,0 +1,198 @@
+# src/core/audit_sink.py
+"""
+Sink de auditoría asíncrono y por lotes.
+
+Los eventos se acumulan en memoria y una tarea en segundo plano los escribe
+en disco (JSONL rotativo o SQLite) cada ``flush_interval`` segundos o cuando
+se alcanzan ``batch_size`` eventos. El formateo y la E/S se hacen en un hilo
+con ``asyncio.to_thread``, así que quien registra el evento sólo paga un
+``append`` a la cola.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AuditRecord = Tuple[float, str, Dict[str, Any]]
+
+
+class JsonlAuditWriter:
+    """Escribe lotes de eventos como líneas JSON, rotando el fichero por tamaño."""
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write_batch(self, records: List[AuditRecord]):
+        payload = "".join(
+            json.dumps({"ts": ts, "event": event, "metadata": metadata}, ensure_ascii=False, default=str) + "\n"
+            for ts, event, metadata in records
+        ).encode("utf-8")
+        if self.max_bytes and self.path.exists() and self.path.stat().st_size + len(payload) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "ab") as f:
+            f.write(payload)
+
+    def _rotate(self):
+        if self.backup_count <= 0:
+            self.path.unlink(missing_ok=True)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{index}")
+            if source.exists():
+                os.replace(source, self.path.with_name(f"{self.path.name}.{index + 1}"))
+        os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+
+    def close(self):
+        pass
+
+
+class SqliteAuditWriter:
+    """Escribe lotes de eventos en una tabla SQLite con un único ``executemany``."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # to_thread puede usar hilos distintos en cada lote; las escrituras nunca se solapan.
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS audit_events (ts REAL NOT NULL, event TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def write_batch(self, records: List[AuditRecord]):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO audit_events (ts, event, metadata) VALUES (?, ?, ?)",
+                [(ts, event, json.dumps(metadata, ensure_ascii=False, default=str)) for ts, event, metadata in records],
+            )
+
+    def close(self):
+        self._conn.close()
+
+
+class AuditSink:
+    """
+    Buffer acotado de eventos de auditoría con escritura por lotes en segundo plano.
+
+    Attributes:
+        written: Eventos escritos correctamente.
+        dropped: Eventos descartados (buffer lleno o fallo de escritura).
+        overflows: Veces que un evento llegó con el buffer lleno.
+        write_errors: Lotes cuya escritura falló.
+    """
+
+    def __init__(self, writer, flush_interval: float = 1.0, batch_size: int = 500, max_buffer: int = 10000):
+        self._writer = writer
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self._buffer: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._flush_lock = asyncio.Lock()
+
+        self.written = 0
+        self.dropped = 0
+        self.overflows = 0
+        self.write_errors = 0
+        self.flushes = 0
+
+    @classmethod
+    def from_settings(cls, settings) -> Optional["AuditSink"]:
+        """Builds the sink configured by the AUDIT_* settings, or None if disabled."""
+        if not settings.AUDIT_SINK_PATH:
+            return None
+        if settings.AUDIT_SINK_BACKEND == "sqlite":
+            writer = SqliteAuditWriter(settings.AUDIT_SINK_PATH)
+        elif settings.AUDIT_SINK_BACKEND == "jsonl":
+            writer = JsonlAuditWriter(
+                settings.AUDIT_SINK_PATH,
+                max_bytes=settings.AUDIT_MAX_BYTES,
+                backup_count=settings.AUDIT_BACKUP_COUNT,
+            )
+        else:
+            raise ValueError(f"Backend de auditoría desconocido: {settings.AUDIT_SINK_BACKEND}")
+        return cls(
+            writer,
+            flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+            batch_size=settings.AUDIT_BATCH_SIZE,
+            max_buffer=settings.AUDIT_MAX_BUFFER,
+        )
+
+    def submit(self, event: str, metadata: Dict[str, Any]) -> bool:
+        """
+        Encola un evento sin formatearlo. Nunca bloquea.
+
+        Returns:
+            False si el evento se descartó porque el buffer estaba lleno.
+        """
+        if len(self._buffer) >= self.max_buffer:
+            self.overflows += 1
+            self.dropped += 1
+            return False
+        self._buffer.append((time.time(), event, dict(metadata)))
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def start(self):
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run(), name="audit-sink")
+
+    async def stop(self):
+        """Detiene la tarea de fondo, escribe lo pendiente y cierra el writer."""
+        if self._task is not None:
+            # No se cancela: el hilo de to_thread seguiría escribiendo el lote mientras se cierra el writer.
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        self._writer.close()
+
+    async def flush(self):
+        """Escribe en disco todo lo que haya en el buffer, en lotes de ``batch_size``."""
+        async with self._flush_lock:
+            while self._buffer:
+                count = min(len(self._buffer), self.batch_size)
+                batch = [self._buffer.popleft() for _ in range(count)]
+                try:
+                    await asyncio.to_thread(self._writer.write_batch, batch)
+                    self.written += len(batch)
+                    self.flushes += 1
+                except Exception as e:
+                    self.write_errors += 1
+                    self.dropped += len(batch)
+                    logger.error(f"No se pudo escribir un lote de auditoría de {len(batch)} eventos: {e}", exc_info=True)
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "overflows": self.overflows,
+            "write_errors": self.write_errors,
+            "flushes": self.flushes,
+        }
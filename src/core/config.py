@@ -23,7 +23,20 @@ class Settings(BaseSettings):
     ADMIN_IDS: str | None = None
     FREE_CHANNEL_ID: str | None = None
     VIP_CHANNEL_ID: str | None = None
-    
+
+    # Database engine profile
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 500  # asyncpg prepared statements per connection
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
     # Configuration for LevelService
     LEVEL_THRESHOLDS: Dict[int, str] = {
         0: "Novato",
@@ -33,7 +46,79 @@ class Settings(BaseSettings):
         1500: "Leyenda"
     }
 
-    model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8')
+    # Configuration for EventBus dispatch
+    EVENT_BUS_CONCURRENT: bool = False
+    EVENT_BUS_WORKERS: int = 4
+    EVENT_BUS_QUEUE_SIZE: int = 1000
+    EVENT_BUS_LISTENER_TIMEOUT: float = 5.0
+
+    # Configuration for the audit sink (disabled when AUDIT_SINK_PATH is unset)
+    AUDIT_SINK_PATH: str | None = None
+    AUDIT_SINK_BACKEND: str = "jsonl"  # "jsonl" o "sqlite"
+    AUDIT_FLUSH_INTERVAL: float = 1.0
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_MAX_BUFFER: int = 10000
+    AUDIT_MAX_BYTES: int = 10 * 1024 * 1024
+    AUDIT_BACKUP_COUNT: int = 5
+
+    # Configuration for the write-behind point transaction ledger
+    POINTS_LEDGER_FLUSH_MS: int = 250
+    POINTS_LEDGER_BATCH_SIZE: int = 500
+    POINTS_LEDGER_SPOOL_PATH: str | None = "data/point_ledger.spool.jsonl"
+    POINTS_SNAPSHOT_SETTLE_SECONDS: int = 60
+    POINTS_ARCHIVE_BATCH_SIZE: int = 10000
+
+    # Asyncio cron scheduler (last-run state is persisted for catch-up after restarts)
+    SCHEDULER_STATE_PATH: str | None = "data/scheduler_state.json"
+    SCHEDULER_MAX_CONCURRENCY: int = 2
+    SCHEDULER_JITTER_SECONDS: float = 30.0
+
+    # VIP expiry: users revoked per UPDATE batch
+    VIP_REVOKE_BATCH_SIZE: int = 500
+
+    # Per-user flood limits by action class, enforced before any DB session is opened
+    RATE_LIMITS: Dict[str, Dict[str, float | str]] = {
+        "message": {"algorithm": "sliding_window", "limit": 20, "period": 60},
+        "callback": {"algorithm": "token_bucket", "limit": 60, "period": 60, "burst": 10},
+        "reaction": {"algorithm": "token_bucket", "limit": 30, "period": 60, "burst": 10},
+    }
+    RATE_LIMIT_IDLE_SECONDS: float = 300.0
+    # "memory" (one process) or "sqlite" (state shared by every worker on the host)
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_SQLITE_PATH: str = "data/rate_limits.sqlite3"
+    # Lock wait per update; it blocks the event loop, so keep it in the tens of ms
+    RATE_LIMIT_SQLITE_BUSY_MS: int = 50
+
+    # In-memory leaderboards (global and weekly), reconciled against the database
+    LEADERBOARD_TOP_K: int = 100
+    LEADERBOARD_RECONCILE_SECONDS: float = 600.0
+
+    # Per-user bitset cache of unlocked narrative fragments
+    FRAGMENT_CACHE_SIZE: int = 10000
+    FRAGMENT_CACHE_TTL_SECONDS: float = 300.0
+
+    # Achievement rule engine: unlocks are written to user_achievements in batches
+    ACHIEVEMENTS_FLUSH_MS: int = 1000
+    ACHIEVEMENTS_BATCH_SIZE: int = 500
+
+    # Nightly reset of daily missions (chunked by user_id range)
+    # Category of data/missions.json whose progress is reset every night.
+    # Empty (the default) disables the job: the catalog has no daily missions yet.
+    DAILY_MISSION_CATEGORY: str = ""
+    DAILY_RESET_CHUNK_ROWS: int = 5000
+    DAILY_RESET_PAUSE_MS: int = 50
+
+    # Hot reload of story/mission content (mtime polling; 0 disables it)
+    CONTENT_RELOAD_INTERVAL: float = 2.0
+
+    # Metrics: Prometheus-style endpoint (opt-in: disabled when METRICS_PORT is 0) and log summary.
+    # With several workers on one host give each one its own port.
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 0
+    METRICS_LOG_INTERVAL: float = 300.0
+
+    # .env también contiene variables de otros componentes (p. ej. TELEGRAM_BOT_TOKEN)
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
 
 
 # Create a single instance to be used across the application
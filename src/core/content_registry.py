@@ -0,0 +1,175 @@
+# src/core/content_registry.py
+"""
+Registro de contenido compartido por todo el proceso.
+
+Cada fichero de contenido (historia, misiones) se carga y compila una sola
+vez por ruta, aunque se creen muchas instancias de los servicios que lo
+usan. Una tarea en segundo plano compara ``mtime``/tamaño cada
+``poll_interval`` segundos; si el fichero cambió, lo vuelve a cargar en un
+hilo y, sólo si la nueva versión valida, la publica reemplazando la
+referencia de la entrada (una asignación, atómica para el event loop). Los
+valores publicados no se modifican nunca: quien ya tenía una referencia
+sigue viendo una versión coherente hasta que la vuelva a pedir.
+
+Tras cada recarga se publica ``content_reloaded(kind, path, version)`` en
+el EventBus para que las cachés derivadas se invaliden.
+"""
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[Path], Any]
+
+
+class ContentEntry:
+    """Versión vigente de un fichero de contenido; ``value`` se reemplaza, nunca se muta."""
+
+    __slots__ = ("kind", "path", "loader", "value", "version", "_signature")
+
+    def __init__(self, kind: str, path: Path, loader: Loader):
+        self.kind = kind
+        self.path = path
+        self.loader = loader
+        self.value: Any = None
+        self.version = 0
+        self._signature: Optional[Tuple[int, int]] = None
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def changed(self) -> bool:
+        return self._stat() != self._signature
+
+    def load(self) -> Tuple[Any, Optional[Tuple[int, int]]]:
+        # La firma se toma antes de leer: un cambio durante la carga se vuelve a detectar.
+        signature = self._stat()
+        return self.loader(self.path), signature
+
+    def swap(self, value: Any, signature: Optional[Tuple[int, int]]):
+        self.value = value
+        self._signature = signature
+        self.version += 1
+
+
+class ContentRegistry:
+    """Carga única por ruta y recarga en caliente de los ficheros de contenido."""
+
+    def __init__(self, poll_interval: float = 2.0, event_bus=None):
+        self.poll_interval = poll_interval
+        self._event_bus = event_bus
+        self._entries: Dict[Tuple[str, Path], ContentEntry] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._reloads = 0
+        self._failures = 0
+
+    def configure(self, poll_interval: float, event_bus=None):
+        """Ajusta el intervalo de sondeo (``0`` lo desactiva) y el EventBus de avisos."""
+        self.poll_interval = poll_interval
+        if event_bus is not None:
+            self._event_bus = event_bus
+
+    @property
+    def event_bus(self):
+        if self._event_bus is None:
+            from src.core.event_bus import event_bus
+            self._event_bus = event_bus
+        return self._event_bus
+
+    def register(self, kind: str, path, loader: Loader) -> ContentEntry:
+        """
+        Devuelve la entrada de ``path``, cargándola con ``loader`` la primera vez.
+
+        Args:
+            kind: Tipo de contenido ("story", "missions"...); junto con la ruta
+                  identifica la entrada.
+            path: Fichero de contenido.
+            loader: Función ``path -> valor compilado``; debe validar y lanzar
+                    una excepción si el contenido no es válido.
+
+        Raises:
+            Lo que lance ``loader`` en la carga inicial; la entrada no se registra.
+        """
+        key = (kind, Path(path).resolve())
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = ContentEntry(kind, Path(path), loader)
+            entry.swap(*entry.load())
+            self._entries[key] = entry
+            logger.info(f"Contenido '{kind}' cargado desde {path}")
+        return entry
+
+    def entries(self) -> List[ContentEntry]:
+        return list(self._entries.values())
+
+    def clear(self):
+        """Olvida todas las entradas (las próximas ``register`` recargan)."""
+        self._entries.clear()
+
+    async def reload_changed(self) -> List[ContentEntry]:
+        """
+        Recarga las entradas cuyo fichero cambió y avisa por el EventBus.
+
+        Si la nueva versión no valida se registra el error y se conserva la
+        anterior; se reintentará cuando el fichero vuelva a cambiar.
+        """
+        reloaded = []
+        for entry in self.entries():
+            if not entry.changed():
+                continue
+            try:
+                value, signature = await asyncio.to_thread(entry.load)
+            except Exception as e:
+                self._failures += 1
+                entry._signature = entry._stat()  # no reintentar hasta el próximo cambio
+                logger.error(f"Recarga de '{entry.kind}' desde {entry.path} fallida; se mantiene la versión "
+                             f"{entry.version}: {e}")
+                continue
+            entry.swap(value, signature)
+            self._reloads += 1
+            reloaded.append(entry)
+            logger.info(f"Contenido '{entry.kind}' recargado desde {entry.path} (versión {entry.version})")
+
+        for entry in reloaded:
+            await self.event_bus.publish('content_reloaded', entry.kind, str(entry.path), entry.version)
+        return reloaded
+
+    def start(self):
+        """Arranca el sondeo de cambios (no hace nada con ``poll_interval`` 0)."""
+        if self._task is None and self.poll_interval > 0:
+            self._task = asyncio.create_task(self._run(), name="content-registry")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.reload_changed()
+            except Exception as e:
+                logger.error(f"Error comprobando cambios de contenido: {e}", exc_info=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": {f"{entry.kind}:{entry.path}": entry.version for entry in self.entries()},
+            "reloads": self._reloads,
+            "failures": self._failures,
+        }
+
+
+content_registry = ContentRegistry()
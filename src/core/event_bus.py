@@ -1,16 +1,173 @@
 # src/core/event_bus.py
+import asyncio
+import logging
+import time
 from collections import defaultdict
-from typing import Callable, Any
+from typing import Callable, Any, Dict, Optional
+
+from src.core.config import settings
+from src.core.metrics import EVENT_DISPATCH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class ListenerStats:
+    """Latency counters for the listeners of a single event type."""
+    __slots__ = ("calls", "errors", "timeouts", "total_seconds", "max_seconds")
 
-class EventBus:
     def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, elapsed: float):
+        self.calls += 1
+        self.total_seconds += elapsed
+        if elapsed > self.max_seconds:
+            self.max_seconds = elapsed
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "avg_ms": (self.total_seconds / self.calls * 1000) if self.calls else 0.0,
+            "max_ms": self.max_seconds * 1000,
+        }
+
+
+class EventBus:
+    """
+    Publica eventos a los listeners suscritos.
+
+    Por defecto cada listener se espera uno tras otro dentro de ``publish``.
+    Con ``concurrent=True`` los eventos se encolan en una cola acotada y un
+    pool de workers los despacha, ejecutando los listeners de cada evento en
+    paralelo con un timeout por listener. Si la cola está llena, ``publish``
+    espera (backpressure) en lugar de crecer sin límite.
+
+    En modo concurrente los listeners corren después de que el handler que
+    publicó el evento haya continuado, así que no deben depender de objetos
+    con vida limitada a la petición (por ejemplo, la sesión de base de datos).
+    """
+    def __init__(
+        self,
+        concurrent: bool = False,
+        workers: int = 4,
+        max_queue_size: int = 1000,
+        listener_timeout: Optional[float] = 5.0,
+    ):
         self.listeners = defaultdict(list)
+        self.concurrent = concurrent
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.listener_timeout = listener_timeout
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: list[asyncio.Task] = []
+        self._queue_depth: Dict[str, int] = defaultdict(int)
+        self._listener_stats: Dict[str, ListenerStats] = defaultdict(ListenerStats)
+
+    @classmethod
+    def from_settings(cls, settings) -> "EventBus":
+        """Builds an EventBus using the EVENT_BUS_* values from Settings."""
+        return cls(
+            concurrent=settings.EVENT_BUS_CONCURRENT,
+            workers=settings.EVENT_BUS_WORKERS,
+            max_queue_size=settings.EVENT_BUS_QUEUE_SIZE,
+            listener_timeout=settings.EVENT_BUS_LISTENER_TIMEOUT,
+        )
 
     def subscribe(self, event_type: str, listener: Callable):
         self.listeners[event_type].append(listener)
 
     async def publish(self, event_type: str, *args, **kwargs):
-        for listener in self.listeners[event_type]:
-            await listener(*args, **kwargs)
+        if not self.concurrent:
+            with EVENT_DISPATCH_SECONDS.labels("event_bus", event_type).time():
+                for listener in self.listeners[event_type]:
+                    await self._run_listener(event_type, listener, args, kwargs, timeout=None, propagate=True)
+            return
+
+        if not self.listeners[event_type]:
+            return
+        if not self._worker_tasks:
+            self.start()
+        self._queue_depth[event_type] += 1
+        await self._queue.put((event_type, args, kwargs))
+
+    def start(self):
+        """Starts the worker pool. Only needed in concurrent mode."""
+        if self._worker_tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(), name=f"event-bus-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"EventBus concurrent mode started with {self.workers} workers (queue size {self.max_queue_size}).")
+
+    async def drain(self):
+        """Waits until every queued event has been dispatched."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self):
+        """Dispatches the pending events and stops the worker pool."""
+        if not self._worker_tasks:
+            return
+        await self.drain()
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+
+    async def _worker(self):
+        while True:
+            event_type, args, kwargs = await self._queue.get()
+            self._queue_depth[event_type] -= 1
+            try:
+                with EVENT_DISPATCH_SECONDS.labels("event_bus", event_type).time():
+                    await asyncio.gather(*(
+                        self._run_listener(event_type, listener, args, kwargs, timeout=self.listener_timeout)
+                        for listener in list(self.listeners[event_type])
+                    ))
+            finally:
+                self._queue.task_done()
+
+    async def _run_listener(self, event_type: str, listener: Callable, args, kwargs, timeout, propagate: bool = False):
+        stats = self._listener_stats[event_type]
+        start = time.perf_counter()
+        try:
+            if timeout is None:
+                await listener(*args, **kwargs)
+            else:
+                await asyncio.wait_for(listener(*args, **kwargs), timeout)
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            logger.warning(f"Listener '{getattr(listener, '__name__', listener)}' for '{event_type}' timed out after {timeout}s.")
+        except Exception as e:
+            stats.errors += 1
+            if propagate:
+                raise
+            logger.error(f"Listener '{getattr(listener, '__name__', listener)}' for '{event_type}' failed: {e}", exc_info=True)
+        finally:
+            stats.record(time.perf_counter() - start)
+
+    def queue_depth(self, event_type: Optional[str] = None):
+        """Returns the pending events for one event type, or all of them by type."""
+        if event_type is not None:
+            return self._queue_depth.get(event_type, 0)
+        return {name: depth for name, depth in self._queue_depth.items() if depth}
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns queue depth and listener latency per event type."""
+        return {
+            event_type: {"queue_depth": self._queue_depth.get(event_type, 0), **stats.as_dict()}
+            for event_type, stats in self._listener_stats.items()
+        }
 
-event_bus = EventBus()
\ No newline at end of file
+# Bus global: modo y tamaño del pool según EVENT_BUS_*; main.py arranca y para los workers.
+event_bus = EventBus.from_settings(settings)
@@ -1,7 +1,11 @@
 # src/core/integration_hub.py
+import inspect
 import logging
 from collections import defaultdict
-from typing import Callable, Any, Dict
+from typing import Callable, Any, Dict, Optional
+
+from src.core.audit_sink import AuditSink
+from src.core.metrics import EVENT_DISPATCH_SECONDS
 
 # Configuración básica de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -9,14 +13,27 @@ logger = logging.getLogger(__name__)
 
 class EventLogger:
     """Registra eventos para auditoría y depuración."""
+    def __init__(self, sink: Optional[AuditSink] = None):
+        """
+        Args:
+            sink: Sink de auditoría por lotes. Si se indica, los eventos se encolan
+                  en él en lugar de formatearse en una línea de log INFO.
+        """
+        self._sink = sink
+
     def log_event(self, event: str, metadata: Dict[str, Any]):
         """
         Registra un evento con sus metadatos asociados.
-        
+
         Args:
             event: El nombre del evento.
             metadata: Un diccionario con datos sobre el evento.
         """
+        if self._sink is not None:
+            self._sink.submit(event, metadata)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[AUDIT] Evento: '%s', Metadata: %s", event, metadata)
+            return
         logger.info(f"[AUDIT] Evento: '{event}', Metadata: {metadata}")
 
 class IntegrationHub:
@@ -49,10 +66,36 @@ class IntegrationHub:
         """
         self._event_logger.log_event(event, data)
         if event in self._handlers:
-            for handler in self._handlers[event]:
+            with EVENT_DISPATCH_SECONDS.labels("integration_hub", event).time():
+                for handler in self._handlers[event]:
+                    try:
+                        handler(data)
+                    except Exception as e:
+                        logger.error(f"Error al ejecutar el handler '{handler.__name__}' para el evento '{event}': {e}", exc_info=True)
+        else:
+            logger.warning(f"No hay handlers registrados para el evento '{event}'.")
+
+    async def route_event_async(self, event: str, data: Dict[str, Any]):
+        """
+        Versión asíncrona de ``route_event``.
+
+        Acepta handlers síncronos y corrutinas: los primeros se ejecutan en línea
+        y las segundas se esperan en orden de registro, sin bloquear el event loop.
+
+        Args:
+            event: El nombre del evento a enrutar.
+            data: El diccionario de datos que se pasará a los handlers.
+        """
+        self._event_logger.log_event(event, data)
+        handlers = self._handlers.get(event)
+        if not handlers:
+            logger.warning(f"No hay handlers registrados para el evento '{event}'.")
+            return
+        with EVENT_DISPATCH_SECONDS.labels("integration_hub", event).time():
+            for handler in list(handlers):
                 try:
-                    handler(data)
+                    result = handler(data)
+                    if inspect.isawaitable(result):
+                        await result
                 except Exception as e:
                     logger.error(f"Error al ejecutar el handler '{handler.__name__}' para el evento '{event}': {e}", exc_info=True)
-        else:
-            logger.warning(f"No hay handlers registrados para el evento '{event}'.")
@@ -0,0 +1,327 @@
+# src/core/metrics.py
+"""
+Métricas de proceso: contadores e histogramas con buckets preasignados.
+
+Todo se actualiza desde el hilo del event loop, así que no se usan locks:
+``observe`` es un ``bisect`` y un incremento sobre una lista creada con el
+hijo. Se exportan en formato de texto de Prometheus (``render``) y como un
+resumen periódico en el log (``log_summary``).
+"""
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Operación de repositorio en curso; etiqueta las sentencias SQL.
+db_operation: ContextVar[str] = ContextVar("db_operation", default="other")
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def quantile(self, q: float) -> float:
+        """Estimación del cuantil ``q`` por el límite superior del bucket."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}, recibió {key}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def samples(self):
+        return self._children.items()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+    def render(self) -> List[str]:
+        lines = []
+        for values, child in self.samples():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {child.value}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._children[()].observe(value)
+
+    def time(self):
+        return self._children[()].time()
+
+    def render(self) -> List[str]:
+        lines = []
+        for values, child in self.samples():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labelnames, values, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {child.sum}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registro de métricas del proceso."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+        elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"La métrica '{name}' ya existe con otro tipo o etiquetas.")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Exposición en formato de texto de Prometheus (versión 0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self, top: int = 5) -> str:
+        """Resumen de una línea por histograma: las series con más tiempo acumulado."""
+        parts = []
+        for metric in self._metrics.values():
+            if not isinstance(metric, Histogram):
+                continue
+            series = sorted(
+                ((values, child) for values, child in metric.samples() if child.count),
+                key=lambda item: item[1].sum, reverse=True,
+            )[:top]
+            for values, child in series:
+                label = ",".join(values) or "-"
+                parts.append(
+                    f"{metric.name}[{label}] n={child.count} "
+                    f"avg={child.sum / child.count * 1000:.1f}ms p95<={child.quantile(0.95) * 1000:.0f}ms"
+                )
+        return "; ".join(parts) if parts else "sin datos"
+
+    def log_summary(self):
+        logger.info(f"Métricas: {self.summary()}")
+
+
+metrics = MetricsRegistry()
+
+# Métricas compartidas por los módulos instrumentados.
+HANDLER_SECONDS = metrics.histogram(
+    "bot_handler_seconds", "Latencia de los handlers de aiogram.", ("router", "handler", "outcome"))
+DB_STATEMENT_SECONDS = metrics.histogram(
+    "db_statement_seconds", "Duración de las sentencias SQL por operación de repositorio.",
+    ("operation", "verb", "outcome"))
+EVENT_DISPATCH_SECONDS = metrics.histogram(
+    "event_dispatch_seconds", "Duración del despacho de eventos a sus listeners.", ("bus", "event"))
+TELEGRAM_REQUEST_SECONDS = metrics.histogram(
+    "telegram_request_seconds", "Latencia de las llamadas a la Bot API.", ("method", "outcome"))
+SCHEDULER_JOB_SECONDS = metrics.histogram(
+    "scheduler_job_seconds", "Duración de las tareas programadas.", ("job", "outcome"),
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0))
+RATE_LIMITED_TOTAL = metrics.counter(
+    "rate_limited_total", "Actualizaciones descartadas por el limitador de frecuencia.", ("action",))
+
+
+def track_db_operation(name: str):
+    """Decorador: etiqueta con ``name`` las sentencias SQL del método decorado."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            token = db_operation.set(name)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                db_operation.reset(token)
+        return wrapper
+    return decorator
+
+
+def instrument_repository(cls):
+    """Decorador de clase: aplica ``track_db_operation`` a cada método público asíncrono."""
+    for attr, value in list(vars(cls).items()):
+        if not attr.startswith("_") and inspect.iscoroutinefunction(value):
+            setattr(cls, attr, track_db_operation(f"{cls.__name__}.{attr}")(value))
+    return cls
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _observe_statement(conn, statement, outcome: str):
+    starts = conn.info.get("metrics_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement and statement.strip() else "-"
+    DB_STATEMENT_SECONDS.labels(db_operation.get(), verb, outcome).observe(elapsed)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _observe_statement(conn, statement, "ok")
+
+
+def _handle_error(exception_context):
+    # Una sentencia que falla no llega a after_cursor_execute: sin esto su
+    # inicio se quedaría en conn.info de una conexión que vive en el pool.
+    conn = exception_context.connection
+    if conn is not None and exception_context.statement is not None:
+        _observe_statement(conn, exception_context.statement, "error")
+
+
+def instrument_engine(engine):
+    """Registra los eventos de SQLAlchemy que miden cada sentencia (una vez por engine)."""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+
+
+async def start_metrics_server(host: str, port: int, registry: MetricsRegistry = metrics):
+    """
+    Sirve ``GET /metrics`` con aiohttp (ya es dependencia de aiogram).
+
+    Si no se puede abrir el puerto (p. ej. otro worker ya lo usa) se registra
+    el error y el bot sigue sin endpoint.
+
+    Returns:
+        El ``AppRunner``; llamar a ``cleanup()`` para detenerlo. ``None`` si
+        no se pudo abrir el puerto.
+    """
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        logger.error(f"No se pudo abrir el endpoint de métricas en {host}:{port}: {e}")
+        await runner.cleanup()
+        return None
+    logger.info(f"Métricas disponibles en http://{host}:{port}/metrics")
+    return runner
+
+
+async def log_summary_periodically(interval: float, registry: MetricsRegistry = metrics):
+    """Escribe ``registry.summary()`` en el log cada ``interval`` segundos."""
+    while True:
+        await asyncio.sleep(interval)
+        registry.log_summary()
@@ -1,26 +1,300 @@
+# src/core/scheduler_system.py
+"""
+Planificador de tareas sobre el event loop del bot.
 
-import schedule
+Las tareas se definen con expresiones cron de cinco campos (``minuto hora
+día-del-mes mes día-de-la-semana``) o con los alias ``@hourly``, ``@daily``,
+``@weekly``, ``@monthly``, ``@yearly`` y los nombres antiguos ``daily``,
+``hourly`` y ``every_minute``. Cada ejecución espera un retardo aleatorio de
+hasta ``jitter`` segundos y pasa por un semáforo que limita cuántas tareas
+corren a la vez; una tarea nunca se solapa consigo misma. Las funciones
+síncronas se ejecutan en un hilo.
+
+La hora programada de la última ejecución de cada tarea se guarda en un JSON.
+Al arrancar, si alguna ejecución quedó pendiente mientras el bot estaba
+parado, se lanza una vez (las pérdidas se agrupan en una sola ejecución).
+"""
+import asyncio
+import inspect
+import json
+import logging
+import os
+import random
 import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Optional
 
-class SchedulerSystem:
-    def __init__(self):
-        pass
-
-    def add_job(self, cron_string, task_function):
-        # This is a simplified representation. 
-        # A real cron implementation would parse the cron_string.
-        # For now, we'll assume cron_string is something like "daily" or "hourly"
-        if cron_string == "daily":
-            schedule.every().day.at("00:00").do(task_function)
-        elif cron_string == "hourly":
-            schedule.every().hour.do(task_function)
-        elif cron_string == "every_minute":
-            schedule.every().minute.do(task_function)
+from src.core.metrics import SCHEDULER_JOB_SECONDS
+
+logger = logging.getLogger(__name__)
+
+ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+    # Nombres que aceptaba la versión anterior basada en ``schedule``.
+    "daily": "0 0 * * *",
+    "hourly": "0 * * * *",
+    "every_minute": "* * * * *",
+}
+MONTH_NAMES = {name: index for index, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+DAY_NAMES = {name: index for index, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+
+
+def _parse_field(field: str, low: int, high: int, names: Dict[str, int]) -> FrozenSet[int]:
+    values = set()
+    for part in field.lower().split(","):
+        range_part, _, step_part = part.partition("/")
+        step = int(step_part) if step_part else 1
+        if range_part == "*":
+            start, end = low, high
         else:
-            print(f"Unsupported cron string: {cron_string}")
+            first, _, last = range_part.partition("-")
+            start = names[first] if first in names else int(first)
+            end = (names[last] if last in names else int(last)) if last else (high if step_part else start)
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f"Campo cron fuera de rango: '{part}' (permitido {low}-{high})")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronExpression:
+    """Expresión cron de cinco campos con la semántica de Vixie cron."""
+
+    __slots__ = ("expression", "minutes", "hours", "days", "months", "weekdays", "_any_day", "_any_weekday")
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = ALIASES.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Expresión cron inválida: '{expression}' (se esperan 5 campos)")
+        minute, hour, day, month, weekday = fields
+        self.minutes = _parse_field(minute, 0, 59, {})
+        self.hours = _parse_field(hour, 0, 23, {})
+        self.days = _parse_field(day, 1, 31, {})
+        self.months = _parse_field(month, 1, 12, MONTH_NAMES)
+        # 7 también es domingo.
+        self.weekdays = frozenset(d % 7 for d in _parse_field(weekday, 0, 7, DAY_NAMES))
+        self._any_day = day == "*"
+        self._any_weekday = weekday == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.isoweekday() % 7) in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok  # ambos restringidos: basta con uno
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Primer instante (al minuto) estrictamente posterior a ``moment`` que cumple la expresión."""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"La expresión cron '{self.expression}' no tiene ejecuciones en los próximos 5 años")
+
+    def __repr__(self) -> str:
+        return f"CronExpression('{self.expression}')"
+
+
+class ScheduledJob:
+    __slots__ = ("name", "cron", "func", "jitter", "catch_up", "next_run", "last_run", "running",
+                 "runs", "failures", "last_duration")
+
+    def __init__(self, name: str, cron: CronExpression, func: Callable, jitter: float, catch_up: bool):
+        self.name = name
+        self.cron = cron
+        self.func = func
+        self.jitter = jitter
+        self.catch_up = catch_up
+        self.next_run: Optional[datetime] = None
+        self.last_run: Optional[datetime] = None
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.last_duration = 0.0
 
-    def run_pending_jobs(self):
+
+class SchedulerSystem:
+    def __init__(self, state_path: Optional[str] = None, max_concurrency: int = 2, jitter_seconds: float = 0.0,
+                 clock: Callable[[], datetime] = datetime.now):
+        self.state_path = Path(state_path) if state_path else None
+        self.jitter_seconds = jitter_seconds
+        self._clock = clock
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._jobs: Dict[str, ScheduledJob] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+
+    @classmethod
+    def from_settings(cls, settings) -> "SchedulerSystem":
+        """Builds the scheduler configured by the SCHEDULER_* settings."""
+        return cls(
+            state_path=settings.SCHEDULER_STATE_PATH,
+            max_concurrency=settings.SCHEDULER_MAX_CONCURRENCY,
+            jitter_seconds=settings.SCHEDULER_JITTER_SECONDS,
+        )
+
+    def add_job(self, cron_string: str, task_function: Callable, name: Optional[str] = None,
+                jitter: Optional[float] = None, catch_up: bool = True) -> ScheduledJob:
+        """
+        Registra una tarea.
+
+        Args:
+            cron_string: Expresión cron o alias (``@daily``, ``hourly``...).
+            task_function: Función sin argumentos, síncrona o corrutina.
+            name: Nombre único (por defecto, el ``__qualname__`` de la función).
+            jitter: Retardo aleatorio máximo en segundos (por defecto, el del planificador).
+            catch_up: Si la ejecución perdida mientras el bot estaba parado se lanza al arrancar.
+
+        Raises:
+            ValueError: Si la expresión no es válida o el nombre ya existe.
+        """
+        name = name or getattr(task_function, "__qualname__", repr(task_function))
+        if name in self._jobs:
+            raise ValueError(f"Ya existe una tarea llamada '{name}'")
+        job = ScheduledJob(name, CronExpression(cron_string), task_function,
+                           self.jitter_seconds if jitter is None else jitter, catch_up)
+        self._jobs[name] = job
+        if self._task is not None:
+            job.next_run = job.cron.next_after(self._clock())
+            self._wakeup.set()
+        return job
+
+    def _load_state(self) -> Dict[str, str]:
+        if self.state_path is None or not self.state_path.exists():
+            return {}
+        try:
+            return json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.error(f"No se pudo leer el estado del planificador {self.state_path}: {e}")
+            return {}
+
+    def _write_state(self, state: Dict[str, str]):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.state_path)
+
+    async def _save_state(self):
+        if self.state_path is None:
+            return
+        state = {job.name: job.last_run.isoformat() for job in self._jobs.values() if job.last_run}
+        await asyncio.to_thread(self._write_state, state)
+
+    def start(self):
+        """Arranca el planificador en el event loop actual y lanza las ejecuciones perdidas."""
+        if self._task is not None:
+            return
+        now = self._clock()
+        state = self._load_state()
+        for job in self._jobs.values():
+            if job.name in state:
+                job.last_run = datetime.fromisoformat(state[job.name])
+                missed = job.cron.next_after(job.last_run)
+                if missed <= now and job.catch_up:
+                    logger.info(f"Tarea '{job.name}': ejecución perdida de {missed:%Y-%m-%d %H:%M}, se lanza ahora.")
+                    job.next_run = missed
+                    continue
+            job.next_run = job.cron.next_after(now)
+        self._task = asyncio.create_task(self._run(), name="scheduler")
+        logger.info(f"Planificador iniciado con {len(self._jobs)} tareas.")
+
+    async def stop(self):
+        """Detiene el planificador y cancela las tareas en curso."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        for task in list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(self._task, *self._running.values(), return_exceptions=True)
+        self._task = None
+        self._running.clear()
+
+    async def _run(self):
         while True:
-            schedule.run_pending()
-            time.sleep(1) # wait one second
+            now = self._clock()
+            for job in self._jobs.values():
+                if job.next_run is not None and job.next_run <= now:
+                    scheduled_for, job.next_run = job.next_run, job.cron.next_after(max(now, job.next_run))
+                    if job.running:
+                        logger.warning(f"Tarea '{job.name}' sigue en curso; se omite la ejecución de {scheduled_for}.")
+                        continue
+                    job.running = True
+                    self._running[job.name] = asyncio.create_task(self._execute(job, scheduled_for))
+
+            upcoming = [job.next_run for job in self._jobs.values() if job.next_run is not None]
+            # Como mucho un minuto dormido: tolera cambios de hora del sistema.
+            delay = min([(min(upcoming) - self._clock()).total_seconds(), 60.0]) if upcoming else 60.0
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(delay, 0.0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _execute(self, job: ScheduledJob, scheduled_for: datetime):
+        try:
+            if job.jitter:
+                await asyncio.sleep(random.uniform(0, job.jitter))
+            async with self._semaphore:
+                await self._call(job, scheduled_for)
+        finally:
+            job.running = False
+            self._running.pop(job.name, None)
+
+    async def _call(self, job: ScheduledJob, scheduled_for: datetime):
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            if inspect.iscoroutinefunction(job.func):
+                await job.func()
+            else:
+                result = await asyncio.to_thread(job.func)
+                if inspect.isawaitable(result):
+                    await result
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            outcome = "error"
+            job.failures += 1
+            logger.error(f"Tarea '{job.name}' ({scheduled_for:%Y-%m-%d %H:%M}) falló: {e}", exc_info=True)
+        finally:
+            job.last_duration = time.perf_counter() - started
+            SCHEDULER_JOB_SECONDS.labels(job.name, outcome).observe(job.last_duration)
+        job.runs += 1
+        # Una ejecución fallida también cuenta: no se reintenta en bucle al reiniciar.
+        job.last_run = scheduled_for
+        await self._save_state()
+        logger.info(f"Tarea '{job.name}' terminada ({outcome}) en {job.last_duration:.2f}s.")
 
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            job.name: {
+                "cron": job.cron.expression,
+                "next_run": job.next_run.isoformat() if job.next_run else None,
+                "last_run": job.last_run.isoformat() if job.last_run else None,
+                "running": job.running,
+                "runs": job.runs,
+                "failures": job.failures,
+                "last_duration_s": job.last_duration,
+            }
+            for job in self._jobs.values()
+        }
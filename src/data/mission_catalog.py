@@ -1,54 +1,145 @@
 import json
 import random
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from src.core.content_registry import ContentRegistry, content_registry
+
+class AliasTable:
+    """Weighted sampling in O(1) per draw (Vose's alias method).
+
+    Built once in O(n) from non-negative weights; each draw is one uniform
+    index plus one biased coin flip.
+    """
+
+    __slots__ = ("items", "_prob", "_alias")
+
+    def __init__(self, items: Sequence[Dict], weights: Sequence[float]):
+        self.items = items
+        n = len(items)
+        total = float(sum(weights))
+        if n and total <= 0:
+            raise ValueError("Alias table weights must add up to a positive value.")
+        scaled = [weight * n / total for weight in weights]
+        self._prob = [1.0] * n
+        self._alias = list(range(n))
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self._prob[less] = scaled[less]
+            self._alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Lo que queda (por redondeo) tiene probabilidad 1.
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def sample(self, rng: random.Random = random) -> Dict:
+        index = rng.randrange(len(self.items))
+        return self.items[index] if rng.random() < self._prob[index] else self.items[self._alias[index]]
+
+
+class MissionSet:
+    """Validated, immutable version of a missions file.
+
+    Missions are indexed by id and by category, with an alias table per
+    category (and one for the whole catalog) driven by the optional
+    ``weight`` field (default 1). Missions with weight 0 are never drawn.
+    """
+
+    __slots__ = ("missions", "by_id", "by_category", "_tables")
+
+    def __init__(self, missions: List[Dict]):
+        self.missions = missions
+        self.by_id: Dict[str, Dict] = {mission["id"]: mission for mission in missions}
+        self.by_category: Dict[str, List[Dict]] = {}
+        for mission in missions:
+            self.by_category.setdefault(mission.get("category"), []).append(mission)
+
+        self._tables: Dict[Optional[str], AliasTable] = {}
+        for category, group in [(None, missions), *self.by_category.items()]:
+            drawable = [mission for mission in group if _weight(mission) > 0]
+            if drawable:
+                self._tables[category] = AliasTable(drawable, [_weight(m) for m in drawable])
+
+    def table(self, category: Optional[str] = None) -> Optional[AliasTable]:
+        """Alias table for ``category`` (all missions if None), or None if nothing can be drawn."""
+        return self._tables.get(category)
+
+
+def _weight(mission: Dict) -> float:
+    return float(mission.get("weight", 1.0))
+
+
+def load_missions(missions_file: Path) -> MissionSet:
+    """Loads and validates missions from the specified JSON file (ContentRegistry loader).
+
+    Raises:
+        FileNotFoundError: If the missions file cannot be found.
+        ValueError: If the JSON is malformed or a mission is invalid.
+    """
+    required_keys = {"id", "title", "description", "reward", "time_limit", "category"}
+    try:
+        with open(missions_file, 'r', encoding='utf-8') as f:
+            missions_data = json.load(f)
+
+        if not isinstance(missions_data, list):
+            raise ValueError("Missions JSON must be a list of mission objects.")
+
+        for mission in missions_data:
+            if not required_keys.issubset(mission.keys()):
+                raise ValueError(f"Invalid mission data. Missing keys in: {mission}")
+            if not isinstance(mission.get("weight", 1), (int, float)) or mission.get("weight", 1) < 0:
+                raise ValueError(f"Invalid mission weight in: {mission}")
+        return MissionSet(missions_data)
+    except FileNotFoundError:
+        print(f"Error: Missions file not found at '{missions_file}'.")
+        raise
+    except json.JSONDecodeError:
+        print(f"Error: Could not decode JSON from '{missions_file}'. Check for syntax errors.")
+        raise
+    except ValueError as e:
+        print(f"Error validating missions data: {e}")
+        raise
+
 
 class MissionCatalog:
     """A catalog to load and manage missions from a JSON file.
 
     Handles loading, validation, and retrieval of missions, providing methods
     to access all missions, a specific mission by ID, or a random mission
-    optionally filtered by category.
+    optionally filtered by category. The file is loaded once per process and
+    hot-reloaded through the content registry; lookups by id and weighted
+    draws by category are O(1).
     """
 
-    def __init__(self, missions_file: Path = Path("data/missions.json")):
+    def __init__(self, missions_file: Path = Path("data/missions.json"), registry: Optional[ContentRegistry] = None):
         """Initializes the MissionCatalog by loading and validating missions.
 
         Args:
             missions_file (Path): The path to the missions JSON file.
+            registry (Optional[ContentRegistry]): Content registry to use
+                (defaults to the process-wide one).
         
         Raises:
             FileNotFoundError: If the missions file cannot be found.
             ValueError: If the JSON is malformed or a mission is invalid.
         """
-        self._missions: List[Dict] = []
-        self._missions_by_id: Dict[str, Dict] = {}
-        self._load_missions(missions_file)
-
-    def _load_missions(self, missions_file: Path):
-        """Loads and validates missions from the specified JSON file."""
-        required_keys = {"id", "title", "description", "reward", "time_limit", "category"}
-        try:
-            with open(missions_file, 'r', encoding='utf-8') as f:
-                missions_data = json.load(f)
-            
-            if not isinstance(missions_data, list):
-                raise ValueError("Missions JSON must be a list of mission objects.")
-
-            for mission in missions_data:
-                if not required_keys.issubset(mission.keys()):
-                    raise ValueError(f"Invalid mission data. Missing keys in: {mission}")
-                self._missions.append(mission)
-                self._missions_by_id[mission["id"]] = mission
-        except FileNotFoundError:
-            print(f"Error: Missions file not found at '{missions_file}'.")
-            raise
-        except json.JSONDecodeError:
-            print(f"Error: Could not decode JSON from '{missions_file}'. Check for syntax errors.")
-            raise
-        except ValueError as e:
-            print(f"Error validating missions data: {e}")
-            raise
+        registry = registry if registry is not None else content_registry
+        self._content = registry.register("missions", missions_file, load_missions)
+
+    def _current(self) -> MissionSet:
+        return self._content.value
+
+    @property
+    def _missions(self) -> List[Dict]:
+        return self._current().missions
+
+    @property
+    def _missions_by_id(self) -> Dict[str, Dict]:
+        return self._current().by_id
 
     def get_all_missions(self) -> List[Dict]:
         """Retrieves all available missions.
@@ -69,26 +160,64 @@ class MissionCatalog:
         """
         return self._missions_by_id.get(mission_id)
 
-    def get_random_mission(self, category: Optional[str] = None) -> Optional[Dict]:
-        """Returns a random mission, optionally filtered by category.
+    def get_random_mission(self, category: Optional[str] = None,
+                           rng: random.Random = random) -> Optional[Dict]:
+        """Returns a weighted random mission, optionally filtered by category.
+
+        Each mission is drawn with probability proportional to its ``weight``
+        (1 when absent) in O(1), using the alias table precomputed at load.
 
         Args:
             category (Optional[str]): The category to filter by. If None,
                 a random mission from all available missions is returned.
+            rng (random.Random): Random source (the ``random`` module by default).
 
         Returns:
             Optional[Dict]: A randomly selected mission dictionary, or None if
                 no missions are available or the category has no missions.
         """
-        if not self._missions:
-            return None
-
-        if category:
-            categorized_missions = [
-                m for m in self._missions if m.get("category") == category
-            ]
-            if not categorized_missions:
-                return None
-            return random.choice(categorized_missions)
-        
-        return random.choice(self._missions)
+        table = self._current().table(category or None)
+        return table.sample(rng) if table is not None else None
+
+    def get_missions_by_category(self, category: str) -> List[Dict]:
+        """Returns the missions of ``category`` (precomputed, do not modify)."""
+        return self._current().by_category.get(category, [])
+
+    def sample_daily_missions(self, user_ids: Iterable[int], count: int = 1,
+                              category: Optional[str] = None,
+                              seed: Optional[int] = None) -> Dict[int, List[Dict]]:
+        """Draws ``count`` distinct weighted missions for each user in one pass.
+
+        Used by the nightly daily-mission assignment: the catalog version and
+        its alias table are read once for the whole batch.
+
+        Args:
+            user_ids (Iterable[int]): Users to assign missions to.
+            count (int): Missions per user; capped at the drawable missions.
+            category (Optional[str]): Restrict the draw to one category.
+            seed (Optional[int]): Seed for a reproducible assignment.
+
+        Returns:
+            Dict[int, List[Dict]]: The missions drawn for each user.
+        """
+        table = self._current().table(category or None)
+        if table is None:
+            return {user_id: [] for user_id in user_ids}
+        rng = random.Random(seed)
+        count = min(count, len(table))
+        assignments: Dict[int, List[Dict]] = {}
+        for user_id in user_ids:
+            drawn: Dict[str, Dict] = {}
+            attempts = 0
+            while len(drawn) < count and attempts < count * 20:
+                mission = table.sample(rng)
+                drawn.setdefault(mission["id"], mission)
+                attempts += 1
+            if len(drawn) < count:
+                # Pesos muy desiguales: completa con las de más peso que falten.
+                for mission in sorted(table.items, key=_weight, reverse=True):
+                    if len(drawn) == count:
+                        break
+                    drawn.setdefault(mission["id"], mission)
+            assignments[user_id] = list(drawn.values())
+        return assignments
@@ -1,17 +1,83 @@
 # src/database/connection.py
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+import logging
 import os
+from typing import Any, Dict
 
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+
+from src.core.config import Settings, settings
+from src.core.metrics import instrument_engine
 # Import all models to ensure they are registered with SQLAlchemy Base
 from src.database.models import Base, User, UserProgress, Mission, UserMission, Achievement, UserAchievement
+from src.database.database_setup import Base as MissionProgressBase
+from src.models.daily_reset_checkpoint import DailyResetCheckpoint
+from src.models.user_mission_progress import UserMissionProgress
+
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable not set.")
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+def _is_memory_sqlite(url) -> bool:
+    database = url.database or ""
+    return database in ("", ":memory:") or "memory" in database or url.query.get("mode") == "memory"
+
+def build_engine_options(database_url: str, config: Settings) -> Dict[str, Any]:
+    """
+    Builds the keyword arguments for ``create_async_engine`` from the DB_* settings.
+
+    Pool sizing only applies to drivers that use a queue pool; an in-memory
+    SQLite database runs on a single static connection.
+    """
+    url = make_url(database_url)
+    options: Dict[str, Any] = {
+        "echo": config.DB_ECHO,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+    }
+    backend = url.get_backend_name()
+    if backend == "sqlite" and _is_memory_sqlite(url):
+        return options
+
+    options.update(
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+    )
+    if backend == "postgresql" and url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"prepared_statement_cache_size": config.DB_STATEMENT_CACHE_SIZE}
+    return options
+
+def _sqlite_pragmas(config: Settings) -> Dict[str, Any]:
+    return {
+        "journal_mode": config.SQLITE_JOURNAL_MODE,
+        "synchronous": config.SQLITE_SYNCHRONOUS,
+        "mmap_size": config.SQLITE_MMAP_SIZE,
+        "busy_timeout": config.SQLITE_BUSY_TIMEOUT_MS,
+    }
+
+def create_engine_from_settings(database_url: str, config: Settings) -> AsyncEngine:
+    """Creates the async engine and, for SQLite, applies the PRAGMAs on every new connection."""
+    new_engine = create_async_engine(database_url, **build_engine_options(database_url, config))
+
+    if new_engine.dialect.name == "sqlite":
+        pragmas = _sqlite_pragmas(config)
+
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    return new_engine
+
+engine = create_engine_from_settings(DATABASE_URL, settings)
+instrument_engine(engine)
 
 AsyncSessionLocal = async_sessionmaker(
     autocommit=False,
@@ -21,6 +87,33 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False
 )
 
+async def check_engine_profile(target: AsyncEngine = None) -> Dict[str, Any]:
+    """
+    Startup self-check: opens a connection and logs the effective engine settings.
+
+    Returns:
+        The effective settings, as logged.
+    """
+    target = target or engine
+    profile: Dict[str, Any] = {
+        "url": target.url.render_as_string(hide_password=True),
+        "echo": target.echo,
+        "pool": type(target.pool).__name__,
+        "pool_status": target.pool.status(),
+    }
+    async with target.connect() as conn:
+        if target.dialect.name == "sqlite":
+            for name in ("journal_mode", "synchronous", "mmap_size", "busy_timeout"):
+                profile[name] = (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+        else:
+            profile["server_version"] = (await conn.execute(text("SHOW server_version"))).scalar()
+            if target.dialect.driver == "asyncpg":
+                profile["prepared_statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+    logger.info(f"Database engine profile: {profile}")
+    if profile["echo"]:
+        logger.warning("SQL statement logging (DB_ECHO) is enabled.")
+    return profile
+
 async def get_db_session():
     async with AsyncSessionLocal() as session:
         yield session
@@ -28,4 +121,7 @@ async def get_db_session():
 async def init_db():
     async with engine.begin() as conn:
         # await conn.run_sync(Base.metadata.drop_all) # Removed temporary drop_all
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+        # Progreso de misiones y checkpoints del reinicio diario (otra base declarativa)
+        await conn.run_sync(MissionProgressBase.metadata.create_all)
+    await check_engine_profile()
@@ -1,6 +1,6 @@
 # src/database/models.py
 from sqlalchemy import (Column, Integer, String, DateTime, ForeignKey, JSON,
-                        Float, BigInteger)
+                        Float, BigInteger, Index)
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime
 
@@ -12,8 +12,8 @@ class User(Base):
     id = Column(BigInteger, primary_key=True, comment="Telegram User ID")
     username = Column(String, nullable=True)
     role = Column(String, default='free', nullable=False)
-    points = Column(Integer, default=0, nullable=False)
-    vip_expires_at = Column(DateTime, nullable=True)
+    points = Column(Integer, default=0, nullable=False, index=True)
+    vip_expires_at = Column(DateTime, nullable=True, index=True)
     
     progress = relationship("UserProgress", back_populates="user", uselist=False, cascade="all, delete-orphan")
     missions = relationship("UserMission", back_populates="user", cascade="all, delete-orphan")
@@ -28,6 +28,7 @@ class UserProgress(Base):
     
     user_id = Column(BigInteger, ForeignKey('users.id'), primary_key=True)
     current_story_node = Column(String, nullable=True)
+    # Obsoleto: los desbloqueos viven en user_unlocked_fragments (ver UserUnlockedFragment).
     unlocked_fragments = Column(JSON, default=list, nullable=False)
     diana_state = Column(String, default='Enigmática', nullable=False)
     dominant_archetype = Column(String, nullable=True)
@@ -93,6 +94,17 @@ class UserAchievement(Base):
     def __repr__(self):
         return f"<UserAchievement(user_id={self.user_id}, achievement_id={self.achievement_id})>"
 
+class UserUnlockedFragment(Base):
+    __tablename__ = 'user_unlocked_fragments'
+
+    # La clave primaria compuesta es también el índice de "fragmentos de un usuario".
+    user_id = Column(BigInteger, ForeignKey('users.id'), primary_key=True)
+    fragment_id = Column(String, primary_key=True)
+    unlocked_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<UserUnlockedFragment(user_id={self.user_id}, fragment_id='{self.fragment_id}')>"
+
 class PointTransaction(Base):
     __tablename__ = 'point_transactions'
 
@@ -104,5 +116,39 @@ class PointTransaction(Base):
 
     user = relationship("User", back_populates="point_transactions")
 
+    __table_args__ = (
+        Index('ix_point_transactions_user_created', 'user_id', 'created_at'),
+    )
+
     def __repr__(self):
         return f"<PointTransaction(user_id={self.user_id}, points={self.points}, reason='{self.reason}')>"
+
+class PointBalanceSnapshot(Base):
+    """Saldo acumulado del ledger por usuario hasta ``last_transaction_id`` (inclusive)."""
+    __tablename__ = 'point_balance_snapshots'
+
+    user_id = Column(BigInteger, ForeignKey('users.id'), primary_key=True)
+    balance = Column(Integer, nullable=False, default=0)
+    last_transaction_id = Column(Integer, nullable=False, index=True)
+    last_transaction_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<PointBalanceSnapshot(user_id={self.user_id}, balance={self.balance})>"
+
+class PointTransactionArchive(Base):
+    """Transacciones de meses cerrados, ya incluidas en los snapshots de saldo."""
+    __tablename__ = 'point_transactions_archive'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(BigInteger, nullable=False)
+    points = Column(Integer, nullable=False)
+    reason = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('ix_point_transactions_archive_user_created', 'user_id', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f"<PointTransactionArchive(user_id={self.user_id}, points={self.points})>"
@@ -1,10 +1,57 @@
+from sqlalchemy import delete, func, literal, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.exc import IntegrityError
-from typing import List, Optional
-from src.database.models import User, UserProgress, Mission, Achievement, UserAchievement, UserMission, PointTransaction
-from datetime import datetime, date
+from sqlalchemy.orm import aliased
+from typing import Any, Dict, List, Optional
+from src.core.metrics import instrument_repository
+from src.database.models import (User, UserProgress, Mission, Achievement, UserAchievement, UserMission,
+                                 PointTransaction, PointBalanceSnapshot, PointTransactionArchive,
+                                 UserUnlockedFragment)
+from datetime import datetime, date, timedelta
 
+def _column_defaults(model, exclude=()) -> Dict[str, Any]:
+    """Evalúa los defaults de Python de un modelo (INSERT ... SELECT no los aplica)."""
+    defaults = {}
+    for column in model.__table__.columns:
+        if column.name in exclude or column.default is None:
+            continue
+        arg = column.default.arg
+        defaults[column.name] = arg(None) if callable(arg) else arg
+    return defaults
+
+def _dialect_insert(session: AsyncSession, model):
+    """INSERT con soporte de ON CONFLICT para el dialecto de la sesión."""
+    if session.bind.dialect.name == "postgresql":
+        return pg_insert(model)
+    return sqlite_insert(model)
+
+def _postgresql_user_upsert(telegram_id: int, username: str):
+    """
+    Inserta el usuario y su UserProgress en una sola sentencia: el CTE de
+    user_progress sólo inserta si el INSERT del usuario devolvió fila.
+    """
+    new_user = (
+        pg_insert(User)
+        .values(id=telegram_id, username=username)
+        .on_conflict_do_nothing(index_elements=[User.id])
+        .returning(*User.__table__.c)
+        .cte("new_user")
+    )
+    defaults = _column_defaults(UserProgress, exclude=("user_id",))
+    new_progress = (
+        pg_insert(UserProgress)
+        .from_select(
+            ["user_id", *defaults],
+            select(new_user.c.id, *(literal(value, UserProgress.__table__.c[name].type)
+                                    for name, value in defaults.items())),
+        )
+        .cte("new_progress")
+    )
+    return select(aliased(User, new_user)).add_cte(new_progress)
+
+@instrument_repository
 class UserRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -26,25 +73,122 @@ class UserRepository:
 
         if user:
             return user, False
+
+        # Upsert: INSERT ... ON CONFLICT DO NOTHING RETURNING. Si otra petición
+        # creó el usuario entre el SELECT y el INSERT no se devuelve fila y
+        # basta con volver a leerlo; no hay IntegrityError ni rollback.
+        if self.session.bind.dialect.name == "postgresql":
+            user = await self._insert_user_postgresql(telegram_id, username)
         else:
-            try:
-                user = await self.create_user(telegram_id, username)
-                await self.session.commit()
-                return user, True
-            except IntegrityError:
-                await self.session.rollback()
-                # This can happen in highly concurrent scenarios, try to fetch again
-                result = await self.session.execute(select(User).filter_by(id=telegram_id))
-                user = result.scalar_one_or_none()
-                if user:
-                    return user, False
-                else:
-                    raise # Re-raise if still can't find or create
-    
+            user = await self._insert_user_sqlite(telegram_id, username)
+        await self.session.commit()
+
+        if user:
+            return user, True
+        result = await self.session.execute(select(User).filter_by(id=telegram_id))
+        return result.scalar_one(), False
+
+    async def _insert_user_postgresql(self, telegram_id: int, username: str) -> Optional[User]:
+        result = await self.session.execute(_postgresql_user_upsert(telegram_id, username))
+        return result.scalar_one_or_none()
+
+    async def _insert_user_sqlite(self, telegram_id: int, username: str) -> Optional[User]:
+        # SQLite no admite INSERT en CTEs: dos sentencias en la misma transacción.
+        result = await self.session.execute(
+            sqlite_insert(User)
+            .values(id=telegram_id, username=username)
+            .on_conflict_do_nothing(index_elements=[User.id])
+            .returning(User)
+        )
+        user = result.scalar_one_or_none()
+        if user:
+            await self.session.execute(
+                sqlite_insert(UserProgress).values(user_id=telegram_id).on_conflict_do_nothing()
+            )
+        return user
+
     async def get_user_by_id(self, user_id: int) -> Optional[User]:
         result = await self.session.execute(select(User).filter_by(id=user_id))
         return result.scalar_one_or_none()
 
+    async def increment_points(self, user_id: int, amount: int) -> Optional[int]:
+        """
+        Suma ``amount`` (puede ser negativo) al saldo en la propia base de datos.
+
+        Un único ``UPDATE ... RETURNING``: sin lectura previa ni carreras de
+        actualización perdida. No hace commit.
+
+        Returns:
+            El saldo resultante, o None si el usuario no existe.
+        """
+        result = await self.session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(points=User.points + amount)
+            .returning(User.points)
+        )
+        return result.scalar_one_or_none()
+
+    async def set_vip_expiry(self, user_id: int, expires_at: Optional[datetime]) -> bool:
+        """
+        Concede VIP hasta ``expires_at``, o lo retira con ``None``. No hace commit.
+
+        Returns:
+            True si el usuario existe.
+        """
+        result = await self.session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(role='vip' if expires_at else 'free', vip_expires_at=expires_at)
+            .returning(User.id)
+        )
+        return bool(result.scalars().all())
+
+    async def get_vip_expirations(self) -> List[tuple[int, datetime]]:
+        """(user_id, vip_expires_at) de todos los VIP, en orden de caducidad (usa el índice)."""
+        result = await self.session.execute(
+            select(User.id, User.vip_expires_at)
+            .where(User.vip_expires_at.is_not(None), User.role == 'vip')
+            .order_by(User.vip_expires_at)
+        )
+        return [tuple(row) for row in result.all()]
+
+    async def get_expired_vip_ids(self, now: datetime, limit: int) -> List[int]:
+        """Hasta ``limit`` VIP ya caducados, los más antiguos primero (usa el índice)."""
+        result = await self.session.execute(
+            select(User.id)
+            .where(User.vip_expires_at <= now, User.role == 'vip')
+            .order_by(User.vip_expires_at)
+            .limit(limit)
+        )
+        return list(result.scalars())
+
+    async def revoke_expired_vips(self, user_ids: List[int], now: datetime) -> List[int]:
+        """
+        Retira el VIP a los ``user_ids`` cuya caducidad ya pasó, en un solo UPDATE.
+
+        La condición sobre ``vip_expires_at`` se repite en el UPDATE: un usuario
+        que renovó mientras tanto no pierde el VIP. No hace commit.
+
+        Returns:
+            Los ids a los que realmente se les retiró.
+        """
+        if not user_ids:
+            return []
+        result = await self.session.execute(
+            update(User)
+            .where(User.id.in_(user_ids), User.vip_expires_at <= now)
+            .values(role='free', vip_expires_at=None)
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
+        return list(result.scalars())
+
+    async def get_all_points(self) -> List[tuple[int, int]]:
+        """(user_id, points) de todos los usuarios, de mayor a menor saldo (usa el índice)."""
+        result = await self.session.execute(select(User.id, User.points).order_by(User.points.desc()))
+        return [tuple(row) for row in result.all()]
+
     async def update_user_points(self, user_id: int, new_points: int) -> User:
         user = await self.get_user_by_id(user_id)
         if not user:
@@ -54,6 +198,7 @@ class UserRepository:
         await self.session.refresh(user)
         return user
 
+@instrument_repository
 class MissionRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -70,6 +215,7 @@ class MissionRepository:
         result = await self.session.execute(select(Mission).filter_by(name=name))
         return result.scalar_one_or_none()
 
+@instrument_repository
 class UserMissionRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -82,12 +228,24 @@ class UserMissionRepository:
         )
         return result.scalar_one_or_none() is not None
 
+    async def get_completions_page(self, after: Optional[tuple], limit: int) -> List[tuple[int, int, datetime]]:
+        """
+        Hasta ``limit`` filas (user_id, mission_id, completed_at) en orden de
+        clave primaria, posteriores a ``after`` (la última fila de la página anterior).
+        """
+        stmt = select(UserMission.user_id, UserMission.mission_id, UserMission.completed_at)
+        if after is not None:
+            stmt = stmt.where(tuple_(UserMission.user_id, UserMission.mission_id, UserMission.completed_at) > tuple_(*after))
+        stmt = stmt.order_by(UserMission.user_id, UserMission.mission_id, UserMission.completed_at).limit(limit)
+        return [tuple(row) for row in (await self.session.execute(stmt)).all()]
+
     async def complete_mission(self, user_id: int, mission_id: int) -> UserMission:
         user_mission = UserMission(user_id=user_id, mission_id=mission_id, completed_at=datetime.utcnow())
         self.session.add(user_mission)
         await self.session.commit()
         return user_mission
 
+@instrument_repository
 class AchievementRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -100,6 +258,119 @@ class AchievementRepository:
         )
         return result.scalars().all()
 
+    async def sync_definitions(self, definitions: List[tuple[str, str]]) -> Dict[str, int]:
+        """
+        Crea o actualiza los logros ``(name, description)`` por nombre. No hace commit.
+
+        Returns:
+            El id de base de datos de cada nombre.
+        """
+        if not definitions:
+            return {}
+        stmt = _dialect_insert(self.session, Achievement).values(
+            [{"name": name, "description": description} for name, description in definitions]
+        )
+        await self.session.execute(
+            stmt.on_conflict_do_update(index_elements=["name"], set_={"description": stmt.excluded.description})
+        )
+        result = await self.session.execute(
+            select(Achievement.name, Achievement.id).where(Achievement.name.in_([name for name, _ in definitions]))
+        )
+        return {name: achievement_id for name, achievement_id in result.all()}
+
+    async def get_all_unlocked(self) -> List[tuple[int, int]]:
+        """(user_id, achievement_id) de todos los logros desbloqueados."""
+        result = await self.session.execute(select(UserAchievement.user_id, UserAchievement.achievement_id))
+        return [tuple(row) for row in result.all()]
+
+    async def add_many(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Inserta ``rows`` (user_id, achievement_id, unlocked_at) en una sola
+        sentencia, ignorando los ya existentes y los de usuarios que no están
+        en ``users``. No hace commit.
+
+        Returns:
+            Filas que se intentaron insertar (tras descartar usuarios desconocidos).
+        """
+        if not rows:
+            return 0
+        known = set((await self.session.execute(
+            select(User.id).where(User.id.in_({row["user_id"] for row in rows}))
+        )).scalars())
+        rows = [row for row in rows if row["user_id"] in known]
+        if rows:
+            await self.session.execute(
+                _dialect_insert(self.session, UserAchievement).values(rows).on_conflict_do_nothing()
+            )
+        return len(rows)
+
+@instrument_repository
+class FragmentRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def unlock_many(self, user_id: int, fragment_ids: List[str]) -> List[str]:
+        """
+        Desbloquea ``fragment_ids`` con un único INSERT multi-fila; los ya
+        desbloqueados se ignoran (ON CONFLICT DO NOTHING). No hace commit.
+
+        Returns:
+            Los fragmentos que no estaban desbloqueados.
+        """
+        fragment_ids = list(dict.fromkeys(fragment_ids))
+        if not fragment_ids:
+            return []
+        now = datetime.utcnow()
+        result = await self.session.execute(
+            _dialect_insert(self.session, UserUnlockedFragment)
+            .values([{"user_id": user_id, "fragment_id": fragment_id, "unlocked_at": now} for fragment_id in fragment_ids])
+            .on_conflict_do_nothing()
+            .returning(UserUnlockedFragment.fragment_id)
+        )
+        return list(result.scalars())
+
+    async def get_fragment_ids(self, user_id: int) -> List[str]:
+        result = await self.session.execute(
+            select(UserUnlockedFragment.fragment_id).where(UserUnlockedFragment.user_id == user_id)
+        )
+        return list(result.scalars())
+
+    async def has_fragment(self, user_id: int, fragment_id: str) -> bool:
+        result = await self.session.execute(
+            select(literal(1)).where(
+                UserUnlockedFragment.user_id == user_id, UserUnlockedFragment.fragment_id == fragment_id
+            )
+        )
+        return result.first() is not None
+
+    async def backfill_from_progress(self, after_user_id: Optional[int], batch_size: int) -> Optional[tuple[int, int]]:
+        """
+        Copia a ``user_unlocked_fragments`` las listas JSON ``unlocked_fragments``
+        de hasta ``batch_size`` filas de ``user_progress`` posteriores a
+        ``after_user_id``, en un solo INSERT. Es idempotente. No hace commit.
+
+        Returns:
+            (último user_id procesado, usuarios del tramo), o None si no quedaban filas.
+        """
+        stmt = select(UserProgress.user_id, UserProgress.unlocked_fragments).order_by(UserProgress.user_id)
+        if after_user_id is not None:
+            stmt = stmt.where(UserProgress.user_id > after_user_id)
+        rows = (await self.session.execute(stmt.limit(batch_size))).all()
+        if not rows:
+            return None
+        now = datetime.utcnow()
+        values = [
+            {"user_id": user_id, "fragment_id": str(fragment_id), "unlocked_at": now}
+            for user_id, fragments in rows
+            for fragment_id in dict.fromkeys(fragments or [])
+        ]
+        if values:
+            await self.session.execute(
+                _dialect_insert(self.session, UserUnlockedFragment).values(values).on_conflict_do_nothing()
+            )
+        return rows[-1][0], len(rows)
+
+@instrument_repository
 class PointTransactionRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -110,6 +381,153 @@ class PointTransactionRepository:
         await self.session.commit()
         return transaction
 
+    async def get_history(self, user_id: int, limit: int = 50, before: Optional[tuple[datetime, int]] = None,
+                          archived: bool = False) -> List[PointTransaction]:
+        """
+        Devuelve hasta ``limit`` transacciones del usuario, de la más reciente a
+        la más antigua. Para paginar se pasa ``(created_at, id)`` de la última
+        fila recibida como ``before``: el ``id`` desempata las filas con el
+        mismo ``created_at``, que de otro modo se saltarían entre páginas. Cada
+        página es un rango acotado del índice ``(user_id, created_at)``, sea
+        cual sea el tamaño de la tabla.
+
+        Con ``archived=True`` se consulta la tabla de meses archivados.
+        """
+        model = PointTransactionArchive if archived else PointTransaction
+        stmt = select(model).where(model.user_id == user_id)
+        if before is not None:
+            before_created_at, before_id = before
+            stmt = stmt.where(tuple_(model.created_at, model.id) < tuple_(before_created_at, before_id))
+        stmt = stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit)
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def get_points_since(self, since: datetime) -> List[tuple[int, int]]:
+        """(user_id, puntos sumados) de las transacciones desde ``since``, por usuario."""
+        result = await self.session.execute(
+            select(PointTransaction.user_id, func.sum(PointTransaction.points))
+            .where(PointTransaction.created_at >= since)
+            .group_by(PointTransaction.user_id)
+        )
+        return [tuple(row) for row in result.all()]
+
+    async def get_page_after(self, after_id: int, limit: int) -> List[tuple[int, int, int, str, datetime]]:
+        """Hasta ``limit`` transacciones (id, user_id, points, reason, created_at) con id > ``after_id``."""
+        result = await self.session.execute(
+            select(PointTransaction.id, PointTransaction.user_id, PointTransaction.points,
+                   PointTransaction.reason, PointTransaction.created_at)
+            .where(PointTransaction.id > after_id)
+            .order_by(PointTransaction.id)
+            .limit(limit)
+        )
+        return [tuple(row) for row in result.all()]
+
+    async def get_snapshot_watermark(self) -> int:
+        """Id de la última transacción incluida en los snapshots (0 si no hay)."""
+        result = await self.session.execute(
+            select(func.coalesce(func.max(PointBalanceSnapshot.last_transaction_id), 0))
+        )
+        return result.scalar_one()
+
+    async def get_ledger_balance(self, user_id: int) -> int:
+        """
+        Saldo según el ledger: snapshot del usuario más las transacciones
+        posteriores a la marca de agua, que sólo cubren desde el último roll-forward.
+        """
+        watermark = await self.get_snapshot_watermark()
+        snapshot_balance = select(PointBalanceSnapshot.balance).where(
+            PointBalanceSnapshot.user_id == user_id
+        ).scalar_subquery()
+        tail = select(func.sum(PointTransaction.points)).where(
+            PointTransaction.user_id == user_id, PointTransaction.id > watermark
+        ).scalar_subquery()
+        result = await self.session.execute(
+            select(func.coalesce(snapshot_balance, 0) + func.coalesce(tail, 0))
+        )
+        return result.scalar_one()
+
+    async def roll_forward_snapshots(self, settle_seconds: int = 60) -> int:
+        """
+        Suma a los snapshots, en una única sentencia INSERT ... SELECT ... ON
+        CONFLICT, las transacciones nuevas desde la marca de agua. Se excluyen
+        las de los últimos ``settle_seconds`` para no saltarse filas con un id
+        menor que aún no hubieran hecho commit. No hace commit.
+
+        Returns:
+            Número de transacciones incorporadas.
+        """
+        watermark = await self.get_snapshot_watermark()
+        cutoff = datetime.utcnow() - timedelta(seconds=settle_seconds)
+        upper = (await self.session.execute(
+            select(func.max(PointTransaction.id)).where(
+                PointTransaction.id > watermark, PointTransaction.created_at <= cutoff
+            )
+        )).scalar_one()
+        if upper is None:
+            return 0
+
+        in_range = (PointTransaction.id > watermark, PointTransaction.id <= upper)
+        rolled = (await self.session.execute(
+            select(func.count()).select_from(PointTransaction).where(*in_range)
+        )).scalar_one()
+        deltas = (
+            select(
+                PointTransaction.user_id,
+                func.sum(PointTransaction.points),
+                func.max(PointTransaction.id),
+                func.max(PointTransaction.created_at),
+                literal(datetime.utcnow(), PointBalanceSnapshot.updated_at.type),
+            )
+            .where(*in_range)
+            .group_by(PointTransaction.user_id)
+        )
+        stmt = _dialect_insert(self.session, PointBalanceSnapshot).from_select(
+            ["user_id", "balance", "last_transaction_id", "last_transaction_at", "updated_at"], deltas
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PointBalanceSnapshot.user_id],
+            set_={
+                "balance": PointBalanceSnapshot.balance + stmt.excluded.balance,
+                "last_transaction_id": stmt.excluded.last_transaction_id,
+                "last_transaction_at": stmt.excluded.last_transaction_at,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        await self.session.execute(stmt)
+        return rolled
+
+    async def archive_before(self, cutoff: datetime, batch_size: int = 10000) -> int:
+        """
+        Mueve a ``point_transactions_archive`` un lote de transacciones
+        anteriores a ``cutoff`` que ya estén incluidas en los snapshots.
+        No hace commit.
+
+        Returns:
+            Número de filas movidas (0 cuando no queda nada por archivar).
+        """
+        watermark = await self.get_snapshot_watermark()
+        ids = (await self.session.execute(
+            select(PointTransaction.id)
+            .where(PointTransaction.created_at < cutoff, PointTransaction.id <= watermark)
+            .order_by(PointTransaction.id)
+            .limit(batch_size)
+        )).scalars().all()
+        if not ids:
+            return 0
+
+        columns = ["id", "user_id", "points", "reason", "created_at"]
+        await self.session.execute(
+            _dialect_insert(self.session, PointTransactionArchive).from_select(
+                columns,
+                select(*(PointTransaction.__table__.c[name] for name in columns)).where(PointTransaction.id.in_(ids)),
+            ).on_conflict_do_nothing()
+        )
+        await self.session.execute(
+            delete(PointTransaction).where(PointTransaction.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        return len(ids)
+
+@instrument_repository
 class UserProgressRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -1,20 +1,28 @@
 import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import case, delete, func, select, tuple_, update
 
+from src.core.metrics import instrument_repository
 from src.models.user_mission_progress import UserMissionProgress
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+@instrument_repository
 class UserMissionRepository:
     """Repository for managing user mission progress in the database.
 
     This class provides methods to interact with the UserMissionProgress model,
     handling creation, retrieval, and updates of user mission data.
+
+    By default every mutator commits on its own. Inside ``unit_of_work()`` the
+    mutators only change the loaded records and a single commit is issued when
+    the block exits, so the service layer can load once and mutate many records.
     """
 
     def __init__(self, session: AsyncSession):
@@ -24,6 +32,49 @@ class UserMissionRepository:
             session (AsyncSession): The SQLAlchemy asynchronous session object.
         """
         self.session = session
+        self._unit_of_work_depth = 0
+        self._unit_of_work_records: Dict[Tuple[int, str], UserMissionProgress] = {}
+
+    @asynccontextmanager
+    async def unit_of_work(self) -> AsyncIterator["UserMissionRepository"]:
+        """Groups several mutations into a single commit.
+
+        The commit happens when the outermost block exits; if the block raises,
+        the session is rolled back instead.
+        """
+        self._unit_of_work_depth += 1
+        try:
+            yield self
+            if self._unit_of_work_depth == 1:
+                await self.session.commit()
+        except Exception:
+            if self._unit_of_work_depth == 1:
+                await self.session.rollback()
+            raise
+        finally:
+            self._unit_of_work_depth -= 1
+            if self._unit_of_work_depth == 0:
+                self._unit_of_work_records.clear()
+
+    @property
+    def in_unit_of_work(self) -> bool:
+        return self._unit_of_work_depth > 0
+
+    async def _load(self, user_id: int, mission_id: str,
+                    mission_progress: Optional[UserMissionProgress]) -> Optional[UserMissionProgress]:
+        """Returns the record passed by the caller, or the one already loaded in this unit of work, or queries it."""
+        if mission_progress is None:
+            mission_progress = self._unit_of_work_records.get((user_id, mission_id))
+        if mission_progress is None:
+            mission_progress = await self.get_mission_progress(user_id, mission_id)
+        if mission_progress is not None and self.in_unit_of_work:
+            self._unit_of_work_records[(user_id, mission_id)] = mission_progress
+        return mission_progress
+
+    async def _save(self):
+        """Commits right away, or leaves it to the enclosing unit of work."""
+        if not self.in_unit_of_work:
+            await self.session.commit()
 
     async def get_user_missions(self, user_id: int) -> List[UserMissionProgress]:
         """Retrieves all mission progress records for a given user.
@@ -40,6 +91,28 @@ class UserMissionRepository:
         )
         return result.scalars().all()
 
+    async def get_missions_for_users(self, user_ids: Iterable[int]) -> Dict[int, List[UserMissionProgress]]:
+        """Retrieves the mission progress records of several users in a single query.
+
+        Args:
+            user_ids (Iterable[int]): The IDs of the users.
+
+        Returns:
+            Dict[int, List[UserMissionProgress]]: The records grouped by user_id. Every
+                requested user is present, with an empty list if it has no records.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        logging.info(f"Fetching all missions for {len(user_ids)} users")
+        records_by_user: Dict[int, List[UserMissionProgress]] = {user_id: [] for user_id in user_ids}
+        if not user_ids:
+            return records_by_user
+        result = await self.session.execute(
+            select(UserMissionProgress).where(UserMissionProgress.user_id.in_(user_ids))
+        )
+        for record in result.scalars():
+            records_by_user[record.user_id].append(record)
+        return records_by_user
+
     async def get_mission_progress(self, user_id: int, mission_id: str) -> Optional[UserMissionProgress]:
         """Retrieves the progress of a specific mission for a given user.
 
@@ -56,7 +129,8 @@ class UserMissionRepository:
         )
         return result.scalars().first()
 
-    async def start_mission(self, user_id: int, mission_id: str) -> UserMissionProgress:
+    async def start_mission(self, user_id: int, mission_id: str,
+                            mission_progress: Optional[UserMissionProgress] = None) -> UserMissionProgress:
         """Starts a new mission for a user or resumes an existing one.
 
         If the mission already exists for the user, its status is set to 'in_progress'.
@@ -65,6 +139,7 @@ class UserMissionRepository:
         Args:
             user_id (int): The ID of the user.
             mission_id (str): The ID of the mission to start.
+            mission_progress (Optional[UserMissionProgress]): The record, if the caller already loaded it.
 
         Returns:
             UserMissionProgress: The UserMissionProgress object after starting/resuming.
@@ -76,7 +151,7 @@ class UserMissionRepository:
         # In a real application, you'd validate mission_id against a MissionService
         # For now, we'll assume mission_id is valid if it's not found in progress.
         
-        mission_progress = await self.get_mission_progress(user_id, mission_id)
+        mission_progress = await self._load(user_id, mission_id, mission_progress)
         if mission_progress:
             if mission_progress.status == "completed":
                 logging.info(f"Mission {mission_id} for user {user_id} is already completed. Not restarting.")
@@ -94,18 +169,21 @@ class UserMissionRepository:
                 started_at=datetime.now()
             )
             self.session.add(mission_progress)
-        await self.session.commit()
-        await self.session.refresh(mission_progress)
+            if self.in_unit_of_work:
+                self._unit_of_work_records[(user_id, mission_id)] = mission_progress
+        await self._save()
         logging.info(f"Mission {mission_id} for user {user_id} started/resumed successfully.")
         return mission_progress
 
-    async def update_progress(self, user_id: int, mission_id: str, progress: float) -> UserMissionProgress:
+    async def update_progress(self, user_id: int, mission_id: str, progress: float,
+                              mission_progress: Optional[UserMissionProgress] = None) -> UserMissionProgress:
         """Updates the progress of a specific mission for a user.
 
         Args:
             user_id (int): The ID of the user.
             mission_id (str): The ID of the mission.
             progress (float): The new progress value (0.0 to 100.0).
+            mission_progress (Optional[UserMissionProgress]): The record, if the caller already loaded it.
 
         Returns:
             UserMissionProgress: The updated UserMissionProgress object.
@@ -117,7 +195,7 @@ class UserMissionRepository:
         if not 0.0 <= progress <= 100.0:
             raise ValueError("Progress must be between 0.0 and 100.0")
 
-        mission_progress = await self.get_mission_progress(user_id, mission_id)
+        mission_progress = await self._load(user_id, mission_id, mission_progress)
         if not mission_progress:
             raise ValueError(f"Mission {mission_id} not found for user {user_id}. Cannot update progress.")
 
@@ -126,17 +204,18 @@ class UserMissionRepository:
             return mission_progress
 
         mission_progress.progress = progress
-        await self.session.commit()
-        await self.session.refresh(mission_progress)
+        await self._save()
         logging.info(f"Progress for user {user_id}, mission {mission_id} updated to {progress}.")
         return mission_progress
 
-    async def complete_mission(self, user_id: int, mission_id: str) -> UserMissionProgress:
+    async def complete_mission(self, user_id: int, mission_id: str,
+                               mission_progress: Optional[UserMissionProgress] = None) -> UserMissionProgress:
         """Marks a mission as completed for a user.
 
         Args:
             user_id (int): The ID of the user.
             mission_id (str): The ID of the mission to complete.
+            mission_progress (Optional[UserMissionProgress]): The record, if the caller already loaded it.
 
         Returns:
             UserMissionProgress: The updated UserMissionProgress object.
@@ -145,7 +224,7 @@ class UserMissionRepository:
             ValueError: If the mission is not found.
         """
         logging.info(f"Attempting to complete mission {mission_id} for user {user_id}")
-        mission_progress = await self.get_mission_progress(user_id, mission_id)
+        mission_progress = await self._load(user_id, mission_id, mission_progress)
         if not mission_progress:
             raise ValueError(f"Mission {mission_id} not found for user {user_id}. Cannot complete.")
 
@@ -156,17 +235,18 @@ class UserMissionRepository:
         mission_progress.status = "completed"
         mission_progress.progress = 100.0
         mission_progress.completed_at = datetime.now()
-        await self.session.commit()
-        await self.session.refresh(mission_progress)
+        await self._save()
         logging.info(f"Mission {mission_id} for user {user_id} marked as completed.")
         return mission_progress
 
-    async def fail_mission(self, user_id: int, mission_id: str) -> UserMissionProgress:
+    async def fail_mission(self, user_id: int, mission_id: str,
+                           mission_progress: Optional[UserMissionProgress] = None) -> UserMissionProgress:
         """Marks a mission as failed for a user.
 
         Args:
             user_id (int): The ID of the user.
             mission_id (str): The ID of the mission to fail.
+            mission_progress (Optional[UserMissionProgress]): The record, if the caller already loaded it.
 
         Returns:
             UserMissionProgress: The updated UserMissionProgress object.
@@ -175,7 +255,7 @@ class UserMissionRepository:
             ValueError: If the mission is not found.
         """
         logging.info(f"Attempting to fail mission {mission_id} for user {user_id}")
-        mission_progress = await self.get_mission_progress(user_id, mission_id)
+        mission_progress = await self._load(user_id, mission_id, mission_progress)
         if not mission_progress:
             raise ValueError(f"Mission {mission_id} not found for user {user_id}. Cannot fail.")
 
@@ -184,8 +264,7 @@ class UserMissionRepository:
             return mission_progress
 
         mission_progress.status = "failed"
-        await self.session.commit()
-        await self.session.refresh(mission_progress)
+        await self._save()
         logging.info(f"Mission {mission_id} for user {user_id} marked as failed.")
         return mission_progress
 
@@ -199,7 +278,90 @@ class UserMissionRepository:
             UserMissionProgress: The updated UserMissionProgress object.
         """
         self.session.add(user_mission_progress)
-        await self.session.commit()
-        await self.session.refresh(user_mission_progress)
+        await self._save()
         logging.info(f"UserMissionProgress for user {user_mission_progress.user_id}, mission {user_mission_progress.mission_id} updated.")
         return user_mission_progress
+
+    async def tick_progress_many(self, ticks: Iterable[Tuple[int, str, float]]) -> List[UserMissionProgress]:
+        """Adds progress to many (user, mission) pairs that are in progress.
+
+        Pairs sharing the same delta are updated with a single
+        ``UPDATE ... RETURNING`` statement that also completes the missions
+        reaching 100%. Missions not in progress are skipped.
+
+        Args:
+            ticks (Iterable[Tuple[int, str, float]]): (user_id, mission_id, progress_delta) triples.
+
+        Returns:
+            List[UserMissionProgress]: The updated records, with their new progress and status.
+        """
+        pairs_by_delta: Dict[float, List[Tuple[int, str]]] = defaultdict(list)
+        for user_id, mission_id, delta in ticks:
+            pairs_by_delta[delta].append((user_id, mission_id))
+        logging.info(f"Ticking progress for {sum(map(len, pairs_by_delta.values()))} user missions")
+
+        updated: List[UserMissionProgress] = []
+        now = datetime.now()
+        for delta, pairs in pairs_by_delta.items():
+            reaches_goal = UserMissionProgress.progress + delta >= 100.0
+            result = await self.session.execute(
+                update(UserMissionProgress)
+                .where(
+                    tuple_(UserMissionProgress.user_id, UserMissionProgress.mission_id).in_(pairs),
+                    UserMissionProgress.status == "in_progress",
+                )
+                .values(
+                    progress=case((reaches_goal, 100.0), else_=UserMissionProgress.progress + delta),
+                    status=case((reaches_goal, "completed"), else_=UserMissionProgress.status),
+                    completed_at=case((reaches_goal, now), else_=UserMissionProgress.completed_at),
+                )
+                .returning(UserMissionProgress)
+                .execution_options(synchronize_session=False, populate_existing=True)
+            )
+            updated.extend(result.scalars().all())
+        await self._save()
+        return updated
+
+    async def next_user_bound(self, after_user_id: Optional[int], mission_ids: List[str],
+                              chunk_rows: int) -> Optional[int]:
+        """Returns the upper ``user_id`` of the next reset chunk.
+
+        The bound is the user_id of the ``chunk_rows``-th row after
+        ``after_user_id`` (or the last one), so chunks hold about the same
+        number of rows however sparse the Telegram ids are. Uses the primary
+        key index on (user_id, mission_id).
+
+        Returns:
+            Optional[int]: The bound, or None if there are no rows left.
+        """
+        conditions = [UserMissionProgress.mission_id.in_(mission_ids)]
+        if after_user_id is not None:
+            conditions.append(UserMissionProgress.user_id > after_user_id)
+        ordered = select(UserMissionProgress.user_id).where(*conditions).order_by(UserMissionProgress.user_id)
+        bound = await self.session.scalar(ordered.offset(chunk_rows - 1).limit(1))
+        if bound is None:
+            bound = await self.session.scalar(select(func.max(UserMissionProgress.user_id)).where(*conditions))
+        return bound
+
+    async def reset_missions_in_range(self, after_user_id: Optional[int], up_to_user_id: int,
+                                      mission_ids: List[str], started_before: datetime) -> int:
+        """Deletes the progress of ``mission_ids`` for users in (after_user_id, up_to_user_id].
+
+        Only rows started before ``started_before`` are removed, so missions
+        started after the reset moment survive. A missing row reads as
+        'pending'. Does not commit.
+
+        Returns:
+            int: The number of rows reset.
+        """
+        conditions = [
+            UserMissionProgress.user_id <= up_to_user_id,
+            UserMissionProgress.mission_id.in_(mission_ids),
+            UserMissionProgress.started_at < started_before,
+        ]
+        if after_user_id is not None:
+            conditions.append(UserMissionProgress.user_id > after_user_id)
+        result = await self.session.execute(
+            delete(UserMissionProgress).where(*conditions).execution_options(synchronize_session=False)
+        )
+        return result.rowcount
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Define el modelo del punto de control de los trabajos de reinicio diario.
+"""
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from src.database.database_setup import Base
+
+class DailyResetCheckpoint(Base):
+    """
+    Avance de un trabajo de reinicio por tramos de ``user_id``.
+
+    Se actualiza en la misma transacción que cada tramo, así que tras una
+    caída el trabajo continúa justo después del último tramo confirmado.
+
+    Attributes:
+        job (str): Nombre del trabajo.
+        run_key (str): Día (ISO) de la ejecución en curso o de la última.
+        last_user_id (int, optional): Último ``user_id`` procesado; None si aún no hay tramos.
+        rows (int): Filas reiniciadas en esta ejecución.
+        started_at (datetime): Inicio de la ejecución.
+        finished_at (datetime, optional): Fin de la ejecución; None mientras esté a medias.
+    """
+    __tablename__ = "daily_reset_checkpoints"
+
+    job = Column(String, primary_key=True)
+    run_key = Column(String, nullable=False)
+    last_user_id = Column(BigInteger, nullable=True)
+    rows = Column(Integer, default=0, nullable=False)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return (
+            f"<DailyResetCheckpoint(job='{self.job}', run_key='{self.run_key}', "
+            f"last_user_id={self.last_user_id}, finished={self.finished_at is not None})>"
+        )
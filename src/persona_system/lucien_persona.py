@@ -1,7 +1,47 @@
 import random
+from string import Formatter
+from typing import Dict, List, Mapping, Tuple
 from src.models.user import User
 from src.persona_system.emotion_engine import EmotionTone
 
+class TemplatePlan:
+    """
+    A template split once into literal text and field names, so rendering is
+    a join instead of a ``str.format`` parse on every call.
+    """
+    __slots__ = ("template", "literals", "fields")
+
+    def __init__(self, template: str):
+        literals: List[str] = []
+        fields: List[str] = []
+        pending = ""
+        for literal, field, spec, conversion in Formatter().parse(template):
+            pending += literal
+            if field is None:
+                continue
+            if spec or conversion or not field.isidentifier():
+                raise ValueError(f"Unsupported placeholder '{{{field}}}' in template: {template!r}")
+            literals.append(pending)
+            fields.append(field)
+            pending = ""
+        literals.append(pending)
+        self.template = template
+        self.literals: Tuple[str, ...] = tuple(literals)
+        self.fields: Tuple[str, ...] = tuple(fields)
+
+    def render(self, values: Mapping[str, object]) -> str:
+        parts = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            parts.append(str(values[field]))
+            parts.append(literal)
+        return "".join(parts)
+
+    def render_username(self, username: str) -> str:
+        """Fast path for the common single ``{username}`` template."""
+        if self.fields == ("username",):
+            return f"{self.literals[0]}{username}{self.literals[1]}"
+        return self.render({"username": username})
+
 class LucienPersona:
     """
     Generates messages with Lucien's unique, elegant, and erotic voice.
@@ -29,6 +69,16 @@ class LucienPersona:
         ]
     }
 
+    # Compiled once per class; keep in sync with _templates.
+    _plans: Dict[EmotionTone, List[TemplatePlan]] = {
+        tone: [TemplatePlan(template) for template in templates] for tone, templates in _templates.items()
+    }
+
+    def pick_plan(self, tone: EmotionTone) -> TemplatePlan | None:
+        """Randomly selects one of the compiled templates for ``tone``."""
+        plans = self._plans.get(tone)
+        return random.choice(plans) if plans else None
+
     def generate_message(self, user: User, tone: EmotionTone, context: str) -> str:
         """
         Generates a personalized message based on tone and context.
@@ -36,8 +86,8 @@ class LucienPersona:
         # For now, we select a random template from the chosen tone.
         # The 'context' variable could be used for more advanced generation in the future.
         
-        if tone in self._templates:
-            template = random.choice(self._templates[tone])
-            return template.format(username=user.username)
+        plan = self.pick_plan(tone)
+        if plan is not None:
+            return plan.render_username(user.username)
         
         return f"Hola, {user.username}. {context}"
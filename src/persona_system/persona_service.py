@@ -1,4 +1,6 @@
 import logging
+from typing import Callable, Dict, Iterable, Optional
+from src.models.user import User
 from src.services import user_service
 from src.persona_system.emotion_engine import EmotionEngine
 from src.persona_system.lucien_persona import LucienPersona
@@ -9,11 +11,16 @@ logger = logging.getLogger(__name__)
 class PersonaService:
     """
     A facade that orchestrates the persona components to generate a complete response.
+
+    The tone is not cached: ``EmotionEngine.get_tone`` is a handful of
+    attribute checks, cheaper than any cache lookup, and always reflects the
+    user's current role, points and fragments.
     """
-    def __init__(self):
+    def __init__(self, get_user: Optional[Callable[[int], Optional[User]]] = None):
         self.emotion_engine = EmotionEngine()
         self.lucien_persona = LucienPersona()
         self.response_builder = ResponseBuilder()
+        self._get_user = get_user
 
     def create_response(self, user_id: int, context: str = "...") -> str:
         """
@@ -26,7 +33,7 @@ class PersonaService:
         Returns:
             A formatted message string.
         """
-        user = user_service.get_user(user_id)
+        user = (self._get_user or user_service.get_user)(user_id)
         if not user:
             logger.warning(f"Could not generate persona message for non-existent user {user_id}")
             return "Un alma perdida busca respuestas en el vacío..."
@@ -43,5 +50,24 @@ class PersonaService:
         logger.info(f"Generated persona message for user {user_id} with tone '{tone.name}'.")
         return final_response
 
+    def create_responses(self, users: Iterable[User], context: str = "...") -> Dict[int, str]:
+        """
+        Generates one personalized message per user in a single pass, e.g. for
+        a broadcast. The users are expected to be loaded in bulk by the caller.
+
+        Returns:
+            A mapping of user ID to formatted message.
+        """
+        get_tone = self.emotion_engine.get_tone
+        generate_message = self.lucien_persona.generate_message
+        build = self.response_builder.build
+        responses: Dict[int, str] = {}
+        for user in users:
+            tone = get_tone(user)
+            responses[user.id] = build(generate_message(user, tone, context), tone)
+
+        logger.info(f"Generated {len(responses)} persona messages in batch.")
+        return responses
+
 # Singleton instance for easy access across the application
 persona_service = PersonaService()
@@ -1,3 +1,4 @@
+import random
 from typing import Dict, List
 from src.persona_system.emotion_engine import EmotionTone
 
@@ -20,7 +21,6 @@ class ResponseBuilder:
 
         # Add a contextual emoji if one is defined for the tone
         if tone in self._emoji_map:
-            import random
             emoji = random.choice(self._emoji_map[tone])
             message = f"{message} {emoji}"
 
@@ -1,3 +1,4 @@
+from .rate_limiter import MemoryStore, RateLimiter, SlidingWindowLimiter, SqliteStore, TokenBucketLimiter
 from .anti_abuse_system import AntiAbuseSystem, anti_abuse_system
 from .content_guard import ContentGuard, content_guard
 from .auth_middleware import AuthMiddleware, auth_middleware
@@ -1,17 +1,38 @@
 # src/security/anti_abuse_system.py
 
-import time
-from collections import defaultdict
+import logging
+import sqlite3
+
+from .rate_limiter import MemoryStore, SlidingWindowLimiter, create_store
+
+logger = logging.getLogger(__name__)
+
+def _start_cooldown(entry, now: float, cost: float):
+    # La entrada sólo guarda el inicio; caduca a los ``cooldown_period`` segundos (su idle_ttl).
+    return [now], True
 
 class AntiAbuseSystem:
     """
     Detecta y mitiga patrones de abuso como el spam o flooding.
+
+    El conteo por usuario es un contador de ventana deslizante de memoria
+    fija (ver ``rate_limiter``), con expulsión de usuarios inactivos. Contador
+    y cooldowns viven en ``store``: con un ``SqliteStore`` los comparten todos
+    los procesos del host.
     """
-    def __init__(self, interactions_limit: int = 20, cooldown_period: int = 60):
+    def __init__(self, interactions_limit: int = 20, cooldown_period: int = 60, store=None):
         self.interactions_limit = interactions_limit  # Límite de interacciones por minuto
         self.cooldown_period = cooldown_period  # Segundos de cooldown
-        self.user_interactions = defaultdict(list)
-        self.user_cooldowns = {}
+        self.store = store if store is not None else MemoryStore()
+        self.limiter = SlidingWindowLimiter(interactions_limit, 60, store=self.store, namespace="abuse")
+
+    @classmethod
+    def from_settings(cls, settings, store=None) -> "AntiAbuseSystem":
+        """Uses the RATE_LIMIT_BACKEND store, so every worker shares counters and cooldowns."""
+        if store is None:
+            store = create_store(settings.RATE_LIMIT_BACKEND, settings.RATE_LIMIT_SQLITE_PATH,
+                                 busy_timeout=settings.RATE_LIMIT_SQLITE_BUSY_MS / 1000)
+        return cls(store=store)
 
     def detect_patterns(self, user_id: int) -> bool:
         """
@@ -23,21 +44,13 @@ class AntiAbuseSystem:
         Returns:
             bool: True si se detecta abuso, False en caso contrario.
         """
-        current_time = time.time()
-        
-        # Limpiar timestamps viejos
-        self.user_interactions[user_id] = [
-            t for t in self.user_interactions[user_id] if current_time - t < 60
-        ]
-        
-        # Añadir timestamp actual
-        self.user_interactions[user_id].append(current_time)
-        
-        # Verificar si se ha excedido el límite
-        if len(self.user_interactions[user_id]) > self.interactions_limit:
-            self.apply_cooldown(user_id)
-            return True
-            
+        try:
+            if not self.limiter.hit(user_id):
+                self.apply_cooldown(user_id)
+                return True
+        except sqlite3.Error as e:
+            # Almacén bloqueado por otro worker: se deja pasar, como RateLimiter.allow.
+            logger.warning(f"Detección de abuso no disponible para {user_id}: {e}")
         return False
 
     def apply_cooldown(self, user_id: int):
@@ -47,9 +60,8 @@ class AntiAbuseSystem:
         Args:
             user_id (int): El ID del usuario.
         """
-        cooldown_end_time = time.time() + self.cooldown_period
-        self.user_cooldowns[user_id] = cooldown_end_time
-        print(f"User {user_id} ha sido puesto en cooldown por {self.cooldown_period} segundos.")
+        self.store.update("cooldown", user_id, self.store.clock(), self.cooldown_period, _start_cooldown, 0.0)
+        logger.warning(f"User {user_id} ha sido puesto en cooldown por {self.cooldown_period} segundos.")
 
     def is_in_cooldown(self, user_id: int) -> bool:
         """
@@ -61,12 +73,10 @@ class AntiAbuseSystem:
         Returns:
             bool: True si el usuario está en cooldown, False en caso contrario.
         """
-        if user_id in self.user_cooldowns:
-            if time.time() < self.user_cooldowns[user_id]:
-                return True
-            else:
-                # El cooldown ha expirado
-                del self.user_cooldowns[user_id]
-        return False
+        try:
+            return self.store.get("cooldown", user_id, self.store.clock(), self.cooldown_period) is not None
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo consultar el cooldown de {user_id}: {e}")
+            return False
 
-anti_abuse_system = AntiAbuseSystem()
\ No newline at end of file
+anti_abuse_system = AntiAbuseSystem()
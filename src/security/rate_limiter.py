@@ -0,0 +1,330 @@
+# src/security/rate_limiter.py
+"""
+Limitadores de frecuencia de memoria fija por clave.
+
+Cada clave (normalmente un ``user_id``) guarda un par de números, no una
+lista de timestamps, así que ``hit`` cuesta O(1) sea cual sea el límite:
+
+- ``TokenBucketLimiter``: cubo de ``burst`` fichas que se rellena a
+  ``limit / period`` fichas por segundo. Permite ráfagas cortas.
+- ``SlidingWindowLimiter``: contador de ventana deslizante (ventana actual
+  más la anterior ponderada por el solape). Aproxima un límite estricto de
+  ``limit`` acciones en ``period`` segundos.
+
+El estado vive en un almacén intercambiable. El algoritmo es una función
+``step(entry, now, cost)`` sobre la entrada de la clave (``[último uso, ...]``)
+y el almacén la aplica de forma atómica, así que los dos almacenes dan
+exactamente los mismos resultados:
+
+- ``MemoryStore`` (por defecto): un proceso. Las claves se guardan en orden
+  de último uso; las inactivas más de ``idle_ttl`` segundos se expulsan poco
+  a poco en cada llamada, y nunca hay más de ``max_keys`` por espacio.
+- ``SqliteStore``: varios procesos del mismo host comparten un SQLite en
+  modo WAL; cada ``hit`` es una transacción ``BEGIN IMMEDIATE``.
+
+En ambos, una entrada inactiva ``idle_ttl`` segundos o más cuenta como nueva.
+"""
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Entry = List[float]
+Step = Callable[[Optional[Entry], float, float], Tuple[Entry, bool]]
+
+# Claves inactivas revisadas como mucho por llamada: coste acotado.
+EVICTIONS_PER_CALL = 4
+
+
+class MemoryStore:
+    """Estado en memoria del proceso; ``clock`` monotónico."""
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, max_keys: int = 1_000_000):
+        self.max_keys = max_keys
+        self._spaces: Dict[str, "OrderedDict[Hashable, Entry]"] = {}
+
+    def _entries(self, namespace: str) -> "OrderedDict[Hashable, Entry]":
+        entries = self._spaces.get(namespace)
+        if entries is None:
+            entries = self._spaces[namespace] = OrderedDict()
+        return entries
+
+    def update(self, namespace: str, key: Hashable, now: float, idle_ttl: float, step: Step, cost: float) -> bool:
+        entries = self._entries(namespace)
+        entry = entries.pop(key, None)
+        if entry is not None and now - entry[0] >= idle_ttl:
+            entry = None
+        entry, allowed = step(entry, now, cost)
+        entries[key] = entry  # al final: orden de último uso
+        self._evict(entries, now, idle_ttl)
+        return allowed
+
+    def _evict(self, entries: "OrderedDict[Hashable, Entry]", now: float, idle_ttl: float):
+        for _ in range(EVICTIONS_PER_CALL):
+            if not entries:
+                return
+            key, entry = next(iter(entries.items()))
+            if now - entry[0] < idle_ttl and len(entries) <= self.max_keys:
+                return
+            del entries[key]
+
+    def get(self, namespace: str, key: Hashable, now: float, idle_ttl: float) -> Optional[Entry]:
+        entry = self._entries(namespace).get(key)
+        if entry is None or now - entry[0] >= idle_ttl:
+            return None
+        return entry
+
+    def delete(self, namespace: str, key: Hashable):
+        self._entries(namespace).pop(key, None)
+
+    def count(self, namespace: str) -> int:
+        return len(self._entries(namespace))
+
+    def close(self):
+        pass
+
+
+class SqliteStore:
+    """
+    Estado compartido entre procesos en un SQLite en modo WAL; ``clock`` de pared.
+
+    ``BEGIN IMMEDIATE`` toma el bloqueo de escritura antes de leer, así que la
+    lectura, el ``step`` y la escritura de una clave son atómicos entre
+    procesos. Con ``synchronous=NORMAL`` el commit no hace fsync: una caída
+    del host puede perder los últimos contadores, que es aceptable aquí.
+    Las llamadas son síncronas y cortas (decenas de microsegundos); las
+    entradas inactivas se borran cada ``sweep_every`` llamadas. Corren en el
+    event loop, así que la espera por el bloqueo (``busy_timeout``, en
+    segundos) se mantiene en decenas de milisegundos: con más contención
+    ``update`` lanza ``sqlite3.OperationalError`` y ``RateLimiter.allow`` deja
+    pasar la actualización.
+    """
+
+    clock = staticmethod(time.time)
+
+    def __init__(self, path: str, sweep_every: int = 1000, busy_timeout: float = 0.05):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.sweep_every = sweep_every
+        self._calls = 0
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_state ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, last_seen REAL NOT NULL, "
+            "s1 REAL, s2 REAL, s3 REAL, PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_rate_limit_state_last_seen ON rate_limit_state (namespace, last_seen)"
+        )
+
+    def _read(self, namespace: str, key: str, now: float, idle_ttl: float) -> Optional[Entry]:
+        row = self._conn.execute(
+            "SELECT last_seen, s1, s2, s3 FROM rate_limit_state WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None or now - row[0] >= idle_ttl:
+            return None
+        return [value for value in row if value is not None]
+
+    def update(self, namespace: str, key: Hashable, now: float, idle_ttl: float, step: Step, cost: float) -> bool:
+        key = str(key)
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            entry, allowed = step(self._read(namespace, key, now, idle_ttl), now, cost)
+            values = list(entry) + [None] * (4 - len(entry))
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit_state (namespace, key, last_seen, s1, s2, s3) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, *values),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._calls += 1
+        if self._calls % self.sweep_every == 0:
+            self.sweep(namespace, now, idle_ttl)
+        return allowed
+
+    def sweep(self, namespace: str, now: float, idle_ttl: float) -> int:
+        """Borra las entradas de ``namespace`` inactivas ``idle_ttl`` segundos o más."""
+        try:
+            cursor = self._conn.execute(
+                "DELETE FROM rate_limit_state WHERE namespace = ? AND last_seen <= ?", (namespace, now - idle_ttl)
+            )
+            return cursor.rowcount
+        except sqlite3.OperationalError as e:
+            logger.warning(f"No se pudo purgar el estado de rate limit '{namespace}': {e}")
+            return 0
+
+    def get(self, namespace: str, key: Hashable, now: float, idle_ttl: float) -> Optional[Entry]:
+        return self._read(namespace, str(key), now, idle_ttl)
+
+    def delete(self, namespace: str, key: Hashable):
+        self._conn.execute("DELETE FROM rate_limit_state WHERE namespace = ? AND key = ?", (namespace, str(key)))
+
+    def count(self, namespace: str) -> int:
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM rate_limit_state WHERE namespace = ?", (namespace,)
+        ).fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+def create_store(backend: str = "memory", sqlite_path: Optional[str] = None, busy_timeout: float = 0.05):
+    """Crea el almacén de estado ``memory`` o ``sqlite``."""
+    if backend == "memory":
+        return MemoryStore()
+    if backend == "sqlite":
+        if not sqlite_path:
+            raise ValueError("El backend 'sqlite' de rate limit necesita una ruta")
+        return SqliteStore(sqlite_path, busy_timeout=busy_timeout)
+    raise ValueError(f"Backend de rate limit desconocido: {backend}")
+
+
+class _KeyedLimiter:
+    def __init__(self, limit: float, period: float, idle_ttl: Optional[float] = None,
+                 store=None, namespace: str = "default", clock: Optional[Callable[[], float]] = None):
+        if limit <= 0 or period <= 0:
+            raise ValueError("limit y period deben ser positivos")
+        self.limit = limit
+        self.period = period
+        self.idle_ttl = idle_ttl if idle_ttl is not None else 2 * period
+        self.store = store if store is not None else MemoryStore()
+        self.namespace = namespace
+        self._clock = clock or self.store.clock
+
+    def __len__(self) -> int:
+        return self.store.count(self.namespace)
+
+    def _step(self, entry: Optional[Entry], now: float, cost: float) -> Tuple[Entry, bool]:
+        raise NotImplementedError
+
+    def hit(self, key: Hashable, cost: float = 1.0) -> bool:
+        """Registra una acción de ``key``; False si supera el límite (y entonces no se cuenta)."""
+        return self.store.update(self.namespace, key, self._clock(), self.idle_ttl, self._step, cost)
+
+    def reset(self, key: Hashable):
+        self.store.delete(self.namespace, key)
+
+
+class TokenBucketLimiter(_KeyedLimiter):
+    def __init__(self, limit: float, period: float, burst: Optional[float] = None, **kwargs):
+        super().__init__(limit, period, **kwargs)
+        self.burst = burst if burst is not None else limit
+        self.refill_rate = limit / period
+
+    def _step(self, entry: Optional[Entry], now: float, cost: float) -> Tuple[Entry, bool]:
+        if entry is None:
+            entry = [now, self.burst]  # [último uso, fichas]
+        tokens = min(self.burst, entry[1] + (now - entry[0]) * self.refill_rate)
+        entry[0] = now
+        allowed = tokens >= cost
+        entry[1] = tokens - cost if allowed else tokens
+        return entry, allowed
+
+
+class SlidingWindowLimiter(_KeyedLimiter):
+    def _step(self, entry: Optional[Entry], now: float, cost: float) -> Tuple[Entry, bool]:
+        window_start = now - now % self.period
+        if entry is None:
+            entry = [now, window_start, 0.0, 0.0]  # [último uso, inicio ventana, anterior, actual]
+        elif window_start != entry[1]:
+            # Una ventana después, la actual pasa a ser la anterior; más tarde, ambas caducan.
+            entry[2] = entry[3] if window_start - entry[1] == self.period else 0.0
+            entry[3] = 0.0
+            entry[1] = window_start
+        entry[0] = now
+        overlap = 1.0 - (now - window_start) / self.period
+        allowed = entry[2] * overlap + entry[3] + cost <= self.limit
+        if allowed:
+            entry[3] += cost
+        return entry, allowed
+
+
+ALGORITHMS = {
+    "token_bucket": TokenBucketLimiter,
+    "sliding_window": SlidingWindowLimiter,
+}
+
+
+class RateLimiter:
+    """Un limitador por clase de acción (``message``, ``callback``, ``reaction``...)."""
+
+    def __init__(self, limiters: Dict[str, _KeyedLimiter]):
+        self.limiters = limiters
+        self.rejected: Dict[str, int] = {action: 0 for action in limiters}
+        self.store_errors: Dict[str, int] = {action: 0 for action in limiters}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Dict], idle_ttl: Optional[float] = None, store=None) -> "RateLimiter":
+        """
+        Crea los limitadores desde un diccionario como ``Settings.RATE_LIMITS``::
+
+            {"message": {"algorithm": "sliding_window", "limit": 20, "period": 60}, ...}
+
+        Todos comparten ``store`` (por defecto, uno en memoria), cada acción en su espacio.
+        ``limit``, ``period`` y ``burst`` se convierten a ``float``: desde la
+        variable de entorno ``RATE_LIMITS`` llegan como texto.
+        """
+        store = store if store is not None else MemoryStore()
+        limiters = {}
+        for action, options in config.items():
+            options = dict(options)
+            algorithm = options.pop("algorithm", "sliding_window")
+            if algorithm not in ALGORITHMS:
+                raise ValueError(f"Algoritmo de rate limit desconocido para '{action}': {algorithm}")
+            for name in ("limit", "period", "burst"):
+                if options.get(name) is not None:
+                    try:
+                        options[name] = float(options[name])
+                    except (TypeError, ValueError):
+                        raise ValueError(f"Rate limit '{action}': {name} no es un número ({options[name]!r})") from None
+            options.setdefault("idle_ttl", idle_ttl)
+            limiters[action] = ALGORITHMS[algorithm](store=store, namespace=action, **options)
+        return cls(limiters)
+
+    @classmethod
+    def from_settings(cls, settings, store=None) -> "RateLimiter":
+        """Builds the limiters from RATE_LIMITS, RATE_LIMIT_IDLE_SECONDS and the RATE_LIMIT_BACKEND store."""
+        if store is None:
+            store = create_store(settings.RATE_LIMIT_BACKEND, settings.RATE_LIMIT_SQLITE_PATH,
+                                 busy_timeout=settings.RATE_LIMIT_SQLITE_BUSY_MS / 1000)
+        return cls.from_config(settings.RATE_LIMITS, idle_ttl=settings.RATE_LIMIT_IDLE_SECONDS, store=store)
+
+    def allow(self, action: str, key: Hashable, cost: float = 1.0) -> bool:
+        """
+        True si ``key`` puede hacer ``action``; las acciones sin limitador siempre pasan.
+
+        Si el almacén falla (p. ej. ``database is locked`` en SQLite) se deja
+        pasar: mejor un flood puntual que rechazar tráfico legítimo.
+        """
+        limiter = self.limiters.get(action)
+        if limiter is None:
+            return True
+        try:
+            if limiter.hit(key, cost):
+                return True
+        except sqlite3.Error as e:
+            self.store_errors[action] += 1
+            logger.warning(f"Rate limit '{action}' no disponible, se deja pasar a {key}: {e}")
+            return True
+        self.rejected[action] += 1
+        return False
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            action: {"tracked_keys": len(limiter), "rejected": self.rejected[action],
+                     "store_errors": self.store_errors[action]}
+            for action, limiter in self.limiters.items()
+        }
@@ -0,0 +1,133 @@
+# src/services/achievement_rules.py
+"""
+Declarative achievement rules compiled into an index by event type.
+
+A rule is a dict::
+
+    {"id": 3, "name": "mission_master", "description": "...", "icon": "✅",
+     "event": "mission_completed", "where": {"mission_type": "daily"}, "count": 10}
+
+- ``event``: the event type that can unlock it. Only the rules indexed under
+  an event's type are evaluated for that event.
+- ``where`` (optional): conditions on the event data. A plain value means
+  equality; a dict of operators (``>=``, ``>``, ``<=``, ``<``, ``!=``, ``in``)
+  compares the field against each operand.
+- ``count`` (optional, default 1): matching events needed to unlock.
+
+Each rule gets a bit position, so a user's unlocked achievements are a single
+int used as a bitset.
+"""
+import operator
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.models.achievement import Achievement
+
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    ">=": operator.ge,
+    ">": operator.gt,
+    "<=": operator.le,
+    "<": operator.lt,
+    "!=": operator.ne,
+    "in": lambda value, options: value in options,
+}
+
+DEFAULT_ACHIEVEMENT_RULES: List[Dict[str, Any]] = [
+    {"id": 1, "name": "first_login", "description": "First time logging in", "icon": "⭐",
+     "event": "user_started"},
+    {"id": 2, "name": "level_maestro", "description": "Reach Maestro level", "icon": "🏆",
+     "event": "level_up", "where": {"new_level": "Maestro"}},
+    {"id": 3, "name": "mission_master", "description": "Complete 10 missions", "icon": "✅",
+     "event": "mission_completed", "count": 10},
+    {"id": 4, "name": "community_contributor", "description": "Reacted to a message", "icon": "❤️",
+     "event": "POINTS_AWARDED", "where": {"reason": "channel_reaction"}},
+]
+
+
+def _compile_condition(field: str, expected: Any) -> Callable[[Dict[str, Any]], bool]:
+    if not isinstance(expected, dict):
+        return lambda data: data.get(field) == expected
+    checks = []
+    for op, operand in expected.items():
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown operator '{op}' for field '{field}'")
+        checks.append((OPERATORS[op], operand))
+
+    def condition(data: Dict[str, Any]) -> bool:
+        value = data.get(field)
+        if value is None:
+            return False
+        return all(compare(value, operand) for compare, operand in checks)
+    return condition
+
+
+class AchievementRule:
+    __slots__ = ("achievement", "event", "count", "bit", "_conditions")
+
+    def __init__(self, definition: Dict[str, Any], bit: int):
+        if "event" not in definition:
+            raise ValueError(f"Achievement rule '{definition.get('name')}' has no event")
+        self.achievement = Achievement(
+            id=definition["id"], name=definition["name"],
+            description=definition.get("description", ""), icon=definition.get("icon", ""),
+        )
+        self.event = definition["event"]
+        self.count = int(definition.get("count", 1))
+        self.bit = bit
+        self._conditions = [_compile_condition(field, expected)
+                            for field, expected in (definition.get("where") or {}).items()]
+
+    @property
+    def mask(self) -> int:
+        return 1 << self.bit
+
+    def matches(self, data: Dict[str, Any]) -> bool:
+        return all(condition(data) for condition in self._conditions)
+
+
+class AchievementEngine:
+    """
+    Compiled rule set. ``evaluate`` only looks at the rules of the event type
+    and skips the ones already set in the user's bitset.
+    """
+
+    def __init__(self, definitions: Iterable[Dict[str, Any]]):
+        self.rules: List[AchievementRule] = []
+        self.by_name: Dict[str, AchievementRule] = {}
+        self.by_id: Dict[int, AchievementRule] = {}
+        self.by_event: Dict[str, List[AchievementRule]] = {}
+        for definition in definitions:
+            rule = AchievementRule(definition, len(self.rules))
+            if rule.achievement.name in self.by_name or rule.achievement.id in self.by_id:
+                raise ValueError(f"Duplicate achievement rule '{rule.achievement.name}' (id {rule.achievement.id})")
+            self.rules.append(rule)
+            self.by_name[rule.achievement.name] = rule
+            self.by_id[rule.achievement.id] = rule
+            self.by_event.setdefault(rule.event, []).append(rule)
+
+    def evaluate(self, event_type: str, data: Dict[str, Any], unlocked: int,
+                 counters: Dict[Tuple[int, int], int], user_id: int,
+                 only: Optional[int] = None) -> List[AchievementRule]:
+        """
+        Returns the rules this event unlocks for ``user_id``.
+
+        ``counters`` holds the progress of ``count`` rules, keyed by
+        ``(user_id, bit)``, and is updated in place. ``only`` restricts the
+        evaluation to the rules in that bitmask (backfills of new rules).
+        """
+        newly = []
+        for rule in self.by_event.get(event_type, ()):
+            mask = 1 << rule.bit
+            if unlocked & mask or (only is not None and not only & mask) or not rule.matches(data):
+                continue
+            if rule.count > 1:
+                key = (user_id, rule.bit)
+                progress = counters.get(key, 0) + 1
+                if progress < rule.count:
+                    counters[key] = progress
+                    continue
+                counters.pop(key, None)
+            newly.append(rule)
+        return newly
+
+    def achievements_in(self, bitset: int) -> List[Achievement]:
+        return [rule.achievement for rule in self.rules if bitset >> rule.bit & 1]
@@ -1,78 +1,302 @@
+import asyncio
 import logging
-from typing import List, Dict
-# from src.core.event_bus import EventBus
+from datetime import datetime
+from functools import partial
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database.repository import AchievementRepository, PointTransactionRepository, UserMissionRepository
 from src.models.achievement import Achievement
 from src.core.integration_hub import IntegrationHub
+from src.services.achievement_rules import DEFAULT_ACHIEVEMENT_RULES, AchievementEngine, AchievementRule
 
 logger = logging.getLogger(__name__)
 
 class AchievementsService:
     """
     Manages the unlocking and tracking of user achievements.
+
+    Achievements are declarative rules (see ``achievement_rules``) indexed by
+    event type: an event only evaluates the rules listening to it. Each
+    user's unlocked achievements are an int bitset. With a session factory
+    the bitsets are loaded from ``user_achievements`` on ``start()`` and new
+    unlocks are written back in batches by a background task.
     """
-    def __init__(self, event_bus=None, hub: IntegrationHub = None):
+    def __init__(self, event_bus=None, hub: IntegrationHub = None, rules: Optional[Iterable[Dict[str, Any]]] = None,
+                 session_factory: Optional[async_sessionmaker] = None, flush_interval: float = 1.0,
+                 batch_size: int = 500):
         self.event_bus = event_bus
         self.hub = hub
-        self._available_achievements: List[Achievement] = [
-            Achievement(id=1, name="first_login", description="First time logging in", icon="⭐"),
-            Achievement(id=2, name="level_maestro", description="Reach Maestro level", icon="🏆"),
-            Achievement(id=3, name="mission_master", description="Complete 10 missions", icon="✅"),
-            Achievement(id=4, name="community_contributor", description="Reacted to a message", icon="❤️"),
-        ]
-        self._user_unlocked_achievements: Dict[int, List[int]] = {}
+        self.engine = AchievementEngine(rules if rules is not None else DEFAULT_ACHIEVEMENT_RULES)
+        self._session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._unlocked: Dict[int, int] = {}
+        self._counters: Dict[Tuple[int, int], int] = {}
+        self._db_ids: Dict[str, int] = {}  # achievement name -> achievements.id
+        self._pending: List[Dict[str, Any]] = []
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._task: Optional[asyncio.Task] = None
+        self.persisted = 0
+
+    @classmethod
+    def from_settings(cls, settings, session_factory: async_sessionmaker, event_bus=None,
+                      hub: IntegrationHub = None) -> "AchievementsService":
+        """Builds the service with the ACHIEVEMENTS_* values from Settings."""
+        return cls(event_bus=event_bus, hub=hub, session_factory=session_factory,
+                   flush_interval=settings.ACHIEVEMENTS_FLUSH_MS / 1000,
+                   batch_size=settings.ACHIEVEMENTS_BATCH_SIZE)
+
+    @property
+    def _available_achievements(self) -> List[Achievement]:
+        return [rule.achievement for rule in self.engine.rules]
+
+    # --- Estado ---
+
+    def _mark(self, user_id: int, rule: AchievementRule) -> bool:
+        unlocked = self._unlocked.get(user_id, 0)
+        if unlocked & rule.mask:
+            return False
+        self._unlocked[user_id] = unlocked | rule.mask
+        if self._session_factory is not None:
+            self._pending.append({"user_id": user_id, "name": rule.achievement.name, "unlocked_at": datetime.utcnow()})
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.set()
+        return True
+
+    def _apply(self, event_type: str, user_id: int, data: Dict[str, Any], counters=None,
+               only: Optional[int] = None) -> List[AchievementRule]:
+        rules = self.engine.evaluate(event_type, data, self._unlocked.get(user_id, 0),
+                                     self._counters if counters is None else counters, user_id, only)
+        return [rule for rule in rules if self._mark(user_id, rule)]
+
+    def has_achievement(self, user_id: int, achievement_name: str) -> bool:
+        rule = self.engine.by_name.get(achievement_name)
+        return rule is not None and bool(self._unlocked.get(user_id, 0) & rule.mask)
+
+    def count_unlocked(self) -> int:
+        return sum(bin(bitset).count("1") for bitset in self._unlocked.values())
+
+    # --- Eventos ---
+
+    async def _announce(self, user_id: int, rules: List[AchievementRule]):
+        for rule in rules:
+            logger.info(f"User {user_id} unlocked achievement: {rule.achievement.name}")
+            if self.event_bus:
+                await self.event_bus.publish("achievement_unlocked", user_id=user_id,
+                                             achievement_id=rule.achievement.id,
+                                             achievement_name=rule.achievement.name)
+
+    async def process_event(self, event_type: str, user_id: int, **data) -> List[Achievement]:
+        """Evaluates the rules indexed under ``event_type`` and returns the achievements it unlocked."""
+        rules = self._apply(event_type, user_id, data)
+        await self._announce(user_id, rules)
+        return [rule.achievement for rule in rules]
 
     async def unlock_achievement(self, user_id: int, achievement_name: str):
-        achievement = next((a for a in self._available_achievements if a.name == achievement_name), None)
-        if not achievement:
+        rule = self.engine.by_name.get(achievement_name)
+        if not rule:
             logger.warning(f"Achievement '{achievement_name}' not found.")
             return
 
-        if user_id not in self._user_unlocked_achievements:
-            self._user_unlocked_achievements[user_id] = []
-
-        if achievement.id in self._user_unlocked_achievements[user_id]:
-            logger.info(f"User {user_id} already unlocked achievement '{achievement.name}'.")
+        if not self._mark(user_id, rule):
+            logger.info(f"User {user_id} already unlocked achievement '{rule.achievement.name}'.")
             return
-
-        self._user_unlocked_achievements[user_id].append(achievement.id)
-        logger.info(f"User {user_id} unlocked achievement: {achievement.name}")
-        if self.event_bus:
-            await self.event_bus.publish("achievement_unlocked", user_id=user_id, achievement_id=achievement.id, achievement_name=achievement.name)
+        await self._announce(user_id, [rule])
 
     def get_unlocked_for_user(self, user_id: int) -> List[Achievement]:
-        unlocked_ids = self._user_unlocked_achievements.get(user_id, [])
-        return [a for a in self._available_achievements if a.id in unlocked_ids]
+        return self.engine.achievements_in(self._unlocked.get(user_id, 0))
 
     # --- Nuevos métodos para IntegrationHub ---
     def check_for_achievement(self, data: dict):
         """
-        Handler para el evento 'POINTS_AWARDED'. Revisa si se debe desbloquear un logro.
+        Handler para el evento 'POINTS_AWARDED'. Evalúa sólo las reglas de ese evento.
         """
         user_id = data.get("user_id")
-        reason = data.get("reason")
-        
-        logger.info(f"[HUB] AchievementsService: Revisando logros para user '{user_id}' por motivo '{reason}'.")
-        
-        # Lógica de ejemplo: si los puntos fueron por una reacción, se da un logro.
-        if reason == "channel_reaction":
-            achievement_to_unlock = "community_contributor"
-            achievement = next((a for a in self._available_achievements if a.name == achievement_to_unlock), None)
-            
-            if achievement and achievement.id not in self._user_unlocked_achievements.get(user_id, []):
-                # Desbloquear el logro (simulado)
-                if user_id not in self._user_unlocked_achievements:
-                    self._user_unlocked_achievements[user_id] = []
-                self._user_unlocked_achievements[user_id].append(achievement.id)
-                
-                logger.info(f"[HUB] AchievementsService: ¡Logro '{achievement.name}' desbloqueado para user '{user_id}'!")
-                
-                new_data = {
-                    "user_id": user_id,
-                    "achievement_id": achievement.id,
-                    "achievement_name": achievement.name,
-                    "reward_type": "story_fragment" 
-                }
-                # Disparamos el siguiente evento
+        logger.info(f"[HUB] AchievementsService: Revisando logros para user '{user_id}' por motivo '{data.get('reason')}'.")
+
+        rules = self._apply("POINTS_AWARDED", user_id, data)
+        if not rules:
+            logger.info(f"[HUB] AchievementsService: El usuario ya tiene el logro o no es elegible.")
+        for rule in rules:
+            logger.info(f"[HUB] AchievementsService: ¡Logro '{rule.achievement.name}' desbloqueado para user '{user_id}'!")
+            new_data = {
+                "user_id": user_id,
+                "achievement_id": rule.achievement.id,
+                "achievement_name": rule.achievement.name,
+                "reward_type": "story_fragment"
+            }
+            # Disparamos el siguiente evento
+            if self.hub is not None:
                 self.hub.route_event("ACHIEVEMENT_UNLOCKED", new_data)
-            else:
-                logger.info(f"[HUB] AchievementsService: El usuario ya tiene el logro o no es elegible.")
+
+    async def _on_event(self, event_type: str, user_id: int, **data):
+        await self.process_event(event_type, user_id, **data)
+
+    # --- Persistencia ---
+
+    async def start(self):
+        """Syncs the rule definitions, loads unlocked bitsets, subscribes to the indexed events and starts flushing."""
+        if self._task is not None:
+            return
+        if self._session_factory is not None:
+            await self._load()
+            await self._seed_counters()
+        if self.event_bus is not None:
+            for event_type in self.engine.by_event:
+                self.event_bus.subscribe(event_type, partial(self._on_event, event_type))
+        self._closing = False
+        self._task = asyncio.create_task(self._run(), name="achievements-flush")
+
+    async def _load(self):
+        async with self._session_factory() as session:
+            repo = AchievementRepository(session)
+            self._db_ids = await repo.sync_definitions(
+                [(rule.achievement.name, rule.achievement.description) for rule in self.engine.rules]
+            )
+            await session.commit()
+            rows = await repo.get_all_unlocked()
+        by_db_id = {self._db_ids[rule.achievement.name]: rule for rule in self.engine.rules}
+        for user_id, achievement_id in rows:
+            rule = by_db_id.get(achievement_id)
+            if rule is not None:
+                self._unlocked[user_id] = self._unlocked.get(user_id, 0) | rule.mask
+        logger.info(f"Logros cargados: {len(rows)} desbloqueos de {len(self._unlocked)} usuarios.")
+
+    async def stop(self):
+        if self._task is not None:
+            # No se cancela: una cancelación a mitad de un INSERT perdería el lote.
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Writes the pending unlocks to ``user_achievements`` in batches of ``batch_size``."""
+        if self._session_factory is None:
+            return 0
+        written = 0
+        async with self._flush_lock:
+            while self._pending:
+                batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+                rows = [{"user_id": row["user_id"], "achievement_id": self._db_ids[row["name"]],
+                         "unlocked_at": row["unlocked_at"]} for row in batch if row["name"] in self._db_ids]
+                try:
+                    async with self._session_factory() as session:
+                        written += await AchievementRepository(session).add_many(rows)
+                        await session.commit()
+                except Exception as e:
+                    # Idempotente (ON CONFLICT DO NOTHING): se reintenta en el siguiente flush.
+                    self._pending[:0] = batch
+                    logger.error(f"No se pudieron guardar {len(batch)} logros: {e}", exc_info=True)
+                    break
+                except BaseException:
+                    # Cancelación u otra salida abrupta: el lote vuelve a la cola antes de propagarla.
+                    self._pending[:0] = batch
+                    raise
+        self.persisted += written
+        return written
+
+    # --- Backfill ---
+
+    async def _history(self, batch_size: int,
+                       event_types: Optional[set] = None) -> AsyncIterator[Tuple[str, int, Dict[str, Any]]]:
+        after = None
+        while event_types is None or "mission_completed" in event_types:
+            async with self._session_factory() as session:
+                page = await UserMissionRepository(session).get_completions_page(after, batch_size)
+            if not page:
+                break
+            for user_id, mission_id, completed_at in page:
+                yield "mission_completed", user_id, {"mission_id": mission_id, "completed_at": completed_at}
+            after = page[-1]
+        after_id = 0
+        while event_types is None or "POINTS_AWARDED" in event_types:
+            async with self._session_factory() as session:
+                page = await PointTransactionRepository(session).get_page_after(after_id, batch_size)
+            if not page:
+                break
+            for _, user_id, points, reason, created_at in page:
+                yield "POINTS_AWARDED", user_id, {"points": points, "reason": reason, "created_at": created_at}
+            after_id = page[-1][0]
+
+    async def backfill(self, achievement_names: Optional[Iterable[str]] = None, batch_size: int = 5000,
+                       events: Optional[Iterable[Tuple[str, int, Dict[str, Any]]]] = None) -> Dict[str, int]:
+        """
+        Evaluates rules over historical data and persists what they unlock.
+
+        Args:
+            achievement_names: Rules to evaluate (by default, all). Typically
+                the rules just added.
+            batch_size: Rows read per page and written per batch.
+            events: ``(event_type, user_id, data)`` to replay instead of the
+                history read from ``user_missions`` and ``point_transactions``.
+
+        Returns:
+            Unlocks per achievement name. No ``achievement_unlocked`` events
+            are published for them.
+        """
+        if not self._db_ids:
+            await self._load()
+        names = list(achievement_names) if achievement_names is not None else list(self.engine.by_name)
+        unlocked = await self._replay(names, {}, batch_size, events)
+        logger.info(f"Backfill de logros: {unlocked}")
+        return unlocked
+
+    async def _seed_counters(self, batch_size: int = 5000):
+        """
+        Rebuilds the progress of ``count`` rules from history, so it survives
+        restarts. Users that already reached the count are unlocked silently,
+        as in a backfill. Entries are dropped on unlock, so the dict holds at
+        most one counter per user and pending ``count`` rule.
+        """
+        names = [rule.achievement.name for rule in self.engine.rules if rule.count > 1]
+        if names:
+            unlocked = await self._replay(names, self._counters, batch_size)
+            logger.info(f"Progreso de logros reconstruido: {len(self._counters)} contadores, desbloqueos {unlocked}.")
+
+    async def _replay(self, names: List[str], counters: Dict[Tuple[int, int], int], batch_size: int,
+                      events: Optional[Iterable[Tuple[str, int, Dict[str, Any]]]] = None) -> Dict[str, int]:
+        only = 0
+        for name in names:
+            only |= self.engine.by_name[name].mask
+        unlocked = dict.fromkeys(names, 0)
+
+        async def replay(event_type, user_id, data):
+            for rule in self._apply(event_type, user_id, data, counters, only):
+                unlocked[rule.achievement.name] += 1
+            if len(self._pending) >= batch_size:
+                await self.flush()
+
+        if events is not None:
+            for event_type, user_id, data in events:
+                await replay(event_type, user_id, data)
+        else:
+            event_types = {self.engine.by_name[name].event for name in names}
+            async for event_type, user_id, data in self._history(batch_size, event_types):
+                await replay(event_type, user_id, data)
+        await self.flush()
+        return unlocked
+
+    def get_stats(self):
+        return {
+            "rules": len(self.engine.rules),
+            "event_types": len(self.engine.by_event),
+            "users": len(self._unlocked),
+            "unlocked": self.count_unlocked(),
+            "pending": len(self._pending),
+            "persisted": self.persisted,
+        }
@@ -1,4 +1,136 @@
+# src/services/daily_reset.py
+"""
+Reinicio diario de las misiones diarias.
+
+Borra el progreso de las misiones diarias en ``user_mission_progress`` con
+sentencias por tramos de ``user_id``: cada tramo es un ``DELETE`` acotado en
+su propia transacción (bloqueos cortos) seguido de una pausa para dejar
+pasar el tráfico en vivo. El avance se guarda en ``daily_reset_checkpoints``
+dentro de la misma transacción que el tramo, así que si el proceso cae a
+medianoche la siguiente ejecución continúa donde se quedó.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database.user_mission_repository import UserMissionRepository
+from src.models.daily_reset_checkpoint import DailyResetCheckpoint
+
+logger = logging.getLogger(__name__)
+
+
+def day_start(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
 class DailyReset:
-    def reset_daily_missions(self):
-        print("Resetting daily missions... (triggered by scheduler)")
-        # Logic to reset daily missions would go here
+    JOB = "daily_missions"
+
+    def __init__(self, session_factory: async_sessionmaker,
+                 mission_ids: Union[Iterable[str], Callable[[], Iterable[str]]],
+                 chunk_rows: int = 5000, pause_seconds: float = 0.05):
+        """
+        Args:
+            mission_ids: Ids de las misiones a reiniciar, o una función que
+                los devuelve; se llama en cada ejecución para que una recarga
+                del catálogo surta efecto sin reiniciar el proceso.
+        """
+        self._session_factory = session_factory
+        self._mission_ids = mission_ids if callable(mission_ids) else sorted(set(mission_ids))
+        self.chunk_rows = chunk_rows
+        self.pause_seconds = pause_seconds
+
+    @classmethod
+    def from_settings(cls, settings, session_factory: async_sessionmaker, catalog) -> "DailyReset":
+        """Resets the catalog missions of DAILY_MISSION_CATEGORY with the DAILY_RESET_* settings."""
+        category = settings.DAILY_MISSION_CATEGORY
+        return cls(
+            session_factory,
+            lambda: [mission["id"] for mission in catalog.get_missions_by_category(category)],
+            chunk_rows=settings.DAILY_RESET_CHUNK_ROWS,
+            pause_seconds=settings.DAILY_RESET_PAUSE_MS / 1000,
+        )
+
+    @property
+    def mission_ids(self) -> List[str]:
+        if callable(self._mission_ids):
+            return sorted(set(self._mission_ids()))
+        return self._mission_ids
+
+    async def _load_checkpoint(self, run_key: str, now: datetime) -> DailyResetCheckpoint:
+        async with self._session_factory() as session:
+            checkpoint = await session.get(DailyResetCheckpoint, self.JOB)
+            if checkpoint is None:
+                checkpoint = DailyResetCheckpoint(job=self.JOB, run_key=run_key, rows=0, started_at=now)
+                session.add(checkpoint)
+            elif checkpoint.run_key != run_key:
+                checkpoint.run_key = run_key
+                checkpoint.last_user_id = None
+                checkpoint.rows = 0
+                checkpoint.started_at = now
+                checkpoint.finished_at = None
+            await session.commit()
+            return checkpoint
+
+    async def reset_daily_missions(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Reinicia las misiones diarias empezadas antes de la medianoche de ``now``.
+
+        Es idempotente por día: si la ejecución de hoy ya terminó no hace nada,
+        y si quedó a medias continúa desde el último tramo confirmado.
+
+        Returns:
+            Dict con ``rows`` (filas de esta ejecución), ``chunks``, ``seconds``,
+            ``rows_per_second`` y ``resumed``.
+        """
+        now = now or datetime.now()
+        cutoff = day_start(now)
+        run_key = cutoff.date().isoformat()
+        stats: Dict[str, Any] = {"rows": 0, "chunks": 0, "seconds": 0.0, "rows_per_second": 0.0, "resumed": False}
+        mission_ids = self.mission_ids
+        if not mission_ids:
+            logger.warning("Reinicio diario: no hay misiones que reiniciar; revisa DAILY_MISSION_CATEGORY y el catálogo.")
+            return stats
+
+        checkpoint = await self._load_checkpoint(run_key, now)
+        if checkpoint.finished_at is not None:
+            logger.info(f"Reinicio diario {run_key} ya completado ({checkpoint.rows} filas).")
+            return stats
+        last_user_id = checkpoint.last_user_id
+        stats["resumed"] = last_user_id is not None
+        if stats["resumed"]:
+            logger.info(f"Reinicio diario {run_key}: se reanuda tras user_id {last_user_id}.")
+
+        started = time.perf_counter()
+        while True:
+            async with self._session_factory() as session:
+                repo = UserMissionRepository(session)
+                bound = await repo.next_user_bound(last_user_id, mission_ids, self.chunk_rows)
+                saved = await session.get(DailyResetCheckpoint, self.JOB)
+                if bound is None:
+                    saved.finished_at = datetime.now()
+                    await session.commit()
+                    break
+                rows = await repo.reset_missions_in_range(last_user_id, bound, mission_ids, cutoff)
+                saved.last_user_id = bound
+                saved.rows += rows
+                await session.commit()
+
+            last_user_id = bound
+            stats["rows"] += rows
+            stats["chunks"] += 1
+            elapsed = time.perf_counter() - started
+            logger.info(f"Reinicio diario {run_key}: {stats['rows']} filas hasta user_id {bound} "
+                        f"({stats['rows'] / elapsed if elapsed else 0:.0f} filas/s)")
+            if self.pause_seconds:
+                await asyncio.sleep(self.pause_seconds)
+
+        stats["seconds"] = time.perf_counter() - started
+        stats["rows_per_second"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+        logger.info(f"Reinicio diario {run_key} completado: {stats['rows']} filas en {stats['chunks']} tramos, "
+                    f"{stats['seconds']:.2f}s ({stats['rows_per_second']:.0f} filas/s)")
+        return stats
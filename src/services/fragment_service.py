@@ -0,0 +1,146 @@
+# src/services/fragment_service.py
+"""
+Desbloqueo de fragmentos narrativos sobre ``user_unlocked_fragments``.
+
+Cada fragmento recibe una posición de bit la primera vez que se ve, y los
+fragmentos de un usuario se cachean como un entero que hace de bitset: tras una
+consulta por usuario, "¿tiene X el fragmento Y?" es un AND sin tocar la base
+de datos. La caché es LRU de ``cache_size`` usuarios y cada entrada se
+recarga pasados ``cache_ttl`` segundos, por si otro proceso desbloqueó algo.
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database.repository import FragmentRepository
+
+logger = logging.getLogger(__name__)
+
+
+class FragmentService:
+    def __init__(self, session_factory: async_sessionmaker, event_bus=None,
+                 cache_size: int = 10000, cache_ttl: float = 300.0):
+        self._session_factory = session_factory
+        self._event_bus = event_bus
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._bits: Dict[str, int] = {}
+        self._fragment_ids: List[str] = []
+        # user_id -> (bitset, cargado en)
+        self._cache: "OrderedDict[int, Tuple[int, float]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @classmethod
+    def from_settings(cls, settings, session_factory: async_sessionmaker, event_bus=None) -> "FragmentService":
+        """Builds the service with the FRAGMENT_CACHE_* values from Settings."""
+        return cls(session_factory, event_bus=event_bus, cache_size=settings.FRAGMENT_CACHE_SIZE,
+                   cache_ttl=settings.FRAGMENT_CACHE_TTL_SECONDS)
+
+    def _bit(self, fragment_id: str) -> int:
+        bit = self._bits.get(fragment_id)
+        if bit is None:
+            bit = self._bits[fragment_id] = len(self._fragment_ids)
+            self._fragment_ids.append(fragment_id)
+        return bit
+
+    def _mask(self, fragment_ids: Iterable[str]) -> int:
+        mask = 0
+        for fragment_id in fragment_ids:
+            mask |= 1 << self._bit(fragment_id)
+        return mask
+
+    def _remember(self, user_id: int, mask: int):
+        self._cache[user_id] = (mask, time.monotonic())
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _bitset(self, user_id: int) -> int:
+        cached = self._cache.get(user_id)
+        if cached is not None and time.monotonic() - cached[1] < self.cache_ttl:
+            self._hits += 1
+            self._cache.move_to_end(user_id)
+            return cached[0]
+        self._misses += 1
+        async with self._session_factory() as session:
+            fragment_ids = await FragmentRepository(session).get_fragment_ids(user_id)
+        mask = self._mask(fragment_ids)
+        self._remember(user_id, mask)
+        return mask
+
+    async def has_unlocked(self, user_id: int, fragment_id: str) -> bool:
+        """True si ``user_id`` tiene desbloqueado ``fragment_id``."""
+        mask = await self._bitset(user_id)
+        bit = self._bits.get(fragment_id)
+        return bit is not None and bool(mask >> bit & 1)
+
+    async def has_all(self, user_id: int, fragment_ids: Iterable[str]) -> bool:
+        """True si ``user_id`` tiene desbloqueados todos los ``fragment_ids``."""
+        mask = await self._bitset(user_id)
+        required = self._mask(fragment_ids)
+        return mask & required == required
+
+    async def get_unlocked(self, user_id: int) -> List[str]:
+        mask = await self._bitset(user_id)
+        return [fragment_id for bit, fragment_id in enumerate(self._fragment_ids) if mask >> bit & 1]
+
+    async def unlock(self, user_id: int, fragment_ids: Iterable[str]) -> List[str]:
+        """
+        Desbloquea ``fragment_ids`` en una sola sentencia y confirma.
+
+        Publica ``fragment_unlocked`` por cada fragmento que no estaba
+        desbloqueado y devuelve esos fragmentos.
+        """
+        async with self._session_factory() as session:
+            new_ids = await FragmentRepository(session).unlock_many(user_id, list(fragment_ids))
+            await session.commit()
+        cached = self._cache.get(user_id)
+        if cached is not None and new_ids:
+            self._cache[user_id] = (cached[0] | self._mask(new_ids), cached[1])
+        for fragment_id in new_ids:
+            logger.info(f"Fragmento '{fragment_id}' desbloqueado para el usuario {user_id}.")
+            if self._event_bus is not None:
+                await self._event_bus.publish("fragment_unlocked", user_id=user_id, fragment_id=fragment_id)
+        return new_ids
+
+    def invalidate(self, user_id: Optional[int] = None):
+        """Olvida la caché de ``user_id`` (o toda, sin argumento)."""
+        if user_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(user_id, None)
+
+    def get_stats(self):
+        return {
+            "cached_users": len(self._cache),
+            "fragments": len(self._fragment_ids),
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+
+async def backfill_unlocked_fragments(session_factory: async_sessionmaker, batch_size: int = 500) -> int:
+    """
+    Copia las listas JSON ``user_progress.unlocked_fragments`` a
+    ``user_unlocked_fragments`` por tramos de ``batch_size`` usuarios, cada uno
+    en su transacción. Se puede repetir sin duplicar filas.
+
+    Returns:
+        Número de usuarios recorridos.
+    """
+    after_user_id = None
+    users = 0
+    while True:
+        async with session_factory() as session:
+            batch = await FragmentRepository(session).backfill_from_progress(after_user_id, batch_size)
+            await session.commit()
+        if batch is None:
+            break
+        after_user_id, batch_users = batch
+        users += batch_users
+        logger.info(f"Backfill de fragmentos: {users} usuarios, hasta user_id {after_user_id}.")
+    return users
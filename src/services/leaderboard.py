@@ -0,0 +1,304 @@
+# src/services/leaderboard.py
+"""
+Rankings de puntos en memoria: global (saldo) y semanal (puntos ganados
+desde el lunes).
+
+Cada ``RankedBoard`` guarda la puntuación de cada usuario, un árbol de
+Fenwick con cuántos usuarios hay en cada puntuación (posición de un usuario
+en O(log n)) y una lista ordenada con los primeros ``2 * top_k`` (el top se
+sirve sin ordenar nada). ``LeaderboardService`` los actualiza con el evento
+``points_changed`` y los reconcilia periódicamente con la base de datos,
+que es la fuente de verdad: una transacción revertida, o puntos cambiados
+por otro proceso, se corrigen en la siguiente reconciliación.
+"""
+import asyncio
+import heapq
+import logging
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database.repository import PointTransactionRepository, UserRepository
+from src.services.point_ledger import PointLedgerWriter
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ("global", "weekly")
+# Tamaño máximo del árbol; las puntuaciones mayores van a una lista ordenada aparte.
+MAX_TREE_SIZE = 1 << 20
+
+
+def week_start(moment: datetime) -> datetime:
+    """Lunes a medianoche de la semana de ``moment``."""
+    return (moment - timedelta(days=moment.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class RankedBoard:
+    """
+    Ranking de un periodo. La posición es 1 + usuarios con más puntos (los
+    empates comparten posición); las puntuaciones negativas cuentan como 0.
+    """
+
+    def __init__(self, top_k: int = 100, capacity: int = 1024):
+        self.top_k = top_k
+        self._scores: Dict[int, int] = {}
+        self._size = capacity
+        self._tree = [0] * (capacity + 1)
+        self._overflow: List[int] = []  # puntuaciones >= MAX_TREE_SIZE, ordenadas
+        # Los mejores len(_top) usuarios, como (-puntos, user_id) en orden.
+        self._top: List[Tuple[int, int]] = []
+        self._top_members: set = set()
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._scores
+
+    # --- Árbol de Fenwick sobre la puntuación ---
+
+    def _tree_add(self, score: int, delta: int):
+        if score >= MAX_TREE_SIZE:
+            if delta > 0:
+                insort(self._overflow, score)
+            else:
+                del self._overflow[bisect_left(self._overflow, score)]
+            return
+        i = max(score, 0) + 1
+        tree, size = self._tree, self._size
+        while i <= size:
+            tree[i] += delta
+            i += i & -i
+
+    def _count_at_most(self, score: int) -> int:
+        i = min(max(score, 0) + 1, self._size)
+        total, tree = 0, self._tree
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _rebuild_tree(self, size: int):
+        # Construcción lineal: se cuentan las puntuaciones y se propagan a los padres.
+        tree = [0] * (size + 1)
+        overflow = []
+        for value in self._scores.values():
+            if value >= MAX_TREE_SIZE:
+                overflow.append(value)
+            else:
+                tree[max(value, 0) + 1] += 1
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._size, self._tree = size, tree
+        self._overflow = sorted(overflow)
+
+    def _capacity_for(self, score: int) -> int:
+        size = self._size
+        while size <= score and size < MAX_TREE_SIZE:
+            size *= 2
+        return min(size, MAX_TREE_SIZE)
+
+    def _ensure_capacity(self, score: int):
+        if self._size <= score < MAX_TREE_SIZE:
+            self._rebuild_tree(self._capacity_for(score))
+
+    # --- Top ---
+
+    def _top_remove(self, user_id: int, score: int):
+        index = bisect_left(self._top, (-score, user_id))
+        del self._top[index]
+        self._top_members.discard(user_id)
+
+    def _top_offer(self, user_id: int, score: int):
+        entry = (-score, user_id)
+        top = self._top
+        # Sólo entra si no se salta a nadie: o supera al último, o el top ya tiene a todos los demás.
+        if len(top) == len(self._scores) - 1 or (top and entry < top[-1]):
+            insort(top, entry)
+            self._top_members.add(user_id)
+            if len(top) > 2 * self.top_k:
+                _, dropped = top.pop()
+                self._top_members.discard(dropped)
+
+    def _refill_top(self, n: int):
+        size = max(2 * self.top_k, n)
+        self._top = heapq.nsmallest(size, ((-score, user_id) for user_id, score in self._scores.items()))
+        self._top_members = {user_id for _, user_id in self._top}
+
+    # --- API ---
+
+    def set(self, user_id: int, score: int):
+        old = self._scores.get(user_id)
+        if old == score:
+            return
+        self._ensure_capacity(score)
+        if old is not None:
+            self._tree_add(old, -1)
+            if user_id in self._top_members:
+                self._top_remove(user_id, old)
+        self._scores[user_id] = score
+        self._tree_add(score, 1)
+        self._top_offer(user_id, score)
+
+    def add(self, user_id: int, delta: int):
+        self.set(user_id, self._scores.get(user_id, 0) + delta)
+
+    def load(self, scores: Iterable[Tuple[int, int]]):
+        """Sustituye todo el contenido (reconciliación)."""
+        self._scores = dict(scores)
+        self._rebuild_tree(self._capacity_for(max(self._scores.values(), default=0)))
+        self._refill_top(0)
+
+    def score(self, user_id: int) -> Optional[int]:
+        return self._scores.get(user_id)
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """Posición de ``user_id`` (1 es el primero), o None si no está en el ranking."""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        if score >= MAX_TREE_SIZE:
+            return 1 + len(self._overflow) - bisect_right(self._overflow, score)
+        return 1 + len(self._scores) - self._count_at_most(score)
+
+    def top(self, n: int = 10) -> List[Tuple[int, int]]:
+        """Los ``n`` primeros como ``(user_id, puntos)``."""
+        if len(self._top) < min(n, len(self._scores)):
+            self._refill_top(n)
+        return [(user_id, -negative) for negative, user_id in self._top[:n]]
+
+
+class LeaderboardService:
+    def __init__(self, session_factory: async_sessionmaker, top_k: int = 100, reconcile_interval: float = 600.0,
+                 event_bus=None, clock: Callable[[], datetime] = datetime.utcnow,
+                 ledger: Optional[PointLedgerWriter] = None):
+        self._session_factory = session_factory
+        self._ledger = ledger
+        self.top_k = top_k
+        self.reconcile_interval = reconcile_interval
+        self._event_bus = event_bus
+        self._clock = clock  # UTC, como point_transactions.created_at
+        self.boards: Dict[str, RankedBoard] = {period: RankedBoard(top_k) for period in PERIODS}
+        self.week_start = week_start(clock())
+        self._pending: Optional[List[Tuple[int, int, int]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._events = 0
+        self._reconciliations = 0
+        self._corrected = 0
+
+    @classmethod
+    def from_settings(cls, settings, session_factory: async_sessionmaker, event_bus=None,
+                      ledger: Optional[PointLedgerWriter] = None) -> "LeaderboardService":
+        """Builds the service with the LEADERBOARD_* values from Settings."""
+        return cls(session_factory, top_k=settings.LEADERBOARD_TOP_K,
+                   reconcile_interval=settings.LEADERBOARD_RECONCILE_SECONDS, event_bus=event_bus, ledger=ledger)
+
+    def _roll_week(self):
+        current = week_start(self._clock())
+        if current != self.week_start:
+            self.week_start = current
+            self.boards["weekly"] = RankedBoard(self.top_k)
+
+    async def on_points_changed(self, user_id: int, points: int, delta: int, **kwargs):
+        """Listener de ``points_changed``: ``points`` es el saldo nuevo y ``delta`` lo sumado."""
+        self._events += 1
+        if self._pending is not None:
+            self._pending.append((user_id, points, delta))  # se reaplica tras la reconciliación en curso
+        self._roll_week()
+        self.boards["global"].set(user_id, points)
+        self.boards["weekly"].add(user_id, delta)
+
+    async def reconcile(self) -> int:
+        """
+        Recarga ambos rankings desde la base de datos.
+
+        Los eventos que llegan durante la lectura se reaplican encima. Con un
+        ledger, antes se insertan las filas que aún tiene en el buffer: si no,
+        el ranking semanal perdería los puntos ya aplicados que todavía no
+        están en ``point_transactions``. Devuelve cuántos usuarios del ranking
+        global tenían una puntuación distinta.
+        """
+        if self._ledger is not None:
+            await self._ledger.flush()
+        # Sin await entre el flush y aquí: lo que llegue desde ahora se reaplica.
+        self._pending = []
+        try:
+            since = week_start(self._clock())
+            async with self._session_factory() as session:
+                balances = await UserRepository(session).get_all_points()
+                weekly_points = await PointTransactionRepository(session).get_points_since(since)
+            pending = self._pending
+        finally:
+            self._pending = None
+
+        global_board = RankedBoard(self.top_k)
+        global_board.load(balances)
+        weekly_board = RankedBoard(self.top_k)
+        weekly_board.load(weekly_points)
+        for user_id, points, delta in pending:
+            global_board.set(user_id, points)
+            weekly_board.add(user_id, delta)
+
+        previous = self.boards["global"]
+        touched = {user_id for user_id, _, _ in pending}
+        corrected = sum(1 for user_id, points in balances
+                        if user_id not in touched and previous.score(user_id) not in (None, points))
+        self.boards = {"global": global_board, "weekly": weekly_board}
+        self.week_start = since
+        self._reconciliations += 1
+        self._corrected += corrected
+        if corrected:
+            logger.warning(f"Ranking reconciliado: {corrected} puntuaciones corregidas.")
+        logger.info(f"Ranking cargado: {len(global_board)} usuarios, {len(weekly_board)} con puntos esta semana.")
+        return corrected
+
+    def top(self, n: int = 10, period: str = "global") -> List[Tuple[int, int]]:
+        """Los ``n`` primeros del periodo (``global`` o ``weekly``) como ``(user_id, puntos)``."""
+        if period == "weekly":
+            self._roll_week()
+        return self.boards[period].top(n)
+
+    def rank(self, user_id: int, period: str = "global") -> Optional[int]:
+        if period == "weekly":
+            self._roll_week()
+        return self.boards[period].rank(user_id)
+
+    async def start(self):
+        """Carga los rankings, se suscribe a ``points_changed`` y arranca la reconciliación periódica."""
+        if self._task is not None:
+            return
+        await self.reconcile()
+        if self._event_bus is not None:
+            self._event_bus.subscribe("points_changed", self.on_points_changed)
+        self._task = asyncio.create_task(self._run(), name="leaderboard-reconcile")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Error reconciliando el ranking: {e}", exc_info=True)
+
+    def get_stats(self):
+        return {
+            "users": len(self.boards["global"]),
+            "weekly_users": len(self.boards["weekly"]),
+            "events": self._events,
+            "reconciliations": self._reconciliations,
+            "corrected": self._corrected,
+        }
@@ -0,0 +1,69 @@
+# src/services/ledger_archiver.py
+"""
+Mantenimiento del ledger de puntos: roll-forward de los snapshots de saldo y
+archivado de los meses cerrados.
+
+``point_transactions`` sólo conserva el mes en curso (más lo que aún no esté
+en los snapshots); el resto vive en ``point_transactions_archive``.
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database.repository import PointTransactionRepository
+
+logger = logging.getLogger(__name__)
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+class LedgerArchiver:
+    def __init__(self, session_factory: async_sessionmaker, batch_size: int = 10000, settle_seconds: int = 60):
+        self._session_factory = session_factory
+        self.batch_size = batch_size
+        self.settle_seconds = settle_seconds
+
+    @classmethod
+    def from_settings(cls, settings, session_factory: async_sessionmaker) -> "LedgerArchiver":
+        """Builds the archiver configured by the POINTS_ARCHIVE_* settings."""
+        return cls(
+            session_factory,
+            batch_size=settings.POINTS_ARCHIVE_BATCH_SIZE,
+            settle_seconds=settings.POINTS_SNAPSHOT_SETTLE_SECONDS,
+        )
+
+    async def roll_forward(self) -> int:
+        """Incorpora a los snapshots las transacciones nuevas. Devuelve cuántas."""
+        async with self._session_factory() as session:
+            rolled = await PointTransactionRepository(session).roll_forward_snapshots(self.settle_seconds)
+            await session.commit()
+        return rolled
+
+    async def archive_closed_months(self, now: Optional[datetime] = None) -> int:
+        """
+        Mueve al archivo las transacciones anteriores al mes en curso, en lotes
+        de ``batch_size`` con un commit por lote.
+        """
+        cutoff = month_start(now or datetime.utcnow())
+        moved = 0
+        while True:
+            async with self._session_factory() as session:
+                count = await PointTransactionRepository(session).archive_before(cutoff, self.batch_size)
+                await session.commit()
+            moved += count
+            if count < self.batch_size:
+                return moved
+
+    async def run(self, now: Optional[datetime] = None) -> Dict[str, float]:
+        """Job programable: roll-forward y, después, archivado."""
+        started = time.perf_counter()
+        rolled = await self.roll_forward()
+        archived = await self.archive_closed_months(now)
+        elapsed = time.perf_counter() - started
+        logger.info(f"Ledger de puntos: {rolled} transacciones en snapshots, {archived} archivadas en {elapsed:.2f}s")
+        return {"rolled_forward": rolled, "archived": archived, "seconds": elapsed}
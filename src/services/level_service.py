@@ -1,40 +1,95 @@
 import logging
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Sequence
+
 from src.core.event_bus import EventBus
 from src.core.config import Settings # Import Settings to access LEVEL_THRESHOLDS
 from src.models.user import User # Assuming User model is needed for type hinting or direct manipulation
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: the bulk APIs fall back to bisect
+    np = None
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_LEVEL = "Novato"
+
 class LevelService:
     """
     Calculates user levels based on points and configured thresholds.
     Emits 'level_up' events.
+
+    Thresholds are precomputed into a sorted array, so a level lookup is a
+    single ``bisect``. Level index 0 is ``DEFAULT_LEVEL`` (points below the
+    lowest threshold); index ``i`` is the i-th threshold's level. The bulk
+    APIs map many point totals at once, with ``numpy.searchsorted`` when
+    NumPy is installed.
     """
     def __init__(self, event_bus: EventBus, settings: Settings):
         self.event_bus = event_bus
         self.level_thresholds = sorted(settings.LEVEL_THRESHOLDS.items()) # Sort by points
+        steps = self.level_thresholds
+        if steps and steps[0][1] == DEFAULT_LEVEL:
+            steps = steps[1:]  # the default level already covers everything below the next threshold
+        self.thresholds: List[int] = [points for points, _ in steps]
+        self.level_names: List[str] = [DEFAULT_LEVEL] + [name for _, name in steps]
+        self._thresholds_array = np.asarray(self.thresholds) if np is not None else None
+
+    def level_index(self, points: int) -> int:
+        """Returns the index into ``level_names`` for ``points``."""
+        return bisect_right(self.thresholds, points)
 
     def get_level(self, points: int) -> str:
         """
         Determines the user's level based on their current points.
         """
-        current_level = "Novato"
-        for threshold_points, level_name in self.level_thresholds:
-            if points >= threshold_points:
-                current_level = level_name
-            else:
-                break # Points are less than the current threshold, so we have the level
-        return current_level
+        return self.level_names[bisect_right(self.thresholds, points)]
+
+    def _indices_array(self, points):
+        return np.searchsorted(self._thresholds_array, np.asarray(points), side="right")
+
+    def level_indices(self, points: Sequence[int]) -> List[int]:
+        """
+        Maps a batch of point totals to level indices in one call.
+
+        Returns a list of ints whether or not NumPy is installed.
+        """
+        if self._thresholds_array is not None:
+            return self._indices_array(points).tolist()
+        thresholds = self.thresholds
+        return [bisect_right(thresholds, value) for value in points]
+
+    def level_distribution(self, points: Iterable[int]) -> Dict[str, int]:
+        """
+        Counts how many of the given point totals fall into each level.
+
+        Levels with no users are included with a count of 0.
+        """
+        if self._thresholds_array is not None:
+            indices = self._indices_array(points if isinstance(points, (np.ndarray, list, tuple)) else list(points))
+            counts = np.bincount(indices, minlength=len(self.level_names)).tolist()
+        else:
+            # Sorting once and bisecting per threshold beats one bisect per user in pure Python
+            ordered = sorted(points)
+            bounds = [0] + [bisect_left(ordered, threshold) for threshold in self.thresholds] + [len(ordered)]
+            counts = [bounds[i + 1] - bounds[i] for i in range(len(self.level_names))]
+        distribution = dict.fromkeys(self.level_names, 0)
+        for name, count in zip(self.level_names, counts):
+            distribution[name] += count
+        return distribution
 
     async def check_level_up(self, user_id: int, old_points: int, new_points: int):
         """
         Checks if a user has leveled up and publishes a 'level_up' event if so.
         """
-        old_level = self.get_level(old_points)
-        new_level = self.get_level(new_points)
+        old_index = bisect_right(self.thresholds, old_points)
+        new_index = bisect_right(self.thresholds, new_points)
+        if new_index == old_index:
+            logger.debug(f"User {user_id} is still {self.level_names[new_index]} (Points: {new_points})")
+            return
 
-        if new_level != old_level:
-            logger.info(f"User {user_id} leveled up from {old_level} to {new_level} (Points: {new_points})")
-            await self.event_bus.publish("level_up", user_id=user_id, old_level=old_level, new_level=new_level)
-        else:
-            logger.info(f"User {user_id} is still {new_level} (Points: {new_points})")
\ No newline at end of file
+        old_level = self.level_names[old_index]
+        new_level = self.level_names[new_index]
+        logger.info(f"User {user_id} leveled up from {old_level} to {new_level} (Points: {new_points})")
+        await self.event_bus.publish("level_up", user_id=user_id, old_level=old_level, new_level=new_level)
@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -19,15 +19,16 @@ class MissionService:
     updating progress, and status retrieval.
     """
 
-    def __init__(self, session: AsyncSession, mission_catalog: MissionCatalog):
+    def __init__(self, session: AsyncSession, mission_catalog: Optional[MissionCatalog] = None):
         """Initializes the MissionService.
 
         Args:
             session (AsyncSession): The SQLAlchemy asynchronous session for database operations.
-            mission_catalog (MissionCatalog): The catalog providing mission definitions.
+            mission_catalog (Optional[MissionCatalog]): The catalog providing mission definitions.
+                Defaults to the shared catalog of ``data/missions.json``.
         """
         self.user_mission_repo = UserMissionRepository(session)
-        self.mission_catalog = mission_catalog
+        self.mission_catalog = mission_catalog if mission_catalog is not None else MissionCatalog()
 
     async def list_available_missions(self, user_id: int) -> List[Dict]:
         """Lists missions available to a user that are not yet completed.
@@ -39,15 +40,12 @@ class MissionService:
             List[Dict]: A list of mission dictionaries, each including 'status'.
         """
         logging.info(f"Listing available missions for user {user_id}")
-        all_missions = self.mission_catalog.get_all_missions()
-        user_progress_records = await self.user_mission_repo.get_user_missions(user_id)
-        
-        completed_mission_ids = {m.mission_id for m in user_progress_records if m.status == "completed"}
+        statuses = await self.get_mission_statuses(user_id)
 
         available_missions = []
-        for mission in all_missions:
-            if mission["id"] not in completed_mission_ids:
-                mission_status = await self.get_mission_status(user_id, mission["id"])
+        for mission in self.mission_catalog.get_all_missions():
+            mission_status = statuses[mission["id"]]
+            if mission_status != "completed":
                 mission_with_status = mission.copy()
                 mission_with_status["status"] = mission_status
                 available_missions.append(mission_with_status)
@@ -55,6 +53,38 @@ class MissionService:
         logging.info(f"Found {len(available_missions)} available missions for user {user_id}")
         return available_missions
 
+    async def get_mission_statuses(self, user_id: int) -> Dict[str, str]:
+        """Retrieves the status of every catalog mission for a user with a single query.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            Dict[str, str]: Status (pending, in_progress, completed, failed) keyed by mission ID.
+        """
+        records = await self.user_mission_repo.get_user_missions(user_id)
+        return self._build_status_map(records)
+
+    async def get_mission_statuses_for_users(self, user_ids: List[int]) -> Dict[int, Dict[str, str]]:
+        """Retrieves the status of every catalog mission for many users with a single query.
+
+        Args:
+            user_ids (List[int]): The IDs of the users.
+
+        Returns:
+            Dict[int, Dict[str, str]]: For each user, the status keyed by mission ID.
+        """
+        records_by_user = await self.user_mission_repo.get_missions_for_users(user_ids)
+        return {user_id: self._build_status_map(records) for user_id, records in records_by_user.items()}
+
+    def _build_status_map(self, records: List[UserMissionProgress]) -> Dict[str, str]:
+        """Joins a user's progress records with the catalog in memory."""
+        recorded = {record.mission_id: record.status for record in records}
+        return {
+            mission["id"]: recorded.get(mission["id"], "pending")
+            for mission in self.mission_catalog.get_all_missions()
+        }
+
     async def start_mission(self, user_id: int, mission_id: str) -> None:
         """Starts a mission for a user.
 
@@ -102,20 +132,46 @@ class MissionService:
         if not mission_definition:
             raise ValueError(f"Mission with ID {mission_id} does not exist in the catalog.")
 
-        current_progress_record = await self.user_mission_repo.get_mission_progress(user_id, mission_id)
-        if not current_progress_record or current_progress_record.status != "in_progress":
-            raise ValueError(f"Mission {mission_id} is not in progress for user {user_id}. Cannot update.")
+        # Load once, mutate the same record and commit once.
+        async with self.user_mission_repo.unit_of_work():
+            current_progress_record = await self.user_mission_repo.get_mission_progress(user_id, mission_id)
+            if not current_progress_record or current_progress_record.status != "in_progress":
+                raise ValueError(f"Mission {mission_id} is not in progress for user {user_id}. Cannot update.")
 
-        new_progress = min(100.0, current_progress_record.progress + progress_delta)
-        
-        updated_record = await self.user_mission_repo.update_progress(user_id, mission_id, new_progress)
+            new_progress = min(100.0, current_progress_record.progress + progress_delta)
+
+            updated_record = await self.user_mission_repo.update_progress(
+                user_id, mission_id, new_progress, mission_progress=current_progress_record
+            )
 
-        if new_progress >= 100.0:
-            await self.user_mission_repo.complete_mission(user_id, mission_id)
-            logging.info(f"Mission {mission_id} for user {user_id} automatically completed.")
+            if new_progress >= 100.0:
+                await self.user_mission_repo.complete_mission(
+                    user_id, mission_id, mission_progress=current_progress_record
+                )
+                logging.info(f"Mission {mission_id} for user {user_id} automatically completed.")
         logging.info(f"Progress for user {user_id}, mission {mission_id} updated to {new_progress}.")
         return updated_record
 
+    async def tick_missions(self, ticks: List[Tuple[int, str, float]]) -> List[UserMissionProgress]:
+        """Adds progress to many in-progress (user, mission) pairs at once.
+
+        Meant for event handlers that advance the same missions for many users;
+        unknown missions are ignored and the whole batch is committed once.
+
+        Args:
+            ticks (List[Tuple[int, str, float]]): (user_id, mission_id, progress_delta) triples.
+
+        Returns:
+            List[UserMissionProgress]: The records that were updated.
+        """
+        valid_ticks = [tick for tick in ticks if self.mission_catalog.get_mission_by_id(tick[1])]
+        if not valid_ticks:
+            return []
+        updated = await self.user_mission_repo.tick_progress_many(valid_ticks)
+        completed = sum(1 for record in updated if record.status == "completed")
+        logging.info(f"Ticked {len(updated)} missions, {completed} completed.")
+        return updated
+
     async def get_mission_status(self, user_id: int, mission_id: str) -> str:
         """Retrieves the current status of a mission for a user.
 
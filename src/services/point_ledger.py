@@ -0,0 +1,210 @@
+# src/services/point_ledger.py
+"""
+Escritura diferida (write-behind) del historial de puntos.
+
+El saldo se actualiza de forma atómica en ``users.points``; las filas de
+``point_transactions`` se acumulan en memoria y una tarea en segundo plano
+las inserta en bloque cada ``flush_interval_ms`` milisegundos o cuando se
+juntan ``batch_size`` filas. Con ``submit_after_commit`` la fila sólo entra
+en el buffer cuando la sesión que cambió el saldo confirma. Los lotes que no se pueden insertar (y todo lo
+pendiente al apagar, si la base de datos no responde) se vuelcan a un fichero
+de spool JSONL que se reinyecta tras el siguiente ``start()``; el fichero sólo
+se borra cuando sus filas están confirmadas en la base de datos.
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.metrics import track_db_operation
+from src.database.models import PointTransaction
+
+logger = logging.getLogger(__name__)
+
+
+_PENDING_KEY = "point_ledger_pending"
+
+
+def _discard_pending(sync_session, transaction):
+    # Tras un commit after_commit ya vació la lista; aquí sólo llega lo de un rollback o un close.
+    if transaction.parent is not None:
+        return
+    rows = sync_session.info.pop(_PENDING_KEY, None)
+    if rows:
+        logger.info(f"Rollback: se descartan {len(rows)} transacciones de puntos sin confirmar.")
+
+
+class PointLedgerWriter:
+    """
+    Buffer de transacciones de puntos con inserción por lotes.
+
+    Attributes:
+        written: Filas insertadas en ``point_transactions``.
+        spooled: Filas volcadas al fichero de spool.
+        write_errors: Lotes cuya inserción falló.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        flush_interval_ms: int = 250,
+        batch_size: int = 500,
+        spool_path: Optional[str] = None,
+    ):
+        self._session_factory = session_factory
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self.spool_path = Path(spool_path) if spool_path else None
+        self._buffer: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._flush_lock = asyncio.Lock()
+
+        self.written = 0
+        self.spooled = 0
+        self.write_errors = 0
+        self.flushes = 0
+
+    @classmethod
+    def from_settings(cls, settings, session_factory: async_sessionmaker) -> "PointLedgerWriter":
+        """Builds the writer configured by the POINTS_LEDGER_* settings."""
+        return cls(
+            session_factory,
+            flush_interval_ms=settings.POINTS_LEDGER_FLUSH_MS,
+            batch_size=settings.POINTS_LEDGER_BATCH_SIZE,
+            spool_path=settings.POINTS_LEDGER_SPOOL_PATH,
+        )
+
+    def submit(self, user_id: int, points: int, reason: str):
+        """Encola una transacción. Nunca bloquea ni descarta filas."""
+        self._buffer.append({
+            "user_id": user_id,
+            "points": points,
+            "reason": reason,
+            "created_at": datetime.utcnow(),
+        })
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def submit_after_commit(self, session: AsyncSession, user_id: int, points: int, reason: str):
+        """
+        Encola la transacción cuando ``session`` haga commit y la descarta si
+        hace rollback o se cierra sin confirmar, para que el historial no
+        registre saldos deshechos.
+        """
+        sync_session = session.sync_session
+        if not sync_session.info.get("point_ledger_hooked"):
+            sync_session.info["point_ledger_hooked"] = True
+            event.listen(sync_session, "after_commit", self._after_commit)
+            event.listen(sync_session, "after_transaction_end", _discard_pending)
+        sync_session.info.setdefault(_PENDING_KEY, []).append((user_id, points, reason))
+
+    def _after_commit(self, sync_session):
+        for user_id, points, reason in sync_session.info.pop(_PENDING_KEY, ()):
+            self.submit(user_id, points, reason)
+
+    def start(self):
+        """Arranca la tarea de escritura, que empieza reinyectando el spool pendiente."""
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run(), name="point-ledger")
+
+    async def stop(self):
+        """Detiene la tarea de fondo e inserta (o vuelca al spool) todo lo pendiente."""
+        if self._task is not None:
+            # No se cancela: una cancelación a mitad de un INSERT perdería el lote.
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    @track_db_operation("PointLedgerWriter.flush")
+    async def flush(self):
+        """Inserta todo lo que haya en el buffer, en lotes de ``batch_size``."""
+        async with self._flush_lock:
+            while self._buffer:
+                count = min(len(self._buffer), self.batch_size)
+                batch = [self._buffer.popleft() for _ in range(count)]
+                try:
+                    async with self._session_factory() as session:
+                        await session.execute(insert(PointTransaction), batch)
+                        await session.commit()
+                    self.written += len(batch)
+                    self.flushes += 1
+                except Exception as e:
+                    self.write_errors += 1
+                    logger.error(f"No se pudo insertar un lote de {len(batch)} transacciones de puntos: {e}", exc_info=True)
+                    self._spool(batch)
+
+    async def _run(self):
+        await self._replay_spool()
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def _spool(self, batch: List[Dict[str, Any]]):
+        if self.spool_path is None:
+            logger.critical(f"Sin spool configurado: se pierden {len(batch)} transacciones de puntos.")
+            return
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spool_path, "a", encoding="utf-8") as f:
+            for row in batch:
+                f.write(json.dumps({**row, "created_at": row["created_at"].isoformat()}, ensure_ascii=False) + "\n")
+            f.flush()
+        self.spooled += len(batch)
+
+    async def _replay_spool(self):
+        """
+        Inserta el spool en una sola transacción y sólo entonces lo borra.
+
+        El fichero se renombra antes a ``<spool>.replay`` para que los lotes que
+        fallen mientras tanto vayan a un spool nuevo. Si la inserción falla, el
+        fichero se queda y se reintenta en el siguiente arranque. Un corte entre
+        el commit y el borrado reinyectaría las filas otra vez (al menos una vez).
+        """
+        if self.spool_path is None:
+            return
+        replay = self.spool_path.with_name(self.spool_path.name + ".replay")
+        while True:
+            if not replay.exists():
+                if not self.spool_path.exists():
+                    return
+                self.spool_path.replace(replay)
+            with open(replay, encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            for row in rows:
+                row["created_at"] = datetime.fromisoformat(row["created_at"])
+            try:
+                if rows:
+                    async with self._session_factory() as session:
+                        for i in range(0, len(rows), self.batch_size):
+                            await session.execute(insert(PointTransaction), rows[i:i + self.batch_size])
+                        await session.commit()
+            except Exception as e:
+                self.write_errors += 1
+                logger.error(f"No se pudo reinyectar el spool {replay} ({len(rows)} filas); se reintentará en el próximo arranque: {e}")
+                return
+            self.written += len(rows)
+            replay.unlink()
+            logger.info(f"Reinyectadas {len(rows)} transacciones de puntos desde {replay}")
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "spooled": self.spooled,
+            "write_errors": self.write_errors,
+            "flushes": self.flushes,
+        }
@@ -1,27 +1,50 @@
 # src/services/points_service.py
+from typing import Optional
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.repository import UserRepository, PointTransactionRepository
 from src.database.models import Mission, User
-from src.core.event_bus import event_bus
+from src.core.event_bus import EventBus, event_bus
+from src.services.point_ledger import PointLedgerWriter
+
+# Ledger compartido por los listeners; lo configura setup_points_listeners.
+_ledger: Optional[PointLedgerWriter] = None
 
 class PointsService:
-    def __init__(self, user_repo: UserRepository, transaction_repo: PointTransactionRepository):
+    def __init__(self, user_repo: UserRepository, transaction_repo: PointTransactionRepository,
+                 ledger: Optional[PointLedgerWriter] = None, bus: Optional[EventBus] = None):
         self.user_repo = user_repo
         self.transaction_repo = transaction_repo
+        self.ledger = ledger
+        self.event_bus = bus or event_bus
 
-    async def add_points(self, user_id: int, amount: int, reason: str = "Generic") -> None:
+    async def add_points(self, user_id: int, amount: int, reason: str = "Generic") -> Optional[int]:
         """
-        Add or remove points for a user and create a transaction record.
+        Add or remove points for a user and record the transaction.
+
+        The balance is updated atomically in the database. With a ledger the
+        transaction row is written behind in a batch once the caller's session
+        commits (a rollback discards it); without one it is
+        inserted and committed together with the balance. Publishes
+        ``points_changed`` with the new balance and the delta.
+
+        Returns:
+            The new balance, or None if the user does not exist.
         """
-        user = await self.user_repo.get_user_by_id(user_id)
-        if user:
-            user.points += amount
+        new_balance = await self.user_repo.increment_points(user_id, amount)
+        if new_balance is None:
+            return None
+        if self.ledger is not None:
+            # Queued once the session commits (handled by the middleware); dropped on rollback
+            self.ledger.submit_after_commit(self.user_repo.session, user_id, amount, reason)
+        else:
             await self.transaction_repo.create_transaction(
                 user_id=user_id,
                 points=amount,
                 reason=reason
             )
-            # The session commit should be handled by the middleware
+        await self.event_bus.publish("points_changed", user_id=user_id, points=new_balance, delta=amount, reason=reason)
+        return new_balance
 
     async def get_points(self, user_id: int) -> int:
         """
@@ -36,12 +59,14 @@ class PointsService:
         """
         await self.add_points(user_id, mission.reward_points, f"Completed mission: {mission.name}")
 
-def setup_points_listeners():
+def setup_points_listeners(ledger: Optional[PointLedgerWriter] = None):
+    global _ledger
+    _ledger = ledger
     event_bus.subscribe('mission_completed', on_mission_completed)
 
 async def on_mission_completed(user_id: int, mission: Mission, session: AsyncSession, **kwargs):
     # This part might need adjustment depending on how services are instantiated globally
     user_repo = UserRepository(session)
     transaction_repo = PointTransactionRepository(session)
-    points_service = PointsService(user_repo, transaction_repo)
+    points_service = PointsService(user_repo, transaction_repo, ledger=_ledger)
     await points_service.award_points_for_mission(user_id, mission)
@@ -3,6 +3,9 @@ import logging
 from pathlib import Path
 from typing import Dict, Optional
 
+from src.core.content_registry import ContentRegistry, content_registry
+from src.story_system.story_graph import CompiledStory, load_story
+
 logger = logging.getLogger(__name__)
 
 class StoryService:
@@ -10,76 +13,51 @@ class StoryService:
     Service for loading and managing story nodes from a JSON file.
     
     This service provides access to interactive story content and manages
-    story progression through various nodes and choices.
+    story progression through various nodes and choices. The story is
+    compiled once at load time (see ``compile_story``), so node, choice and
+    initial-node lookups are dictionary hits, and hot-reloaded through the
+    content registry.
     """
     
-    def __init__(self, story_file_path: str = "data/story.json"):
+    def __init__(self, story_file_path: str = "data/story.json", registry: Optional[ContentRegistry] = None):
         """
         Initialize the StoryService with a story file.
+
+        The compiled story is shared through the content registry: the file
+        is parsed once per process and hot-reloaded when it changes.
         
         Args:
             story_file_path: Path to the story JSON file
+            registry: Content registry to use (defaults to the process-wide one)
             
         Raises:
             FileNotFoundError: If the story file doesn't exist
             json.JSONDecodeError: If the story file is not valid JSON
+            ValueError: If the story is malformed or a choice points to a missing node
         """
         self.story_file_path = Path(story_file_path)
-        self.story_data = self._load_story_data()
-        
-    def _load_story_data(self) -> Dict:
-        """
-        Load story data from the JSON file.
-        
-        Returns:
-            Dictionary containing all story nodes
-            
-        Raises:
-            FileNotFoundError: If the story file doesn't exist
-            json.JSONDecodeError: If the story file is not valid JSON
-        """
+        registry = registry if registry is not None else content_registry
         try:
-            if not self.story_file_path.exists():
-                raise FileNotFoundError(f"Story file not found: {self.story_file_path}")
-            
-            with open(self.story_file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            self._validate_story_data(data)
-            logger.info(f"Story data loaded successfully from {self.story_file_path}")
-            return data
-            
+            self._content = registry.register("story", self.story_file_path, load_story)
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON in story file {self.story_file_path}: {e}")
             raise
         except Exception as e:
             logger.error(f"Error loading story file {self.story_file_path}: {e}")
             raise
-    
-    def _validate_story_data(self, data: Dict) -> None:
+
+    @property
+    def story(self) -> CompiledStory:
         """
-        Validate that story data has the required structure.
-        
-        Args:
-            data: Story data dictionary to validate
-            
-        Raises:
-            ValueError: If story data is invalid
+        Current compiled story. It is never mutated; callers that need several
+        lookups from the same version should read this property once.
         """
-        if not isinstance(data, dict):
-            raise ValueError("Story data must be a dictionary")
-            
-        for node_id, node_data in data.items():
-            if not isinstance(node_data, dict):
-                raise ValueError(f"Node {node_id} must be a dictionary")
-                
-            if 'text' not in node_data:
-                raise ValueError(f"Node {node_id} missing required 'text' field")
-                
-            # Validate choices if present
-            if 'choices' in node_data:
-                if not isinstance(node_data['choices'], list):
-                    raise ValueError(f"Node {node_id} 'choices' must be a list")
+        return self._content.value
+
+    @property
+    def story_data(self) -> Dict:
+        """Raw story nodes of the current version."""
+        return self.story.nodes
     
     def get_node(self, node_id: str) -> Optional[Dict]:
         """
@@ -91,7 +69,7 @@ class StoryService:
         Returns:
             Dictionary containing node data if found, None otherwise
         """
-        node = self.story_data.get(node_id)
+        node = self.story.get_node(node_id)
         if node:
             logger.info(f"Retrieved story node: {node_id}")
         else:
@@ -101,30 +79,29 @@ class StoryService:
     def get_initial_node(self) -> str:
         """
         Get the ID of the initial story node.
+
+        The initial node is resolved once when the story is compiled: the node
+        marked ``meta.is_initial``, a conventional name or the first node.
         
         Returns:
             String ID of the initial node
-            
-        Raises:
-            ValueError: If no initial node can be determined
         """
-        # Look for a node marked as initial or use a conventional naming
-        for node_id, node_data in self.story_data.items():
-            if node_data.get('meta', {}).get('is_initial', False):
-                logger.info(f"Found initial node: {node_id}")
-                return node_id
-        
-        # Fallback to conventional naming patterns
-        conventional_names = ['start', 'intro', 'level_1_intro', 'beginning']
-        for name in conventional_names:
-            if name in self.story_data:
-                logger.info(f"Using conventional initial node: {name}")
-                return name
-                
-        # Use the first node as last resort
-        if self.story_data:
-            first_node = next(iter(self.story_data.keys()))
-            logger.info(f"Using first node as initial: {first_node}")
-            return first_node
-            
-        raise ValueError("No story nodes found in story data")
\ No newline at end of file
+        return self.story.initial_node
+
+    def get_choice(self, node_id: str, choice_id: str) -> Optional[Dict]:
+        """
+        Get a choice of a node by its ID.
+
+        Returns:
+            The choice dictionary, or None if the node or choice doesn't exist
+        """
+        return self.story.get_choice(node_id, choice_id)
+
+    def get_choice_by_text(self, node_id: str, text: str) -> Optional[Dict]:
+        """
+        Get the choice of a node whose button text matches ``text``.
+
+        Returns:
+            The choice dictionary, or None if the node or choice doesn't exist
+        """
+        return self.story.get_choice_by_text(node_id, text)
@@ -1,7 +1,9 @@
 import logging
 from datetime import datetime, timedelta
-from typing import Dict
+from typing import Dict, Optional
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from src.core.event_bus import EventBus
+from src.database.repository import UserRepository
 from src.models.user import User, UserRole # Assuming User and UserRole are defined
 
 logger = logging.getLogger(__name__)
@@ -10,12 +12,34 @@ class SubscriptionService:
     """
     Manages VIP subscriptions for users.
     Emits 'vip_access_granted' events.
+
+    With a ``session_factory`` the expiration is stored in ``users.vip_expires_at``
+    and, with an ``expiry_scheduler`` (VipExpiryScheduler), revoked exactly when
+    it expires; ``is_vip`` then reads the scheduler's in-memory index, which is
+    rebuilt from the database on startup. Without them, subscriptions only live
+    in memory.
     """
-    def __init__(self, event_bus: EventBus):
+    def __init__(self, event_bus: EventBus, session_factory: Optional[async_sessionmaker] = None,
+                 expiry_scheduler=None):
         self.event_bus = event_bus
+        self._session_factory = session_factory
+        self._expiry_scheduler = expiry_scheduler
         # In-memory storage for VIP subscriptions: {user_id: expiration_datetime}
         self._vip_subscriptions: Dict[int, datetime] = {}
 
+    async def _persist(self, user_id: int, expiration_date: Optional[datetime]):
+        if self._session_factory is None:
+            return
+        async with self._session_factory() as session:
+            if not await UserRepository(session).set_vip_expiry(user_id, expiration_date):
+                logger.warning(f"User {user_id} not found in the database; VIP state kept in memory only.")
+            await session.commit()
+
+    def _expiration(self, user_id: int) -> Optional[datetime]:
+        if self._expiry_scheduler is not None:
+            return self._expiry_scheduler.expires_at(user_id)
+        return self._vip_subscriptions.get(user_id)
+
     async def grant_vip(self, user: User, days: int):
         """
         Grants VIP access to a user for a specified number of days.
@@ -25,7 +49,11 @@ class SubscriptionService:
             return
 
         expiration_date = datetime.now() + timedelta(days=days)
-        self._vip_subscriptions[user.id] = expiration_date
+        await self._persist(user.id, expiration_date)
+        if self._expiry_scheduler is not None:
+            self._expiry_scheduler.schedule(user.id, expiration_date)
+        else:
+            self._vip_subscriptions[user.id] = expiration_date
         user.role = UserRole.VIP # Update user role directly for consistency
 
         logger.info(f"VIP access granted to user {user.id} until {expiration_date}.")
@@ -35,8 +63,11 @@ class SubscriptionService:
         """
         Revokes VIP access from a user.
         """
-        if user.id in self._vip_subscriptions:
-            del self._vip_subscriptions[user.id]
+        if self._expiration(user.id) is not None:
+            await self._persist(user.id, None)
+            if self._expiry_scheduler is not None:
+                self._expiry_scheduler.cancel(user.id)
+            self._vip_subscriptions.pop(user.id, None)
             user.role = UserRole.FREE # Update user role directly for consistency
             logger.info(f"VIP access revoked for user {user.id}.")
         else:
@@ -46,5 +77,5 @@ class SubscriptionService:
         """
         Checks if a user has active VIP access.
         """
-        expiration_date = self._vip_subscriptions.get(user_id)
+        expiration_date = self._expiration(user_id)
         return expiration_date is not None and expiration_date > datetime.now()
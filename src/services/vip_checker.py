@@ -1,4 +1,13 @@
 class VIPChecker:
-    def revoke_expired_vip(self):
-        print("Revoking expired VIPs... (triggered by scheduler)")
-        # Logic to check and revoke expired VIPs would go here
+    """
+    Barrido periódico de seguridad de los VIP caducados.
+
+    Las caducidades se retiran en el momento exacto con VipExpiryScheduler;
+    este barrido por el índice de ``vip_expires_at`` recoge las que no
+    estuvieran en su montículo (concedidas desde otro proceso, por ejemplo).
+    """
+    def __init__(self, expiry_scheduler):
+        self.expiry_scheduler = expiry_scheduler
+
+    async def revoke_expired_vip(self):
+        return await self.expiry_scheduler.sweep()
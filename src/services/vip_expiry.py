@@ -0,0 +1,182 @@
+# src/services/vip_expiry.py
+"""
+Caducidad de las suscripciones VIP.
+
+``users.vip_expires_at`` (indexada) es la fuente de verdad. En memoria se
+mantiene un montículo de ``(caducidad, user_id)`` reconstruido desde el
+índice al arrancar; una tarea duerme exactamente hasta la próxima caducidad
+y retira el VIP por lotes: un ``UPDATE`` por lote, después la expulsión del
+canal VIP y el evento ``vip_access_revoked``.
+
+Las renovaciones y retiradas no borran del montículo: se apunta la caducidad
+vigente de cada usuario y las entradas que ya no coinciden se descartan al
+salir (borrado perezoso).
+"""
+import asyncio
+import heapq
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database.repository import UserRepository
+
+logger = logging.getLogger(__name__)
+
+KickCallback = Callable[[List[int]], Awaitable[None]]
+
+
+def channel_kicker(bot, chat_id) -> KickCallback:
+    """Expulsa del canal ``chat_id`` (ban + unban, para que pueda volver a unirse si renueva)."""
+    async def kick(user_ids: List[int]):
+        for user_id in user_ids:
+            try:
+                await bot.ban_chat_member(chat_id, user_id)
+                await bot.unban_chat_member(chat_id, user_id, only_if_banned=True)
+            except Exception as e:
+                logger.warning(f"No se pudo expulsar a {user_id} del canal VIP {chat_id}: {e}")
+    return kick
+
+
+class VipExpiryScheduler:
+    def __init__(self, session_factory: async_sessionmaker, kick: Optional[KickCallback] = None,
+                 batch_size: int = 500, event_bus=None, clock: Callable[[], datetime] = datetime.now):
+        self._session_factory = session_factory
+        self._kick = kick
+        self.batch_size = batch_size
+        self._event_bus = event_bus
+        self._clock = clock
+        self._heap: List[Tuple[datetime, int]] = []
+        self._expirations: Dict[int, datetime] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._revoked = 0
+
+    @classmethod
+    def from_settings(cls, settings, session_factory: async_sessionmaker, kick: Optional[KickCallback] = None,
+                      event_bus=None) -> "VipExpiryScheduler":
+        """Builds the scheduler with VIP_REVOKE_BATCH_SIZE from Settings."""
+        return cls(session_factory, kick=kick, batch_size=settings.VIP_REVOKE_BATCH_SIZE, event_bus=event_bus)
+
+    def expires_at(self, user_id: int) -> Optional[datetime]:
+        """Caducidad vigente del VIP de ``user_id``, o None si no es VIP."""
+        return self._expirations.get(user_id)
+
+    def schedule(self, user_id: int, expires_at: datetime):
+        """Registra (o sustituye) la caducidad de ``user_id``."""
+        self._expirations[user_id] = expires_at
+        heapq.heappush(self._heap, (expires_at, user_id))
+        if self._heap[0] == (expires_at, user_id):
+            self._wakeup.set()  # caduca antes que lo que se estaba esperando
+
+    def cancel(self, user_id: int):
+        self._expirations.pop(user_id, None)
+
+    async def rebuild(self) -> int:
+        """Reconstruye el montículo desde el índice de ``vip_expires_at``. Devuelve cuántos VIP hay."""
+        async with self._session_factory() as session:
+            rows = await UserRepository(session).get_vip_expirations()
+        self._expirations = {user_id: expires_at for user_id, expires_at in rows}
+        self._heap = [(expires_at, user_id) for user_id, expires_at in rows]
+        heapq.heapify(self._heap)  # ya viene ordenado: O(n)
+        self._wakeup.set()
+        logger.info(f"Caducidades VIP cargadas: {len(rows)}")
+        return len(rows)
+
+    def _pop_due(self, now: datetime) -> List[int]:
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+            expires_at, user_id = heapq.heappop(self._heap)
+            if self._expirations.get(user_id) == expires_at:
+                del self._expirations[user_id]
+                due.append(user_id)
+        return due
+
+    async def _revoke(self, user_ids: List[int], now: datetime) -> List[int]:
+        async with self._session_factory() as session:
+            revoked = await UserRepository(session).revoke_expired_vips(user_ids, now)
+            await session.commit()
+        if not revoked:
+            return revoked
+        self._revoked += len(revoked)
+        logger.info(f"VIP retirado a {len(revoked)} usuarios.")
+        if self._kick is not None:
+            try:
+                await self._kick(revoked)
+            except Exception as e:
+                logger.error(f"Error expulsando del canal VIP: {e}", exc_info=True)
+        if self._event_bus is not None:
+            await self._event_bus.publish("vip_access_revoked", user_ids=revoked)
+        return revoked
+
+    async def revoke_due(self, now: Optional[datetime] = None) -> List[int]:
+        """Retira, por lotes de ``batch_size``, los VIP del montículo que ya caducaron."""
+        now = now or self._clock()
+        revoked: List[int] = []
+        while True:
+            due = self._pop_due(now)
+            if not due:
+                return revoked
+            revoked += await self._revoke(due, now)
+
+    async def sweep(self, now: Optional[datetime] = None) -> List[int]:
+        """
+        Barrido de seguridad por el índice: retira los VIP caducados que no
+        estuvieran en el montículo (p. ej. concedidos desde otro proceso).
+        """
+        now = now or self._clock()
+        revoked: List[int] = []
+        while True:
+            async with self._session_factory() as session:
+                expired = await UserRepository(session).get_expired_vip_ids(now, self.batch_size)
+            if not expired:
+                return revoked
+            for user_id in expired:
+                self._expirations.pop(user_id, None)
+            batch = await self._revoke(expired, now)
+            revoked += batch
+            if not batch:
+                return revoked  # renovados entre la lectura y el UPDATE
+
+    async def start(self):
+        """Reconstruye desde la base de datos y arranca la tarea de caducidad."""
+        if self._task is not None:
+            return
+        await self.rebuild()
+        self._task = asyncio.create_task(self._run(), name="vip-expiry")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.revoke_due()
+            except Exception as e:
+                logger.error(f"Error retirando VIP caducados: {e}", exc_info=True)
+            while self._heap and self._expirations.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)  # entradas obsoletas
+            timeout = None
+            if self._heap:
+                timeout = max((self._heap[0][0] - self._clock()).total_seconds(), 0.0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def get_stats(self):
+        return {
+            "vip_users": len(self._expirations),
+            "heap_size": len(self._heap),
+            "next_expiry": self._heap[0][0].isoformat() if self._heap else None,
+            "revoked": self._revoked,
+        }
@@ -1,3 +1,4 @@
 from .story_engine import StoryEngine
 from .choice_manager import ChoiceManager
-from .progress_tracker import ProgressTracker
\ No newline at end of file
+from .progress_tracker import ProgressTracker
+from .story_graph import CompiledStory, compile_story
@@ -1,6 +1,8 @@
 import logging
+from typing import Optional
 from src.core.event_bus import EventBus
 from src.services import user_service, subscription_service
+from src.services.fragment_service import FragmentService
 from src.models.user import User
 
 logger = logging.getLogger(__name__)
@@ -12,19 +14,22 @@ class AccessManager:
     VIP_ACCESS_FRAGMENT = "fragment_5"
     TEMPORARY_ACCESS_DAYS = 7
 
-    def __init__(self, event_bus: EventBus):
+    def __init__(self, event_bus: EventBus, fragments: Optional[FragmentService] = None):
         self._event_bus = event_bus
+        self._fragments = fragments
         self._event_bus.subscribe("fragment_unlocked", self.on_fragment_unlocked)
 
-    def can_access_vip(self, user_id: int) -> bool:
+    async def can_access_vip(self, user_id: int) -> bool:
         """
         Checks if the user has unlocked the required fragment for VIP access.
         """
-        user = user_service.get_user(user_id)
-        if not user:
-            return False
-        
-        has_access = self.VIP_ACCESS_FRAGMENT in user.unlocked_fragments
+        if self._fragments is not None:
+            has_access = await self._fragments.has_unlocked(user_id, self.VIP_ACCESS_FRAGMENT)
+        else:
+            user = user_service.get_user(user_id)
+            if not user:
+                return False
+            has_access = self.VIP_ACCESS_FRAGMENT in user.unlocked_fragments
         logger.info(f"User {user_id} VIP access check based on fragment '{self.VIP_ACCESS_FRAGMENT}': {'Granted' if has_access else 'Denied'}")
         return has_access
 
@@ -49,7 +54,8 @@ class AccessManager:
         if fragment_id == self.VIP_ACCESS_FRAGMENT:
             await self.grant_temporary_access(user_id)
 
-def setup_access_manager(event_bus: EventBus):
+def setup_access_manager(event_bus: EventBus, fragments: Optional[FragmentService] = None):
     """Initializes and registers the AccessManager."""
-    AccessManager(event_bus)
+    manager = AccessManager(event_bus, fragments)
     logger.info("AccessManager initialized and subscribed to events.")
+    return manager
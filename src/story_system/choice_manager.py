@@ -1,11 +1,16 @@
 class ChoiceManager:
-    def __init__(self, event_bus, progress_tracker):
+    def __init__(self, event_bus, progress_tracker, story=None):
         self.event_bus = event_bus
         self.progress_tracker = progress_tracker
+        # CompiledStory opcional: si está, las opciones se buscan por índice.
+        self.story = story
 
     async def process_choice(self, user_id, scene_id, scene, choice_id):
         # Find the chosen choice in the current scene
-        chosen_choice = next((c for c in scene.get('choices', []) if c.get('id') == choice_id), None)
+        if self.story is not None and scene_id in self.story:
+            chosen_choice = self.story.get_choice(scene_id, choice_id)
+        else:
+            chosen_choice = next((c for c in scene.get('choices', []) if c.get('id') == choice_id), None)
 
         if not chosen_choice:
             return None, "Invalid choice."
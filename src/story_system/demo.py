@@ -40,7 +40,7 @@ async def main():
     # Initialize StoryEngine, ChoiceManager, ProgressTracker
     story_engine = StoryEngine('src/story_system/story.json', event_bus=event_bus)
     progress_tracker = ProgressTracker(db_manager, event_bus=event_bus)
-    choice_manager = ChoiceManager(event_bus, progress_tracker)
+    choice_manager = ChoiceManager(event_bus, progress_tracker, story=story_engine.story)
 
     # --- Simulate Story Flow ---
 
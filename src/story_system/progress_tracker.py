@@ -10,13 +10,9 @@ class ProgressTracker:
                 "INSERT INTO user_progress (user_id, current_scene_id) VALUES ($1, $2) ON CONFLICT (user_id) DO UPDATE SET current_scene_id = $2",
                 user_id, current_scene_id
             )
-            # Example: Save unlocked fragments (simplified, might need a separate table)
+            # Unlocked fragments go to user_unlocked_fragments in a single multi-row insert
             if unlocked_fragments:
-                for fragment_id in unlocked_fragments:
-                    await conn.execute(
-                        "INSERT INTO user_unlocked_fragments (user_id, fragment_id) VALUES ($1, $2) ON CONFLICT DO NOTHING",
-                        user_id, fragment_id
-                    )
+                await self._insert_fragments(conn, user_id, unlocked_fragments)
         print(f"Saving progress for user {user_id}: current_scene={current_scene_id}, unlocked_fragments={unlocked_fragments}")
 
     async def load_progress(self, user_id):
@@ -28,12 +24,18 @@ class ProgressTracker:
                 return {'current_scene_id': row['current_scene_id'], 'unlocked_fragments': unlocked_fragments}
             return {'current_scene_id': 'start_scene', 'unlocked_fragments': []} # Placeholder if no progress found
 
+    @staticmethod
+    async def _insert_fragments(conn, user_id, fragment_ids):
+        # Same table and composite key as src.database.models.UserUnlockedFragment
+        await conn.execute(
+            "INSERT INTO user_unlocked_fragments (user_id, fragment_id, unlocked_at) "
+            "SELECT $1, fragment_id, now() FROM unnest($2::text[]) AS fragment_id ON CONFLICT DO NOTHING",
+            user_id, list(fragment_ids)
+        )
+
     async def unlock_fragment(self, user_id, fragment_id):
         async with self.db_manager.get_connection() as conn:
-            await conn.execute(
-                "INSERT INTO user_unlocked_fragments (user_id, fragment_id) VALUES ($1, $2) ON CONFLICT DO NOTHING",
-                user_id, fragment_id
-            )
+            await self._insert_fragments(conn, user_id, [fragment_id])
         if self.event_bus:
-            await self.event_bus.publish('fragment_unlocked', user_id, fragment_id)
+            await self.event_bus.publish('fragment_unlocked', user_id=user_id, fragment_id=fragment_id)
         print(f"Unlocking fragment {fragment_id} for user {user_id}")
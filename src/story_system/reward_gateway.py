@@ -1,6 +1,8 @@
 import logging
+from typing import Optional
 from src.core.event_bus import EventBus, AsyncCallback
 from src.services import user_service
+from src.services.fragment_service import FragmentService
 
 logger = logging.getLogger(__name__)
 
@@ -10,8 +12,9 @@ class RewardGateway:
     """
     POINTS_FOR_FRAGMENT = 1000
 
-    def __init__(self, event_bus: EventBus):
+    def __init__(self, event_bus: EventBus, fragments: Optional[FragmentService] = None):
         self._event_bus = event_bus
+        self._fragments = fragments
         self._event_bus.subscribe("points_earned", self.on_points_earned)
         self._event_bus.subscribe("mission_completed", self.on_mission_completed)
 
@@ -26,7 +29,11 @@ class RewardGateway:
             if user:
                 # Logic to determine which fragment to award
                 new_fragment_id = f"fragment_from_{user.points}_points"
-                if new_fragment_id not in user.unlocked_fragments:
+                if self._fragments is not None:
+                    # FragmentService publishes fragment_unlocked for new unlocks
+                    if await self._fragments.unlock(user.id, [new_fragment_id]):
+                        logger.info(f"Awarded fragment '{new_fragment_id}' to user {user.id}.")
+                elif new_fragment_id not in user.unlocked_fragments:
                     user.unlocked_fragments.append(new_fragment_id)
                     user_service.save_user(user)
                     logger.info(f"Awarded fragment '{new_fragment_id}' to user {user.id}.")
@@ -48,10 +55,11 @@ class RewardGateway:
                 # Optionally, publish an event
                 # await self._event_bus.publish("premium_decision_unlocked", user_id=user_id, count=user.premium_decisions)
 
-def setup_reward_gateway(event_bus: EventBus):
+def setup_reward_gateway(event_bus: EventBus, fragments: Optional[FragmentService] = None):
     """
     Initializes and registers the RewardGateway.
     """
-    RewardGateway(event_bus)
+    gateway = RewardGateway(event_bus, fragments)
     logger.info("RewardGateway initialized and subscribed to events.")
+    return gateway
 
@@ -1,17 +1,24 @@
-import json
+from src.core.content_registry import content_registry
+
+from .story_graph import load_story
 
 class StoryEngine:
     def __init__(self, story_data_path, event_bus=None):
-        self.story_data = self._load_story_data(story_data_path)
+        # Compartida y recargable: ver ContentRegistry.
+        self._content = content_registry.register("story", story_data_path, load_story)
         self.current_scene = None
         self.event_bus = event_bus
 
-    def _load_story_data(self, path):
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    @property
+    def story(self):
+        return self._content.value
+
+    @property
+    def story_data(self):
+        return self.story.nodes
 
     async def get_scene(self, scene_id):
-        return self.story_data.get(scene_id)
+        return self.story.get_node(scene_id)
 
     async def start_story(self, initial_scene_id, user_id):
         self.current_scene = await self.get_scene(initial_scene_id)
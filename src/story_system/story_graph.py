@@ -0,0 +1,196 @@
+# src/story_system/story_graph.py
+"""
+Compilación del grafo de historia.
+
+El JSON de historia se compila una sola vez al cargarlo: los ids de nodo se
+internan, cada nodo obtiene un diccionario ``choice_id -> choice`` (y otro
+por texto, para los teclados de respuesta), se construye la lista de
+adyacencia y se resuelve el nodo inicial. Un ``next_scene`` que apunta a un
+nodo inexistente es un error de carga, no de conversación.
+"""
+import json
+import logging
+import sys
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Optional, Set, Tuple
+
+from .story_pack import StoryPack
+
+logger = logging.getLogger(__name__)
+
+# Nombres que se usan como nodo inicial si ninguno lleva ``meta.is_initial``.
+CONVENTIONAL_INITIAL_NODES = ('start', 'intro', 'level_1_intro', 'beginning')
+
+
+class CompiledStory:
+    """Vista indexada e inmutable de una historia ya validada."""
+
+    __slots__ = ("nodes", "initial_node", "adjacency", "_choices", "_choices_by_text")
+
+    def __init__(
+        self,
+        nodes: Dict[str, Dict],
+        initial_node: str,
+        adjacency: Dict[str, Tuple[str, ...]],
+        choices: Dict[str, Dict[str, Dict]],
+        choices_by_text: Dict[str, Dict[str, Dict]],
+    ):
+        self.nodes = nodes
+        self.initial_node = initial_node
+        self.adjacency = adjacency
+        self._choices = choices
+        self._choices_by_text = choices_by_text
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self.nodes
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def get_node(self, node_id: str) -> Optional[Dict]:
+        return self.nodes.get(node_id)
+
+    def get_choice(self, node_id: str, choice_id: str) -> Optional[Dict]:
+        """Opción ``choice_id`` del nodo ``node_id``, o ``None``."""
+        return self._choices.get(node_id, {}).get(choice_id)
+
+    def get_choice_by_text(self, node_id: str, text: str) -> Optional[Dict]:
+        """Opción del nodo cuyo texto coincide exactamente con ``text``, o ``None``."""
+        return self._choices_by_text.get(node_id, {}).get(text)
+
+    def reachable_from(self, start: str) -> Set[str]:
+        seen = {start}
+        pending = deque([start])
+        while pending:
+            for next_id in self.adjacency.get(pending.popleft(), ()):
+                if next_id not in seen:
+                    seen.add(next_id)
+                    pending.append(next_id)
+        return seen
+
+
+def find_initial_node(data: Mapping[str, Dict]) -> str:
+    """
+    Resuelve el nodo inicial: el marcado con ``meta.is_initial``, un nombre
+    convencional o, en último caso, el primer nodo.
+
+    Raises:
+        ValueError: Si la historia no tiene nodos.
+    """
+    for node_id, node_data in data.items():
+        if node_data.get('meta', {}).get('is_initial', False):
+            return node_id
+    for name in CONVENTIONAL_INITIAL_NODES:
+        if name in data:
+            return name
+    if data:
+        return next(iter(data))
+    raise ValueError("No story nodes found in story data")
+
+
+def _index_choices(node_id: str, choices: Iterable[Dict]):
+    by_id: Dict[str, Dict] = {}
+    by_text: Dict[str, Dict] = {}
+    for choice in choices:
+        choice_id = choice.get('id')
+        if choice_id is not None:
+            if choice_id in by_id:
+                raise ValueError(f"Node {node_id} has duplicate choice id '{choice_id}'")
+            by_id[sys.intern(choice_id)] = choice
+        text = choice.get('text')
+        if text is not None:
+            by_text.setdefault(text, choice)
+    return by_id, by_text
+
+
+def compile_story(data: Mapping[str, Dict]) -> CompiledStory:
+    """
+    Compila los nodos de una historia (ya validados en forma) en un ``CompiledStory``.
+
+    Raises:
+        ValueError: Si alguna opción apunta a un ``next_scene`` inexistente,
+            si hay ids de opción repetidos en un nodo o si no hay nodos.
+    """
+    nodes: Dict[str, Dict] = {}
+    adjacency: Dict[str, Tuple[str, ...]] = {}
+    choices: Dict[str, Dict[str, Dict]] = {}
+    choices_by_text: Dict[str, Dict[str, Dict]] = {}
+
+    for node_id, node_data in data.items():
+        node_id = sys.intern(node_id)
+        nodes[node_id] = node_data
+        node_choices = node_data.get('choices', [])
+        choices[node_id], choices_by_text[node_id] = _index_choices(node_id, node_choices)
+
+        targets = []
+        for choice in node_choices:
+            next_scene = choice.get('next_scene')
+            if next_scene is None:
+                continue
+            if next_scene not in data:
+                raise ValueError(
+                    f"Node {node_id} choice '{choice.get('id')}' points to unknown next_scene '{next_scene}'"
+                )
+            next_scene = sys.intern(next_scene)
+            choice['next_scene'] = next_scene
+            if next_scene not in targets:
+                targets.append(next_scene)
+        adjacency[node_id] = tuple(targets)
+
+    story = CompiledStory(nodes, sys.intern(find_initial_node(nodes)), adjacency, choices, choices_by_text)
+
+    unreachable = set(nodes) - story.reachable_from(story.initial_node)
+    if unreachable:
+        logger.warning(
+            f"{len(unreachable)} story nodes are unreachable from '{story.initial_node}': "
+            f"{', '.join(sorted(unreachable))}"
+        )
+    return story
+
+
+def validate_story_data(data) -> None:
+    """
+    Validate that story data has the required structure.
+
+    Raises:
+        ValueError: If story data is invalid
+    """
+    if not isinstance(data, Mapping):
+        raise ValueError("Story data must be a dictionary")
+
+    for node_id, node_data in data.items():
+        if not isinstance(node_data, Mapping):
+            raise ValueError(f"Node {node_id} must be a dictionary")
+
+        if 'text' not in node_data:
+            raise ValueError(f"Node {node_id} missing required 'text' field")
+
+        # Validate choices if present
+        if 'choices' in node_data:
+            if not isinstance(node_data['choices'], list):
+                raise ValueError(f"Node {node_id} 'choices' must be a list")
+
+
+def load_story(path: Path) -> CompiledStory:
+    """
+    Lee, valida y compila un fichero de historia (loader del ContentRegistry).
+
+    Acepta ``story.json`` o un ``.pack`` generado con ``story_pack``; en el
+    segundo caso los textos de los nodos se quedan en el ``mmap``.
+
+    Raises:
+        FileNotFoundError: If the story file doesn't exist
+        json.JSONDecodeError: If the story file is not valid JSON
+        ValueError: If the story is malformed or a choice points to a missing node
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Story file not found: {path}")
+    if path.suffix == '.pack':
+        data = StoryPack(path)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    validate_story_data(data)
+    return compile_story(data)
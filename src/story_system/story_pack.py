@@ -0,0 +1,149 @@
+# src/story_system/story_pack.py
+"""
+Formato compacto de historia en disco, leído con ``mmap``.
+
+Un ``.pack`` contiene una cabecera, un índice JSON con los metadatos de cada
+nodo (opciones, imagen, meta...) y, a continuación, un bloque con los textos
+de los nodos en UTF-8. Los metadatos se cargan al abrir el fichero; el texto
+de un nodo sólo se decodifica cuando se pide ``node['text']``, leyendo su
+rango del mapa de memoria. Así varios procesos comparten la caché de páginas
+del sistema en vez de tener cada uno una copia privada de todos los textos.
+
+Estructura::
+
+    MAGIC (8 bytes) | longitud del índice (uint64 LE) | índice JSON | textos
+
+En el índice, ``text`` de cada nodo es ``[offset, longitud]`` relativo al
+inicio del bloque de textos.
+
+Conversión desde JSON::
+
+    python build_story_pack.py data/story.json data/story.pack
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+MAGIC = b"DSTPACK1"
+_HEADER = struct.Struct("<8sQ")
+
+
+class LazyNode(Mapping):
+    """Nodo de historia cuyo ``text`` se lee del ``mmap`` al accederlo."""
+
+    __slots__ = ("_fields", "_buffer", "_span")
+
+    def __init__(self, fields: Dict, buffer: mmap.mmap, span: Tuple[int, int]):
+        self._fields = fields
+        self._buffer = buffer
+        self._span = span
+
+    def __getitem__(self, key):
+        if key == 'text':
+            start, length = self._span
+            return self._buffer[start:start + length].decode('utf-8')
+        return self._fields[key]
+
+    def __contains__(self, key) -> bool:
+        return key == 'text' or key in self._fields
+
+    def __iter__(self) -> Iterator[str]:
+        yield 'text'
+        yield from self._fields
+
+    def __len__(self) -> int:
+        return len(self._fields) + 1
+
+    def __repr__(self) -> str:
+        return f"LazyNode({self._fields!r}, text=<{self._span[1]} bytes>)"
+
+
+class StoryPack(Mapping):
+    """Nodos de un ``.pack``: ``node_id -> LazyNode``, en el orden del JSON original."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            # El mapa mantiene su propia referencia al fichero; se cierra con el objeto.
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_length = _HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a story pack")
+        index_end = _HEADER.size + index_length
+        index = json.loads(self._buffer[_HEADER.size:index_end].decode('utf-8'))
+
+        self._nodes: Dict[str, LazyNode] = {}
+        for node_id, fields in index.items():
+            start, length = fields.pop('text')
+            self._nodes[node_id] = LazyNode(fields, self._buffer, (index_end + start, length))
+
+    def __getitem__(self, node_id: str) -> LazyNode:
+        return self._nodes[node_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    @property
+    def text_bytes(self) -> int:
+        """Tamaño del bloque de textos (lo que no se carga en memoria)."""
+        return sum(node._span[1] for node in self._nodes.values())
+
+
+def write_story_pack(data: Mapping, path) -> Path:
+    """
+    Escribe ``data`` (nodos como en ``story.json``) en formato ``.pack``.
+
+    Se escribe en un temporal y se renombra: los procesos que tengan mapeada
+    la versión anterior la siguen leyendo sin errores.
+    """
+    path = Path(path)
+    index: Dict[str, Dict] = {}
+    texts = bytearray()
+    for node_id, node_data in data.items():
+        if 'text' not in node_data:
+            raise ValueError(f"Node {node_id} missing required 'text' field")
+        fields = {key: value for key, value in node_data.items() if key != 'text'}
+        encoded = node_data['text'].encode('utf-8')
+        fields['text'] = [len(texts), len(encoded)]
+        texts += encoded
+        index[node_id] = fields
+
+    encoded_index = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, len(encoded_index)))
+        f.write(encoded_index)
+        f.write(texts)
+    os.replace(tmp_path, path)
+    return path
+
+
+def convert_json(source, destination) -> Path:
+    """Convierte un ``story.json`` en ``.pack``."""
+    with open(source, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return write_story_pack(data, destination)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convierte un story.json al formato .pack con mmap.")
+    parser.add_argument("source", help="Fichero JSON de historia")
+    parser.add_argument("destination", help="Fichero .pack a generar")
+    args = parser.parse_args(argv)
+
+    destination = convert_json(args.source, args.destination)
+    pack = StoryPack(destination)
+    print(f"{len(pack)} nodos, {pack.text_bytes} bytes de texto -> {destination} "
+          f"({destination.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
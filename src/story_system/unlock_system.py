@@ -1,5 +1,7 @@
 import logging
+from typing import Optional
 from src.services import user_service
+from src.services.fragment_service import FragmentService
 from src.models.user import User
 
 logger = logging.getLogger(__name__)
@@ -7,9 +9,18 @@ logger = logging.getLogger(__name__)
 class UnlockSystem:
     """
     Manages the unlocking of narrative content and the costs of choices.
+
+    Once configured with a FragmentService, unlocks and membership checks go
+    through ``user_unlocked_fragments`` instead of the user's fragment list.
     """
 
-    def check_unlock(self, user_id: int, fragment_id: str) -> bool:
+    def __init__(self, fragments: Optional[FragmentService] = None):
+        self.fragments = fragments
+
+    def configure(self, fragments: FragmentService):
+        self.fragments = fragments
+
+    async def check_unlock(self, user_id: int, fragment_id: str) -> bool:
         """
         Checks if a user has unlocked a specific narrative fragment.
 
@@ -20,15 +31,28 @@ class UnlockSystem:
         Returns:
             True if the user has unlocked the fragment, False otherwise.
         """
-        user = user_service.get_user(user_id)
-        if not user:
-            logger.warning(f"Attempted to check fragment {fragment_id} for non-existent user {user_id}")
-            return False
-        
-        is_unlocked = fragment_id in user.unlocked_fragments
+        if self.fragments is not None:
+            is_unlocked = await self.fragments.has_unlocked(user_id, fragment_id)
+        else:
+            user = user_service.get_user(user_id)
+            if not user:
+                logger.warning(f"Attempted to check fragment {fragment_id} for non-existent user {user_id}")
+                return False
+            is_unlocked = fragment_id in user.unlocked_fragments
         logger.info(f"User {user_id} check for fragment '{fragment_id}': {'Unlocked' if is_unlocked else 'Locked'}")
         return is_unlocked
 
+    async def unlock(self, user_id: int, fragment_id: str) -> bool:
+        """
+        Unlocks a narrative fragment for a user.
+
+        Returns:
+            True if the fragment was newly unlocked, False if the user already had it.
+        """
+        if self.fragments is None:
+            raise RuntimeError("UnlockSystem.unlock requires a FragmentService; call configure() first.")
+        return bool(await self.fragments.unlock(user_id, [fragment_id]))
+
     def apply_cost(self, user_id: int, choice_cost: int = 1) -> bool:
         """
         Applies the cost of a premium choice to a user.
@@ -90,11 +90,7 @@ class StoryHandler:
                 return
             
             # Find the matching choice
-            selected_choice = None
-            for choice in current_node.get('choices', []):
-                if choice['text'] == user_choice:
-                    selected_choice = choice
-                    break
+            selected_choice = self.story_service.get_choice_by_text(current_node_id, user_choice)
             
             if not selected_choice:
                 # Invalid choice, show current node again
@@ -1,15 +1,96 @@
 # src/telegram_bot/middleware.py
-from typing import Callable, Dict, Any, Awaitable
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Any, Awaitable, Optional
 
 from aiogram import BaseMiddleware
-from aiogram.types import Message, CallbackQuery
-from sqlalchemy.ext.asyncio import AsyncSession
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import Message, CallbackQuery, MessageReactionUpdated
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from src.core.metrics import HANDLER_SECONDS, RATE_LIMITED_TOTAL, TELEGRAM_REQUEST_SECONDS
 from src.database.connection import AsyncSessionLocal
+from src.security.rate_limiter import RateLimiter
+
+# Contadores de la actualización en curso; los lee el listener del engine.
+_current_db_stats: ContextVar[Optional["UpdateDbStats"]] = ContextVar("current_db_stats", default=None)
+_instrumented_engines: set = set()
+
+class UpdateDbStats:
+    """Contadores de base de datos de una única actualización de Telegram."""
+    __slots__ = ("sessions_opened", "statements", "writes", "committed")
 
-class DbSessionMiddleware(BaseMiddleware):
     def __init__(self):
+        self.sessions_opened = 0
+        self.statements = 0
+        self.writes = 0
+        self.committed = False
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_db_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        if not statement.lstrip()[:6].upper().startswith(("SELECT", "PRAGMA")):
+            stats.writes += 1
+
+def _instrument_engine(session_factory: async_sessionmaker):
+    bind = session_factory.kw.get("bind")
+    sync_engine = getattr(bind, "sync_engine", None)
+    if sync_engine is None or id(sync_engine) in _instrumented_engines:
+        return
+    event.listen(sync_engine, "before_cursor_execute", _count_statement)
+    _instrumented_engines.add(id(sync_engine))
+
+class LazySession:
+    """
+    Proxy de AsyncSession que sólo crea la sesión (y hace checkout de una
+    conexión del pool) la primera vez que un handler la usa.
+    """
+    def __init__(self, session_factory: async_sessionmaker, stats: UpdateDbStats):
+        self._session_factory = session_factory
+        self._stats = stats
+        self._session: Optional[AsyncSession] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None
+
+    def _get_session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._session_factory()
+            self._stats.sessions_opened += 1
+        return self._session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get_session(), name)
+
+    def has_pending_writes(self) -> bool:
+        """True si se ejecutó alguna escritura o quedan objetos sin flush."""
+        session = self._session
+        if session is None:
+            return False
+        return bool(self._stats.writes or session.new or session.dirty or session.deleted)
+
+class DbSessionMiddleware(BaseMiddleware):
+    """
+    Inyecta ``data["session"]`` como una sesión perezosa.
+
+    Los handlers que no tocan la base de datos no abren sesión, y el commit se
+    omite cuando no hubo escrituras. Los contadores de cada actualización se
+    exponen en ``data["db_stats"]`` y los acumulados en ``self.totals``.
+    """
+    def __init__(self, session_factory: Optional[async_sessionmaker] = None):
         super().__init__()
+        self.session_factory = session_factory or AsyncSessionLocal
+        _instrument_engine(self.session_factory)
+        self.totals: Dict[str, int] = {
+            "updates": 0,
+            "sessions_opened": 0,
+            "statements": 0,
+            "commits": 0,
+            "commits_skipped": 0,
+        }
 
     async def __call__(
         self,
@@ -17,12 +98,117 @@ class DbSessionMiddleware(BaseMiddleware):
         event: Message | CallbackQuery,
         data: Dict[str, Any],
     ) -> Any:
-        async with AsyncSessionLocal() as session:
-            data["session"] = session
-            try:
-                response = await handler(event, data)
-                await session.commit()
-                return response
-            except Exception as e:
+        stats = UpdateDbStats()
+        session = LazySession(self.session_factory, stats)
+        data["session"] = session
+        data["db_stats"] = stats
+        token = _current_db_stats.set(stats)
+        try:
+            response = await handler(event, data)
+            if session.is_open:
+                if session.has_pending_writes():
+                    await session.commit()
+                    stats.committed = True
+            return response
+        except Exception as e:
+            if session.is_open:
                 await session.rollback()
-                raise e
+            raise e
+        finally:
+            if session.is_open:
+                await session.close()
+            _current_db_stats.reset(token)
+            self._accumulate(stats)
+
+    def _accumulate(self, stats: UpdateDbStats):
+        self.totals["updates"] += 1
+        self.totals["sessions_opened"] += stats.sessions_opened
+        self.totals["statements"] += stats.statements
+        if stats.committed:
+            self.totals["commits"] += 1
+        elif stats.sessions_opened:
+            self.totals["commits_skipped"] += 1
+
+class RateLimitMiddleware(BaseMiddleware):
+    """
+    Descarta las actualizaciones de usuarios que superan su límite de frecuencia.
+
+    Se registra como middleware externo (``dp.message.outer_middleware``), que
+    corre antes de resolver el handler y, por tanto, antes de que
+    DbSessionMiddleware abra una sesión: un flood no toca la base de datos.
+    A los callbacks descartados se les responde para cerrar el reloj del botón.
+    """
+    def __init__(self, limiter: RateLimiter, rejected_text: str = "Vas demasiado rápido. Espera un momento."):
+        super().__init__()
+        self.limiter = limiter
+        self.rejected_text = rejected_text
+
+    @staticmethod
+    def _classify(event: Any) -> tuple[Optional[str], Optional[int]]:
+        if isinstance(event, Message):
+            user = event.from_user
+            return "message", user.id if user else None
+        if isinstance(event, CallbackQuery):
+            return "callback", event.from_user.id
+        if isinstance(event, MessageReactionUpdated):
+            user = event.user
+            return "reaction", user.id if user else None
+        return None, None
+
+    async def __call__(
+        self,
+        handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
+        event: Message | CallbackQuery | MessageReactionUpdated,
+        data: Dict[str, Any],
+    ) -> Any:
+        action, user_id = self._classify(event)
+        if user_id is None or self.limiter.allow(action, user_id):
+            return await handler(event, data)
+        RATE_LIMITED_TOTAL.labels(action).inc()
+        if isinstance(event, CallbackQuery):
+            try:
+                await event.answer(self.rejected_text)
+            except Exception:
+                pass  # el callback puede haber caducado; no es motivo para fallar
+        return None
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Mide la latencia de cada handler, etiquetada por router, handler y resultado.
+
+    Se registra como middleware interno (``dp.message.middleware``) antes que
+    DbSessionMiddleware, para que el handler ya esté resuelto en ``data`` y la
+    medida incluya el commit.
+    """
+    async def __call__(
+        self,
+        handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
+        event: Message | CallbackQuery,
+        data: Dict[str, Any],
+    ) -> Any:
+        router = getattr(data.get("event_router"), "name", "-")
+        handler_object = data.get("handler")
+        callback = getattr(handler_object, "callback", None)
+        handler_name = getattr(callback, "__name__", "-")
+        outcome = "ok"
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            HANDLER_SECONDS.labels(router, handler_name, outcome).observe(time.perf_counter() - start)
+
+class TelegramRequestMetrics(BaseRequestMiddleware):
+    """Mide las llamadas salientes a la Bot API (``bot.session.middleware(...)``)."""
+    async def __call__(self, make_request, bot, method):
+        outcome = "ok"
+        start = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            TELEGRAM_REQUEST_SECONDS.labels(type(method).__name__, outcome).observe(time.perf_counter() - start)
@@ -1,5 +1,7 @@
+import os
 import pytest
 import json
+from contextlib import asynccontextmanager
 from unittest.mock import AsyncMock, MagicMock
 from datetime import datetime
 
@@ -10,7 +12,13 @@ from src.database.user_mission_repository import UserMissionRepository
 from src.services.reward_service import RewardService
 from src.models.user_mission_progress import UserMissionProgress
 from src.models.user import User # Assuming a User model exists for mock_user
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.core.config import Settings
+from src.database.connection import create_engine_from_settings
+from src.database.models import Base
 
 @pytest.fixture
 async def mock_async_session():
@@ -60,10 +68,17 @@ def mock_repo():
     async def _get_user_missions(user_id: int):
         return list(_in_memory_db.get(user_id, {}).values())
 
+    async def _get_missions_for_users(user_ids):
+        return {user_id: list(_in_memory_db.get(user_id, {}).values()) for user_id in user_ids}
+
     async def _get_mission_progress(user_id: int, mission_id: str):
         return _in_memory_db.get(user_id, {}).get(mission_id)
 
-    async def _start_mission(user_id: int, mission_id: str):
+    @asynccontextmanager
+    async def _unit_of_work():
+        yield repo
+
+    async def _start_mission(user_id: int, mission_id: str, mission_progress=None):
         if user_id not in _in_memory_db:
             _in_memory_db[user_id] = {}
         
@@ -84,7 +99,7 @@ def mock_repo():
         _in_memory_db[user_id][mission_id] = progress
         return progress
 
-    async def _update_progress(user_id: int, mission_id: str, progress_value: float):
+    async def _update_progress(user_id: int, mission_id: str, progress_value: float, mission_progress=None):
         progress = _in_memory_db.get(user_id, {}).get(mission_id)
         if not progress:
             raise ValueError(f"Mission {mission_id} not found for user {user_id}.")
@@ -93,7 +108,7 @@ def mock_repo():
         progress.progress = progress_value
         return progress
 
-    async def _complete_mission(user_id: int, mission_id: str):
+    async def _complete_mission(user_id: int, mission_id: str, mission_progress=None):
         progress = _in_memory_db.get(user_id, {}).get(mission_id)
         if not progress:
             raise ValueError(f"Mission {mission_id} not found for user {user_id}.")
@@ -104,7 +119,9 @@ def mock_repo():
         progress.completed_at = datetime.now()
         return progress
 
+    repo.unit_of_work = _unit_of_work
     repo.get_user_missions.side_effect = _get_user_missions
+    repo.get_missions_for_users.side_effect = _get_missions_for_users
     repo.get_mission_progress.side_effect = _get_mission_progress
     repo.start_mission.side_effect = _start_mission
     repo.update_progress.side_effect = _update_progress
@@ -157,3 +174,39 @@ def mission_service(mock_async_session, mission_catalog_service, mock_repo, mock
         session=mock_async_session,
         mission_catalog=mission_catalog_service
     )
+
+@pytest.fixture
+def db_metadata():
+    """
+    Tables created by ``session_factory``. Override it in a module whose
+    models live on another declarative base.
+    """
+    return Base.metadata
+
+@pytest.fixture
+def db_seed():
+    """
+    Rows inserted by ``session_factory`` before the test. Each module
+    overrides it with its own data.
+    """
+    return []
+
+@pytest.fixture
+async def session_factory(tmp_path, db_metadata, db_seed):
+    """
+    An ``async_sessionmaker`` over a fresh SQLite file with ``db_metadata``
+    created and ``db_seed`` committed.
+
+    The database is a file, so background tasks and the test can use separate
+    connections, and the engine is built like the bot's, PRAGMAs included.
+    """
+    engine = create_engine_from_settings(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", Settings())
+    async with engine.begin() as conn:
+        await conn.run_sync(db_metadata.create_all)
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    if db_seed:
+        async with factory() as session:
+            session.add_all(db_seed)
+            await session.commit()
+    yield factory
+    await engine.dispose()
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import select
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.core.event_bus import EventBus
+from src.database.models import Achievement, Mission, PointTransaction, User, UserAchievement, UserMission
+from src.database.repository import AchievementRepository
+from src.services.achievement_rules import AchievementEngine
+from src.services.achievements_service import AchievementsService
+
+T0 = datetime(2026, 5, 1, 12, 0)
+
+@pytest.fixture
+def db_seed():
+    return [
+        *[User(id=i, username=f"u{i}") for i in range(1, 4)],
+        Achievement(id=7, name="mission_master", description="old description"),
+        *[Mission(id=m, name=f"m{m}", description="", reward_points=1) for m in range(1, 12)],
+        # user 1: 11 misiones; user 2: 9
+        *[UserMission(user_id=1, mission_id=m, completed_at=T0 + timedelta(minutes=m)) for m in range(1, 12)],
+        *[UserMission(user_id=2, mission_id=m, completed_at=T0 + timedelta(minutes=m)) for m in range(1, 10)],
+        PointTransaction(user_id=2, points=5, reason="channel_reaction", created_at=T0),
+        PointTransaction(user_id=3, points=5, reason="daily_gift", created_at=T0),
+    ]
+
+async def _stored(factory):
+    async with factory() as session:
+        rows = await session.execute(
+            select(UserAchievement.user_id, Achievement.name)
+            .join(Achievement, Achievement.id == UserAchievement.achievement_id)
+            .order_by(UserAchievement.user_id, Achievement.name)
+        )
+    return [tuple(row) for row in rows.all()]
+
+def test_engine_only_evaluates_rules_of_the_event():
+    engine = AchievementEngine([
+        {"id": 1, "name": "big_spender", "event": "points_changed", "where": {"delta": {"<=": -100}}},
+        {"id": 2, "name": "regular", "event": "daily_gift", "count": 3},
+        {"id": 3, "name": "vip", "event": "points_changed", "where": {"reason": {"in": ["vip", "promo"]}}},
+    ])
+    counters = {}
+    assert engine.evaluate("daily_gift", {}, 0, counters, user_id=1) == []
+    assert engine.evaluate("daily_gift", {}, 0, counters, user_id=1) == []
+    assert [r.achievement.name for r in engine.evaluate("daily_gift", {}, 0, counters, user_id=1)] == ["regular"]
+    assert counters == {}
+
+    matched = engine.evaluate("points_changed", {"delta": -150, "reason": "promo"}, 0, counters, user_id=1)
+    assert [r.achievement.name for r in matched] == ["big_spender", "vip"]
+    unlocked = engine.by_name["big_spender"].mask
+    assert engine.evaluate("points_changed", {"delta": -150}, unlocked, counters, user_id=1) == []
+    assert engine.evaluate("points_changed", {"reason": "vip"}, 0, counters, 1, only=unlocked) == []
+    assert [a.name for a in engine.achievements_in(unlocked)] == ["big_spender"]
+
+    with pytest.raises(ValueError):
+        AchievementEngine([{"id": 1, "name": "x", "event": "e"}, {"id": 2, "name": "x", "event": "e"}])
+
+@pytest.mark.asyncio
+async def test_bus_events_unlock_and_persist_in_batches(session_factory):
+    bus = EventBus()
+    announced = []
+
+    async def on_unlocked(user_id, achievement_name, **kwargs):
+        announced.append((user_id, achievement_name))
+
+    bus.subscribe("achievement_unlocked", on_unlocked)
+    service = AchievementsService(event_bus=bus, session_factory=session_factory, flush_interval=60)
+    await service.start()
+    try:
+        await bus.publish("level_up", user_id=1, old_level="Experto", new_level="Maestro")
+        await bus.publish("level_up", user_id=2, old_level="Novato", new_level="Aprendiz")
+        await bus.publish("level_up", user_id=1, old_level="Experto", new_level="Maestro")
+        assert announced == [(1, "level_maestro")]
+        assert service.has_achievement(1, "level_maestro")
+        # mission_master viene del historial al arrancar; level_maestro aún está en el buffer
+        assert await _stored(session_factory) == [(1, "mission_master")]
+    finally:
+        await service.stop()
+
+    assert await _stored(session_factory) == [(1, "level_maestro"), (1, "mission_master")]
+    assert service.get_stats()["persisted"] == 2
+
+    # Un servicio nuevo recupera el bitset desde user_achievements
+    reloaded = AchievementsService(session_factory=session_factory)
+    await reloaded.start()
+    await reloaded.stop()
+    assert [a.name for a in reloaded.get_unlocked_for_user(1)] == ["level_maestro", "mission_master"]
+    assert reloaded.count_unlocked() == 2
+
+@pytest.mark.asyncio
+async def test_backfill_replays_history(session_factory):
+    service = AchievementsService(session_factory=session_factory)
+    unlocked = await service.backfill(["mission_master", "community_contributor"], batch_size=4)
+    assert unlocked == {"mission_master": 1, "community_contributor": 1}
+    assert await _stored(session_factory) == [(1, "mission_master"), (2, "community_contributor")]
+
+    async with session_factory() as session:
+        achievement = await session.get(Achievement, 7)
+    assert achievement.description == "Complete 10 missions"  # definición sincronizada por nombre
+
+    # Idempotente: los ya desbloqueados no se vuelven a contar
+    assert await AchievementsService(session_factory=session_factory).backfill(["mission_master"]) == {"mission_master": 0}
+
+@pytest.mark.asyncio
+async def test_cancelled_flush_requeues_the_batch(session_factory, monkeypatch):
+    service = AchievementsService(session_factory=session_factory)
+    await service.start()
+    await service.unlock_achievement(1, "first_login")
+
+    async def hang(self, rows):
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(AchievementRepository, "add_many", hang)
+    flushing = asyncio.create_task(service.flush())
+    await asyncio.sleep(0.05)
+    flushing.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flushing
+    assert service.get_stats()["pending"] == 1
+
+    monkeypatch.undo()
+    await service.stop()
+    assert await _stored(session_factory) == [(1, "first_login"), (1, "mission_master")]
+
+@pytest.mark.asyncio
+async def test_count_progress_survives_a_restart(session_factory):
+    service = AchievementsService(session_factory=session_factory)
+    await service.start()
+    await service.stop()
+    # user 1 ya tenía 11 misiones en el historial: se desbloquea al arrancar
+    assert service.has_achievement(1, "mission_master")
+
+    restarted = AchievementsService(session_factory=session_factory)
+    await restarted.start()
+    try:
+        assert not restarted.has_achievement(2, "mission_master")  # 9 de 10
+        assert await restarted.process_event("mission_completed", 2, mission_id=99) != []
+    finally:
+        await restarted.stop()
+    assert (2, "mission_master") in await _stored(session_factory)
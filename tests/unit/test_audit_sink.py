@@ -0,0 +1,123 @@
+import asyncio
+import json
+import sqlite3
+import time
+import pytest
+
+from src.core.audit_sink import AuditSink, JsonlAuditWriter, SqliteAuditWriter
+from src.core.integration_hub import EventLogger, IntegrationHub
+
+
+@pytest.mark.asyncio
+async def test_jsonl_sink_writes_batches_from_background_task(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    sink = AuditSink(JsonlAuditWriter(str(path)), flush_interval=10, batch_size=3)
+    sink.start()
+
+    for i in range(3):
+        sink.submit("POINTS_AWARDED", {"user_id": i})
+    await asyncio.sleep(0.1)  # batch_size reached: flushed without waiting for the interval
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["metadata"]["user_id"] for line in lines] == [0, 1, 2]
+
+    sink.submit("VIP_STATUS_GRANTED", {"user_id": 9})
+    await sink.stop()
+    assert len(path.read_text().splitlines()) == 4
+    assert sink.get_stats()["written"] == 4
+
+
+@pytest.mark.asyncio
+async def test_sink_counts_overflow_when_buffer_is_full(tmp_path):
+    sink = AuditSink(JsonlAuditWriter(str(tmp_path / "audit.jsonl")), batch_size=100, max_buffer=2)
+
+    assert sink.submit("a", {})
+    assert sink.submit("b", {})
+    assert not sink.submit("c", {})
+
+    stats = sink.get_stats()
+    assert stats["dropped"] == 1
+    assert stats["overflows"] == 1
+    assert stats["buffered"] == 2
+
+
+def test_jsonl_writer_rotates_by_size(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    writer = JsonlAuditWriter(str(path), max_bytes=200, backup_count=2)
+    for i in range(10):
+        writer.write_batch([(0.0, "event", {"i": i, "padding": "x" * 50})])
+
+    assert path.exists()
+    assert (tmp_path / "audit.jsonl.1").exists()
+    assert (tmp_path / "audit.jsonl.2").exists()
+    assert not (tmp_path / "audit.jsonl.3").exists()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_sink_and_async_routing(tmp_path):
+    path = tmp_path / "audit.db"
+    sink = AuditSink(SqliteAuditWriter(str(path)))
+    hub = IntegrationHub(EventLogger(sink=sink))
+    received = []
+
+    async def async_handler(data):
+        received.append(("async", data["user_id"]))
+
+    def sync_handler(data):
+        received.append(("sync", data["user_id"]))
+
+    hub.register_handler("ACHIEVEMENT_UNLOCKED", async_handler)
+    hub.register_handler("ACHIEVEMENT_UNLOCKED", sync_handler)
+    await hub.route_event_async("ACHIEVEMENT_UNLOCKED", {"user_id": 7})
+    await sink.stop()
+
+    assert received == [("async", 7), ("sync", 7)]
+    rows = sqlite3.connect(path).execute("SELECT event, metadata FROM audit_events").fetchall()
+    assert rows == [("ACHIEVEMENT_UNLOCKED", json.dumps({"user_id": 7}))]
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_the_batch_being_written(tmp_path):
+    class SlowWriter:
+        def __init__(self):
+            self.active = 0
+            self.overlaps = 0
+            self.rows = 0
+            self.closed_while_writing = False
+
+        def write_batch(self, records):
+            self.active += 1
+            self.overlaps += self.active > 1
+            time.sleep(0.1)
+            self.rows += len(records)
+            self.active -= 1
+
+        def close(self):
+            self.closed_while_writing = self.active > 0
+
+    writer = SlowWriter()
+    sink = AuditSink(writer, flush_interval=10, batch_size=2)
+    sink.start()
+    for i in range(3):
+        sink.submit("event", {"i": i})
+    await asyncio.sleep(0.02)  # la tarea ya está dentro de to_thread
+    await sink.stop()
+
+    assert writer.rows == 3
+    assert writer.overlaps == 0
+    assert not writer.closed_while_writing
+    assert sink.get_stats()["written"] == 3
+
+
+def test_from_settings_rejects_unknown_backends(tmp_path):
+    from types import SimpleNamespace
+
+    settings = SimpleNamespace(
+        AUDIT_SINK_PATH=str(tmp_path / "audit.db"), AUDIT_SINK_BACKEND="sqlite3",
+        AUDIT_FLUSH_INTERVAL=1.0, AUDIT_BATCH_SIZE=500, AUDIT_MAX_BUFFER=10000,
+        AUDIT_MAX_BYTES=1024, AUDIT_BACKUP_COUNT=1,
+    )
+    with pytest.raises(ValueError):
+        AuditSink.from_settings(settings)
+    settings.AUDIT_SINK_PATH = None
+    assert AuditSink.from_settings(settings) is None
@@ -0,0 +1,84 @@
+import json
+import os
+import pytest
+
+from src.core.content_registry import ContentRegistry
+from src.core.event_bus import EventBus
+from src.data.mission_catalog import MissionCatalog
+from src.services.story_service import StoryService
+
+STORY = {
+    "start": {"text": "Inicio", "choices": [{"id": "go", "text": "Seguir", "next_scene": "end"}]},
+    "end": {"text": "Fin", "choices": []},
+}
+
+def write_json(path, data, bump_mtime=True):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    if bump_mtime:  # mtime resolution may be coarser than the test
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+@pytest.fixture(name="bus")
+def create_bus():
+    bus = EventBus()
+    bus.reloaded = []
+
+    async def on_reload(kind, path, version):
+        bus.reloaded.append((kind, version))
+
+    bus.subscribe("content_reloaded", on_reload)
+    return bus
+
+@pytest.fixture(name="story_file")
+def create_story_file(tmp_path):
+    path = tmp_path / "story.json"
+    write_json(path, STORY, bump_mtime=False)
+    return path
+
+def test_instances_share_one_load(story_file, tmp_path):
+    registry = ContentRegistry()
+    loads = []
+
+    def loader(path):
+        loads.append(path)
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    first = registry.register("story", story_file, loader)
+    second = registry.register("story", tmp_path / "." / "story.json", loader)
+    assert first is second
+    assert len(loads) == 1
+
+    services = [StoryService(str(story_file), registry=registry) for _ in range(3)]
+    assert services[0].story is services[2].story
+
+@pytest.mark.asyncio
+async def test_changed_file_is_swapped_and_announced(story_file, bus):
+    registry = ContentRegistry(event_bus=bus)
+    service = StoryService(str(story_file), registry=registry)
+    snapshot = service.story
+
+    assert await registry.reload_changed() == []
+    write_json(story_file, {**STORY, "end": {"text": "Otro final", "choices": []}})
+    await registry.reload_changed()
+
+    assert service.story.get_node("end")["text"] == "Otro final"
+    assert snapshot.get_node("end")["text"] == "Fin"  # in-flight readers keep their version
+    assert bus.reloaded == [("story", 2)]
+
+@pytest.mark.asyncio
+async def test_invalid_reload_keeps_previous_version(story_file, tmp_path, bus):
+    registry = ContentRegistry(event_bus=bus)
+    service = StoryService(str(story_file), registry=registry)
+    missions_file = tmp_path / "missions.json"
+    mission = {"id": "m1", "title": "T", "description": "D", "reward": 1, "time_limit": 60, "category": "c"}
+    write_json(missions_file, [mission], bump_mtime=False)
+    catalog = MissionCatalog(missions_file, registry=registry)
+
+    write_json(story_file, {**STORY, "start": {"text": "Inicio", "choices": [{"id": "go", "next_scene": "void"}]}})
+    write_json(missions_file, [mission, {**mission, "id": "m2"}])
+    await registry.reload_changed()
+
+    assert service.story.get_choice("start", "go")["next_scene"] == "end"
+    assert catalog.get_mission_by_id("m2") is not None
+    assert bus.reloaded == [("missions", 2)]
+    assert registry.get_stats()["failures"] == 1
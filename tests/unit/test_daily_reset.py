@@ -0,0 +1,98 @@
+import os
+import pytest
+from datetime import datetime
+from sqlalchemy import func, select
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.core.config import Settings
+from src.database.database_setup import Base
+from src.database.user_mission_repository import UserMissionRepository
+from src.models.daily_reset_checkpoint import DailyResetCheckpoint
+from src.models.user_mission_progress import UserMissionProgress
+from src.services.daily_reset import DailyReset
+
+NOW = datetime(2026, 5, 10, 0, 0, 5)
+YESTERDAY = datetime(2026, 5, 9, 18, 0)
+
+@pytest.fixture
+def db_metadata():
+    return Base.metadata
+
+@pytest.fixture
+def db_seed():
+    rows = []
+    for user_id in range(1, 501):
+        telegram_id = user_id * 1_000_003  # sparse ids, like Telegram's
+        rows += [
+            UserMissionProgress(user_id=telegram_id, mission_id="d1", status="completed", started_at=YESTERDAY),
+            UserMissionProgress(user_id=telegram_id, mission_id="d2", status="in_progress", started_at=YESTERDAY),
+            UserMissionProgress(user_id=telegram_id, mission_id="story", status="completed", started_at=YESTERDAY),
+        ]
+    # Started after midnight, while the job runs: must survive.
+    rows.append(UserMissionProgress(user_id=7, mission_id="d1", status="in_progress", started_at=NOW))
+    return rows
+
+async def count_rows(factory, mission_id):
+    async with factory() as session:
+        return await session.scalar(
+            select(func.count()).select_from(UserMissionProgress).where(UserMissionProgress.mission_id == mission_id))
+
+@pytest.mark.asyncio
+async def test_reset_runs_in_chunks_once_per_day(session_factory):
+    reset = DailyReset(session_factory, ["d1", "d2"], chunk_rows=300, pause_seconds=0)
+    stats = await reset.reset_daily_missions(NOW)
+
+    assert stats["rows"] == 1000
+    assert stats["chunks"] == 4  # 1001 candidate rows, 300 per chunk
+    assert await count_rows(session_factory, "d1") == 1
+    assert await count_rows(session_factory, "d2") == 0
+    assert await count_rows(session_factory, "story") == 500
+
+    again = await reset.reset_daily_missions(NOW.replace(hour=3))
+    assert again["chunks"] == 0
+
+@pytest.mark.asyncio
+async def test_reset_resumes_after_a_crash(session_factory, monkeypatch):
+    reset = DailyReset(session_factory, ["d1", "d2"], chunk_rows=300, pause_seconds=0)
+    original = UserMissionRepository.reset_missions_in_range
+    calls = []
+
+    async def crash_on_third_chunk(self, *args):
+        calls.append(args)
+        if len(calls) == 3:
+            raise RuntimeError("process killed")
+        return await original(self, *args)
+
+    monkeypatch.setattr(UserMissionRepository, "reset_missions_in_range", crash_on_third_chunk)
+    with pytest.raises(RuntimeError):
+        await reset.reset_daily_missions(NOW)
+    async with session_factory() as session:
+        checkpoint = await session.get(DailyResetCheckpoint, DailyReset.JOB)
+        assert checkpoint.rows == 600 and checkpoint.finished_at is None
+
+    monkeypatch.setattr(UserMissionRepository, "reset_missions_in_range", original)
+    stats = await reset.reset_daily_missions(NOW)
+    assert stats["resumed"]
+    assert stats["rows"] == 400
+    assert await count_rows(session_factory, "d2") == 0
+
+@pytest.mark.asyncio
+async def test_mission_ids_are_resolved_from_the_catalog_on_each_run(session_factory, caplog):
+    class Catalog:
+        missions = []
+
+        def get_missions_by_category(self, category):
+            return [m for m in self.missions if m["category"] == category]
+
+    catalog = Catalog()
+    reset = DailyReset.from_settings(Settings(DAILY_MISSION_CATEGORY="diaria", DAILY_RESET_PAUSE_MS=0),
+                                     session_factory, catalog)
+    stats = await reset.reset_daily_missions(NOW)
+    assert stats["chunks"] == 0
+    assert "no hay misiones que reiniciar" in caplog.text
+
+    catalog.missions = [{"id": "d2", "category": "diaria"}]  # recarga en caliente
+    await reset.reset_daily_missions(NOW)
+    assert await count_rows(session_factory, "d2") == 0
+    assert await count_rows(session_factory, "d1") == 501
@@ -0,0 +1,59 @@
+import os
+import pytest
+from sqlalchemy import select
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.database.models import User
+from src.telegram_bot.middleware import DbSessionMiddleware
+
+@pytest.fixture(name="session_factory")
+def no_autoflush_session_factory(session_factory):
+    # Como AsyncSessionLocal: sin autoflush
+    session_factory.configure(autoflush=False)
+    return session_factory
+
+@pytest.mark.asyncio
+async def test_ui_only_handler_never_opens_a_session(session_factory):
+    middleware = DbSessionMiddleware(session_factory)
+
+    async def main_menu_handler(event, data):
+        return "menu"
+
+    data = {}
+    assert await middleware(main_menu_handler, object(), data) == "menu"
+
+    assert data["db_stats"].sessions_opened == 0
+    assert middleware.totals["sessions_opened"] == 0
+    assert middleware.totals["commits"] == 0
+
+@pytest.mark.asyncio
+async def test_read_only_handler_skips_commit(session_factory):
+    middleware = DbSessionMiddleware(session_factory)
+
+    async def profile_handler(event, data):
+        result = await data["session"].execute(select(User).filter_by(id=1))
+        return result.scalar_one_or_none()
+
+    data = {}
+    assert await middleware(profile_handler, object(), data) is None
+
+    stats = data["db_stats"]
+    assert stats.sessions_opened == 1
+    assert stats.statements == 1
+    assert stats.committed is False
+    assert middleware.totals["commits_skipped"] == 1
+
+@pytest.mark.asyncio
+async def test_writing_handler_is_committed(session_factory):
+    middleware = DbSessionMiddleware(session_factory)
+
+    async def start_handler(event, data):
+        data["session"].add(User(id=5, username="nuevo"))
+
+    data = {}
+    await middleware(start_handler, object(), data)
+    assert data["db_stats"].committed is True
+
+    async with session_factory() as session:
+        assert await session.get(User, 5) is not None
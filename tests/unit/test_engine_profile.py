@@ -0,0 +1,39 @@
+import os
+import pytest
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.core.config import Settings
+from src.database.connection import build_engine_options, check_engine_profile, create_engine_from_settings
+
+
+def test_engine_options_for_asyncpg_include_pool_and_statement_cache():
+    config = Settings(DB_POOL_SIZE=15, DB_MAX_OVERFLOW=5, DB_STATEMENT_CACHE_SIZE=250)
+    options = build_engine_options("postgresql+asyncpg://bot:secret@db/bot", config)
+
+    assert options["echo"] is False
+    assert options["pool_size"] == 15
+    assert options["max_overflow"] == 5
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == {"prepared_statement_cache_size": 250}
+
+
+def test_engine_options_for_memory_sqlite_skip_pool_sizing():
+    options = build_engine_options("sqlite+aiosqlite:///:memory:", Settings())
+    assert "pool_size" not in options
+    assert "connect_args" not in options
+
+
+@pytest.mark.asyncio
+async def test_file_sqlite_engine_applies_pragmas(tmp_path):
+    config = Settings(SQLITE_BUSY_TIMEOUT_MS=1234)
+    engine = create_engine_from_settings(f"sqlite+aiosqlite:///{tmp_path / 'bot.db'}", config)
+    try:
+        profile = await check_engine_profile(engine)
+    finally:
+        await engine.dispose()
+
+    assert profile["journal_mode"] == "wal"
+    assert profile["synchronous"] == 1  # NORMAL
+    assert profile["busy_timeout"] == 1234
+    assert profile["echo"] is False
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+
+from src.core.event_bus import EventBus
+
+
+@pytest.mark.asyncio
+async def test_sequential_publish_awaits_listeners_in_order():
+    bus = EventBus()
+    calls = []
+
+    async def first(value):
+        calls.append(("first", value))
+
+    async def second(value):
+        calls.append(("second", value))
+
+    bus.subscribe("points_earned", first)
+    bus.subscribe("points_earned", second)
+    await bus.publish("points_earned", 5)
+
+    assert calls == [("first", 5), ("second", 5)]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_publish_does_not_wait_for_slow_listener():
+    bus = EventBus(concurrent=True, workers=2, listener_timeout=1.0)
+    release = asyncio.Event()
+    fast_done = asyncio.Event()
+
+    async def slow(user_id):
+        await release.wait()
+
+    async def fast(user_id):
+        fast_done.set()
+
+    bus.subscribe("mission_completed", slow)
+    bus.subscribe("mission_completed", fast)
+
+    await asyncio.wait_for(bus.publish("mission_completed", 1), timeout=0.5)
+    await asyncio.wait_for(fast_done.wait(), timeout=0.5)
+
+    release.set()
+    await bus.stop()
+    stats = bus.get_stats()["mission_completed"]
+    assert stats["calls"] == 2
+    assert stats["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_listener_timeout_is_counted():
+    bus = EventBus(concurrent=True, workers=1, listener_timeout=0.05)
+
+    async def hangs(**kwargs):
+        await asyncio.sleep(10)
+
+    bus.subscribe("level_up", hangs)
+    await bus.publish("level_up", user_id=1)
+    await bus.stop()
+
+    assert bus.get_stats()["level_up"]["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_queue_applies_backpressure():
+    bus = EventBus(concurrent=True, workers=1, max_queue_size=1, listener_timeout=None)
+    release = asyncio.Event()
+
+    async def blocked(n):
+        await release.wait()
+
+    bus.subscribe("reaction_added", blocked)
+    await bus.publish("reaction_added", 1)  # taken by the worker
+    await asyncio.sleep(0)
+    await bus.publish("reaction_added", 2)  # fills the queue
+
+    pending = asyncio.create_task(bus.publish("reaction_added", 3))
+    await asyncio.sleep(0.05)
+    assert not pending.done()
+    assert bus.queue_depth("reaction_added") == 2
+
+    release.set()
+    await asyncio.wait_for(pending, timeout=0.5)
+    await bus.stop()
+    assert bus.queue_depth() == {}
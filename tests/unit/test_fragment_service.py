@@ -0,0 +1,74 @@
+import os
+import pytest
+from sqlalchemy import func, select
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.core.event_bus import EventBus
+from src.database.models import User, UserProgress, UserUnlockedFragment
+from src.services.fragment_service import FragmentService, backfill_unlocked_fragments
+from src.story_system.access_manager import AccessManager
+from src.story_system.unlock_system import UnlockSystem
+
+@pytest.fixture
+def db_seed():
+    return [User(id=i, username=f"u{i}") for i in range(1, 4)] + [
+        UserProgress(user_id=1, unlocked_fragments=["fragment_1", "fragment_5", "fragment_1"]),
+        UserProgress(user_id=2, unlocked_fragments=[]),
+        UserProgress(user_id=3, unlocked_fragments=["fragment_2"]),
+    ]
+
+@pytest.mark.asyncio
+async def test_backfill_copies_json_lists_once(session_factory):
+    assert await backfill_unlocked_fragments(session_factory, batch_size=2) == 3
+    await backfill_unlocked_fragments(session_factory, batch_size=2)  # idempotente
+
+    async with session_factory() as session:
+        rows = (await session.execute(
+            select(UserUnlockedFragment.user_id, UserUnlockedFragment.fragment_id)
+            .order_by(UserUnlockedFragment.user_id, UserUnlockedFragment.fragment_id)
+        )).all()
+    assert [tuple(row) for row in rows] == [(1, "fragment_1"), (1, "fragment_5"), (3, "fragment_2")]
+
+@pytest.mark.asyncio
+async def test_bulk_unlock_and_cached_membership(session_factory):
+    bus = EventBus()
+    unlocked = []
+
+    async def on_unlocked(user_id, fragment_id, **kwargs):
+        unlocked.append((user_id, fragment_id))
+
+    bus.subscribe("fragment_unlocked", on_unlocked)
+    service = FragmentService(session_factory, event_bus=bus)
+
+    assert await service.unlock(2, ["a", "b", "a"]) == ["a", "b"]
+    assert await service.unlock(2, ["b", "c"]) == ["c"]
+    assert unlocked == [(2, "a"), (2, "b"), (2, "c")]
+
+    assert await service.has_unlocked(2, "a") is True
+    assert await service.has_unlocked(2, "zzz") is False
+    assert await service.has_all(2, ["a", "c"]) is True
+    assert service.get_stats()["misses"] == 1  # una sola consulta para el usuario
+
+    await service.unlock(2, ["d"])  # actualiza la caché sin recargar
+    assert await service.has_unlocked(2, "d") is True
+    assert sorted(await service.get_unlocked(2)) == ["a", "b", "c", "d"]
+    assert service.get_stats()["misses"] == 1
+
+    async with session_factory() as session:
+        count = await session.scalar(select(func.count()).select_from(UserUnlockedFragment))
+    assert count == 4
+
+@pytest.mark.asyncio
+async def test_story_checks_go_through_the_service(session_factory):
+    service = FragmentService(session_factory)
+    unlocks = UnlockSystem(service)
+    access = AccessManager(EventBus(), fragments=service)
+
+    assert await unlocks.check_unlock(3, "fragment_5") is False
+    assert await access.can_access_vip(3) is False
+    assert await unlocks.unlock(3, "fragment_5") is True
+    assert await unlocks.unlock(3, "fragment_5") is False
+    assert await unlocks.check_unlock(3, "fragment_5") is True
+    assert await access.can_access_vip(3) is True
+    assert service.get_stats()["misses"] == 1
@@ -0,0 +1,92 @@
+import os
+import random
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import update
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.core.event_bus import EventBus
+from src.database.models import PointTransaction, User
+from src.database.repository import PointTransactionRepository, UserRepository
+from src.services.leaderboard import LeaderboardService, RankedBoard
+from src.services.point_ledger import PointLedgerWriter
+from src.services.points_service import PointsService
+
+NOW = datetime(2026, 5, 13, 12, 0)  # miércoles
+
+@pytest.fixture
+def db_seed():
+    return [User(id=i, username=f"u{i}", points=i * 10) for i in range(1, 6)] + [
+        PointTransaction(user_id=2, points=15, reason="reaction", created_at=NOW - timedelta(days=1)),
+        PointTransaction(user_id=4, points=5, reason="reaction", created_at=NOW - timedelta(days=1)),
+        PointTransaction(user_id=5, points=50, reason="reaction", created_at=NOW - timedelta(days=8)),
+    ]
+
+def test_ranked_board_matches_sorting():
+    rng = random.Random(7)
+    board = RankedBoard(top_k=3, capacity=8)
+    scores = {}
+    for _ in range(3000):
+        user_id = rng.randrange(50)
+        scores[user_id] = rng.randrange(-5, 400)
+        board.set(user_id, scores[user_id])
+
+    expected = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    assert board.top(5) == expected[:5]
+    for user_id, score in scores.items():
+        assert board.rank(user_id) == 1 + sum(1 for other in scores.values() if max(other, 0) > max(score, 0))
+
+@pytest.mark.asyncio
+async def test_points_changed_updates_global_and_weekly_boards(session_factory):
+    bus = EventBus()
+    leaderboard = LeaderboardService(session_factory, top_k=3, event_bus=bus, clock=lambda: NOW)
+    await leaderboard.start()
+    try:
+        assert leaderboard.top(3) == [(5, 50), (4, 40), (3, 30)]
+        assert leaderboard.top(3, "weekly") == [(2, 15), (4, 5)]
+
+        async with session_factory() as session:
+            service = PointsService(UserRepository(session), PointTransactionRepository(session), bus=bus)
+            await service.add_points(1, 100, "mission")
+            await session.commit()
+
+        assert leaderboard.rank(1) == 1
+        assert leaderboard.rank(5) == 2
+        assert leaderboard.top(1, "weekly") == [(1, 100)]
+    finally:
+        await leaderboard.stop()
+
+@pytest.mark.asyncio
+async def test_reconcile_corrects_drift(session_factory):
+    leaderboard = LeaderboardService(session_factory, clock=lambda: NOW)
+    await leaderboard.reconcile()
+
+    async with session_factory() as session:
+        await session.execute(update(User).where(User.id == 1).values(points=999))  # sin evento
+        await session.commit()
+
+    assert await leaderboard.reconcile() == 1
+    assert leaderboard.top(1) == [(1, 999)]
+
+@pytest.mark.asyncio
+async def test_reconcile_keeps_deltas_still_in_the_ledger_buffer(session_factory):
+    bus = EventBus()
+    ledger = PointLedgerWriter(session_factory, flush_interval_ms=60_000)
+    ledger.start()
+    leaderboard = LeaderboardService(session_factory, event_bus=bus, clock=lambda: NOW, ledger=ledger)
+    await leaderboard.start()
+    try:
+        async with session_factory() as session:
+            service = PointsService(UserRepository(session), PointTransactionRepository(session), ledger=ledger, bus=bus)
+            await service.add_points(3, 40, "mission")
+            await session.commit()
+        assert leaderboard.top(1, "weekly") == [(3, 40)]
+
+        # La fila sigue en el buffer del ledger: la reconciliación la inserta antes de leer
+        await leaderboard.reconcile()
+        assert leaderboard.top(1, "weekly") == [(3, 40)]
+        assert ledger.written == 1
+    finally:
+        await leaderboard.stop()
+        await ledger.stop()
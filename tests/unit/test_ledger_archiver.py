@@ -0,0 +1,89 @@
+import os
+import pytest
+from datetime import datetime
+from sqlalchemy import func, select
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.database.models import (PointBalanceSnapshot, PointTransaction, PointTransactionArchive, User)
+from src.database.repository import PointTransactionRepository
+from src.services.ledger_archiver import LedgerArchiver
+
+@pytest.fixture
+def db_seed():
+    return [
+        User(id=1), User(id=2),
+        PointTransaction(user_id=1, points=10, reason="march", created_at=datetime(2026, 3, 5)),
+        PointTransaction(user_id=1, points=-4, reason="march", created_at=datetime(2026, 3, 20)),
+        PointTransaction(user_id=2, points=7, reason="march", created_at=datetime(2026, 3, 21)),
+        PointTransaction(user_id=1, points=5, reason="april", created_at=datetime(2026, 4, 2)),
+    ]
+
+@pytest.mark.asyncio
+async def test_roll_forward_is_incremental(session_factory):
+    archiver = LedgerArchiver(session_factory)
+    assert await archiver.roll_forward() == 4
+    assert await archiver.roll_forward() == 0
+
+    async with session_factory() as session:
+        session.add(PointTransaction(user_id=1, points=100, reason="bonus", created_at=datetime(2026, 4, 3)))
+        await session.commit()
+    assert await archiver.roll_forward() == 1
+
+    async with session_factory() as session:
+        snapshot = await session.get(PointBalanceSnapshot, 1)
+        assert snapshot.balance == 111
+        assert snapshot.last_transaction_at == datetime(2026, 4, 3)
+
+@pytest.mark.asyncio
+async def test_ledger_balance_combines_snapshot_and_tail(session_factory):
+    await LedgerArchiver(session_factory).roll_forward()
+    async with session_factory() as session:
+        session.add(PointTransaction(user_id=2, points=3, reason="reaction"))
+        await session.commit()
+        repo = PointTransactionRepository(session)
+        assert await repo.get_ledger_balance(1) == 11
+        assert await repo.get_ledger_balance(2) == 10
+
+@pytest.mark.asyncio
+async def test_closed_months_are_archived_only_after_snapshotting(session_factory):
+    archiver = LedgerArchiver(session_factory, batch_size=1)
+    now = datetime(2026, 4, 15)
+
+    assert await archiver.archive_closed_months(now) == 0  # nothing in the snapshots yet
+
+    result = await archiver.run(now)
+    assert result["rolled_forward"] == 4
+    assert result["archived"] == 3
+
+    async with session_factory() as session:
+        assert await session.scalar(select(func.count()).select_from(PointTransaction)) == 1
+        assert await session.scalar(select(func.count()).select_from(PointTransactionArchive)) == 3
+        repo = PointTransactionRepository(session)
+        assert await repo.get_ledger_balance(1) == 11
+
+        live = await repo.get_history(1)
+        assert [t.reason for t in live] == ["april"]
+        archived = await repo.get_history(1, limit=1, archived=True)
+        assert [t.points for t in archived] == [-4]
+        older = await repo.get_history(1, limit=1, before=(archived[0].created_at, archived[0].id), archived=True)
+        assert [t.points for t in older] == [10]
+
+@pytest.mark.asyncio
+async def test_history_pages_do_not_skip_rows_with_the_same_timestamp(session_factory):
+    same_moment = datetime(2026, 4, 3, 12, 0)
+    async with session_factory() as session:
+        session.add_all([PointTransaction(user_id=2, points=i, reason="burst", created_at=same_moment)
+                         for i in range(5)])
+        await session.commit()
+
+        repo = PointTransactionRepository(session)
+        seen, before = [], None
+        while page := await repo.get_history(2, limit=2, before=before):
+            seen += [t.points for t in page]
+            before = (page[-1].created_at, page[-1].id)
+    assert seen == [4, 3, 2, 1, 0, 7]
+
+def test_history_query_uses_the_user_created_at_index():
+    index_columns = {tuple(c.name for c in index.columns) for index in PointTransaction.__table__.indexes}
+    assert ("user_id", "created_at") in index_columns
@@ -0,0 +1,66 @@
+import os
+import pytest
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.core.config import Settings
+from src.core.event_bus import EventBus
+from src.services.level_service import LevelService
+
+def make_service(bus=None) -> LevelService:
+    return LevelService(bus or EventBus(), Settings())
+
+def test_levels_match_linear_scan():
+    service = make_service()
+
+    def linear(points):
+        level = "Novato"
+        for threshold, name in sorted(Settings().LEVEL_THRESHOLDS.items()):
+            if points >= threshold:
+                level = name
+        return level
+
+    samples = [-5, 0, 99, 100, 101, 299, 300, 699, 700, 1499, 1500, 10_000]
+    assert [service.get_level(p) for p in samples] == [linear(p) for p in samples]
+    assert [service.level_names[i] for i in service.level_indices(samples)] == [linear(p) for p in samples]
+
+def test_level_distribution_counts_every_level():
+    service = make_service()
+
+    distribution = service.level_distribution([0, 50, 100, 150, 300, 700, 701, 2000, 5000])
+
+    assert distribution == {"Novato": 2, "Aprendiz": 2, "Explorador": 1, "Maestro": 2, "Leyenda": 2}
+    assert service.level_distribution([]) == dict.fromkeys(service.level_names, 0)
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_bulk_paths_agree(use_numpy):
+    service = make_service()
+    if use_numpy:
+        pytest.importorskip("numpy")
+        assert service._thresholds_array is not None
+    else:
+        service._thresholds_array = None  # fuerza el camino con bisect
+
+    samples = list(range(-10, 3000, 7))
+    indices = service.level_indices(samples)
+    assert type(indices) is list and all(type(i) is int for i in indices)
+    assert indices == [service.level_index(p) for p in samples]
+
+    distribution = service.level_distribution(iter(samples))
+    assert distribution == {name: [service.get_level(p) for p in samples].count(name) for name in service.level_names}
+
+@pytest.mark.asyncio
+async def test_level_up_emitted_only_when_level_changes():
+    bus = EventBus()
+    events = []
+
+    async def on_level_up(**kwargs):
+        events.append(kwargs)
+
+    bus.subscribe("level_up", on_level_up)
+    service = make_service(bus)
+
+    await service.check_level_up(1, 10, 90)
+    await service.check_level_up(1, 90, 310)
+
+    assert events == [{"user_id": 1, "old_level": "Novato", "new_level": "Explorador"}]
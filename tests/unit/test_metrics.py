@@ -0,0 +1,114 @@
+import os
+import pytest
+from aiohttp import ClientSession
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.core.event_bus import EventBus
+from src.core.metrics import (DB_STATEMENT_SECONDS, EVENT_DISPATCH_SECONDS, HANDLER_SECONDS, MetricsRegistry,
+                              instrument_engine, start_metrics_server)
+from src.database.models import Base
+from src.database.repository import UserRepository
+from src.telegram_bot.middleware import MetricsMiddleware
+
+
+def test_histogram_renders_cumulative_buckets_and_quantiles():
+    registry = MetricsRegistry()
+    latency = registry.histogram("demo_seconds", "Demo.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.05, 0.5, 3.0):
+        latency.labels("menu").observe(value)
+    registry.counter("demo_total", "Demo.").inc(2)
+
+    text = registry.render()
+    assert 'demo_seconds_bucket{route="menu",le="0.1"} 2' in text
+    assert 'demo_seconds_bucket{route="menu",le="1.0"} 3' in text
+    assert 'demo_seconds_bucket{route="menu",le="+Inf"} 4' in text
+    assert 'demo_seconds_count{route="menu"} 4' in text
+    assert "demo_total 2.0" in text
+    assert latency.labels("menu").quantile(0.5) == 0.1
+    assert "demo_seconds[menu] n=4" in registry.summary()
+
+
+@pytest.mark.asyncio
+async def test_sql_statements_are_labelled_by_repository_method():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    instrument_engine(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        await UserRepository(session).get_user_by_id(1)
+    await engine.dispose()
+
+    assert DB_STATEMENT_SECONDS.labels("UserRepository.get_user_by_id", "SELECT", "ok").count >= 1
+
+
+@pytest.mark.asyncio
+async def test_failed_statements_are_counted_and_not_left_pending():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    instrument_engine(engine)
+    failed = DB_STATEMENT_SECONDS.labels("other", "SELECT", "error")
+    before = failed.count
+
+    async with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(DBAPIError):
+                await conn.execute(text("SELECT * FROM no_such_table"))
+        assert conn.sync_connection.info.get("metrics_query_start") == []
+    await engine.dispose()
+
+    assert failed.count == before + 3
+
+
+@pytest.mark.asyncio
+async def test_event_bus_and_handlers_are_timed():
+    bus = EventBus()
+
+    async def listener():
+        pass
+
+    bus.subscribe("metrics_test_event", listener)
+    await bus.publish("metrics_test_event")
+    assert EVENT_DISPATCH_SECONDS.labels("event_bus", "metrics_test_event").count == 1
+
+    class Router:
+        name = "profile"
+
+    class Handler:
+        @staticmethod
+        async def callback():
+            pass
+
+    async def show_profile(event, data):
+        return "ok"
+
+    await MetricsMiddleware()(show_profile, object(), {"event_router": Router(), "handler": Handler()})
+    assert HANDLER_SECONDS.labels("profile", "callback", "ok").count == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_serves_prometheus_text():
+    registry = MetricsRegistry()
+    registry.counter("updates_total", "Updates.").inc()
+    runner = await start_metrics_server("127.0.0.1", 0, registry)
+    try:
+        port = runner.addresses[0][1]
+        async with ClientSession() as client:
+            async with client.get(f"http://127.0.0.1:{port}/metrics") as response:
+                assert response.status == 200
+                assert "updates_total 1.0" in await response.text()
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_on_a_busy_port_does_not_raise():
+    runner = await start_metrics_server("127.0.0.1", 0, MetricsRegistry())
+    try:
+        port = runner.addresses[0][1]
+        assert await start_metrics_server("127.0.0.1", port, MetricsRegistry()) is None
+    finally:
+        await runner.cleanup()
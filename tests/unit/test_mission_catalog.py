@@ -0,0 +1,62 @@
+import json
+import random
+import pytest
+
+from src.core.content_registry import ContentRegistry
+from src.data.mission_catalog import AliasTable, MissionCatalog
+from src.services.mission_catalog_service import MissionCatalogService
+
+def mission(mission_id, category, **extra):
+    return {"id": mission_id, "title": mission_id, "description": "...", "reward": 10,
+            "time_limit": 3600, "category": category, **extra}
+
+@pytest.fixture(name="missions_file")
+def create_missions_file(tmp_path):
+    missions = [
+        mission("a", "daily", weight=6),
+        mission("b", "daily", weight=3),
+        mission("c", "daily"),
+        mission("d", "daily", weight=0),
+        mission("e", "story"),
+    ]
+    path = tmp_path / "missions.json"
+    path.write_text(json.dumps(missions), encoding="utf-8")
+    return path
+
+def test_alias_table_follows_weights():
+    table = AliasTable(["x", "y", "z"], [6, 3, 1])
+    rng = random.Random(7)
+    draws = [table.sample(rng) for _ in range(20000)]
+    assert draws.count("x") / len(draws) == pytest.approx(0.6, abs=0.02)
+    assert draws.count("z") / len(draws) == pytest.approx(0.1, abs=0.02)
+
+def test_category_draws_skip_zero_weight(missions_file):
+    catalog = MissionCatalog(missions_file, registry=ContentRegistry())
+    rng = random.Random(1)
+    drawn = {catalog.get_random_mission("daily", rng)["id"] for _ in range(500)}
+
+    assert drawn == {"a", "b", "c"}
+    assert catalog.get_random_mission("story")["id"] == "e"
+    assert catalog.get_random_mission("missing") is None
+    assert [m["id"] for m in catalog.get_missions_by_category("daily")] == ["a", "b", "c", "d"]
+
+def test_daily_sampling_for_many_users(missions_file):
+    catalog = MissionCatalog(missions_file, registry=ContentRegistry())
+    assignments = catalog.sample_daily_missions(range(1000), count=2, category="daily", seed=42)
+
+    assert len(assignments) == 1000
+    assert all(len({m["id"] for m in drawn}) == 2 for drawn in assignments.values())
+    assert all("d" not in {m["id"] for m in drawn} for drawn in assignments.values())
+    assert assignments == catalog.sample_daily_missions(range(1000), count=2, category="daily", seed=42)
+    # Only three missions can be drawn, so asking for more caps the result.
+    assert len(catalog.sample_daily_missions([1], count=10, category="daily")[1]) == 3
+
+def test_catalog_service_is_the_same_catalog(missions_file):
+    registry = ContentRegistry()
+    service = MissionCatalogService(str(missions_file), registry=registry)
+
+    assert service.get_mission_by_id("b")["weight"] == 3
+    assert service.get_all_missions() is MissionCatalog(missions_file, registry=registry).get_all_missions()
+    service._missions = [mission("z", "pinned")]
+    assert service.get_random_mission()["id"] == "z"
+    assert service.get_mission_by_id("a") is None
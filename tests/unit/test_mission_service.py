@@ -0,0 +1,110 @@
+import json
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.data.mission_catalog import MissionCatalog
+from src.database.database_setup import Base
+from src.models.user_mission_progress import UserMissionProgress
+from src.services.mission_service import MissionService
+
+@pytest.fixture(name="catalog")
+def create_catalog(tmp_path):
+    missions = [
+        {"id": f"m{i:03d}", "title": f"Misión {i}", "description": "...", "reward": 10,
+         "time_limit": 3600, "category": "tutorial"}
+        for i in range(50)
+    ]
+    path = tmp_path / "missions.json"
+    path.write_text(json.dumps(missions), encoding="utf-8")
+    return MissionCatalog(path)
+
+@pytest.fixture(name="engine")
+async def create_engine():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(bind=engine, expire_on_commit=False)() as session:
+        session.add_all([
+            UserMissionProgress(user_id=1, mission_id="m000", status="completed", progress=100.0),
+            UserMissionProgress(user_id=1, mission_id="m001", status="in_progress", progress=40.0),
+            UserMissionProgress(user_id=2, mission_id="m002", status="failed", progress=10.0),
+        ])
+        await session.commit()
+    yield engine
+    await engine.dispose()
+
+@pytest.fixture(name="statements")
+def count_statements(engine):
+    executed = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield executed
+    event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+@pytest.mark.asyncio
+async def test_list_available_missions_uses_a_single_query(engine, catalog, statements):
+    async with AsyncSession(engine) as session:
+        missions = await MissionService(session, catalog).list_available_missions(1)
+
+    assert len(statements) == 1
+    assert len(missions) == 49
+    statuses = {m["id"]: m["status"] for m in missions}
+    assert "m000" not in statuses
+    assert statuses["m001"] == "in_progress"
+    assert statuses["m049"] == "pending"
+
+@pytest.mark.asyncio
+async def test_statuses_for_many_users_use_a_single_query(engine, catalog, statements):
+    async with AsyncSession(engine) as session:
+        statuses = await MissionService(session, catalog).get_mission_statuses_for_users([1, 2, 3])
+
+    assert len(statements) == 1
+    assert statuses[1]["m000"] == "completed"
+    assert statuses[2]["m002"] == "failed"
+    assert set(statuses[3].values()) == {"pending"}
+    assert all(len(by_mission) == 50 for by_mission in statuses.values())
+
+@pytest.mark.asyncio
+async def test_progress_tick_loads_once_and_commits_once(engine, catalog, statements):
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        record = await MissionService(session, catalog).update_mission_progress(1, "m001", 60.0)
+
+    # One SELECT and one UPDATE (progress and completion flushed together).
+    assert len(statements) == 2
+    assert record.progress == 100.0
+    assert record.status == "completed"
+
+@pytest.mark.asyncio
+async def test_unit_of_work_rolls_back_on_error(engine, catalog):
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        service = MissionService(session, catalog)
+        with pytest.raises(RuntimeError):
+            async with service.user_mission_repo.unit_of_work() as repo:
+                await repo.fail_mission(1, "m001")
+                raise RuntimeError("handler failed")
+
+    async with AsyncSession(engine) as session:
+        assert (await session.get(UserMissionProgress, (1, "m001"))).status == "in_progress"
+
+@pytest.mark.asyncio
+async def test_bulk_ticks_use_update_returning(engine, catalog, statements):
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        service = MissionService(session, catalog)
+        async with service.user_mission_repo.unit_of_work() as repo:
+            for user_id in (2, 3, 4):
+                await repo.start_mission(user_id, "m010")
+        statements.clear()
+
+        updated = await service.tick_missions(
+            [(2, "m010", 30.0), (3, "m010", 30.0), (4, "m010", 100.0), (1, "m000", 30.0), (1, "nope", 5.0)]
+        )
+
+    assert len(statements) == 2  # one UPDATE ... RETURNING per distinct delta
+    by_user = {record.user_id: record for record in updated}
+    assert set(by_user) == {2, 3, 4}  # m000 is already completed for user 1
+    assert by_user[2].progress == 30.0
+    assert by_user[4].status == "completed"
@@ -0,0 +1,49 @@
+import os
+import random
+import pytest
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.models.user import User, UserRole
+from src.persona_system.emotion_engine import EmotionTone
+from src.persona_system.lucien_persona import LucienPersona, TemplatePlan
+from src.persona_system.persona_service import PersonaService
+
+def test_template_plans_match_str_format():
+    for templates in LucienPersona._templates.values():
+        for template in templates:
+            assert TemplatePlan(template).render_username("ana") == template.format(username="ana")
+
+    plan = TemplatePlan("{greeting}, {username}! {{literal}}")
+    assert plan.render({"greeting": "Hola", "username": "ana"}) == "Hola, ana! {literal}"
+    with pytest.raises(ValueError):
+        TemplatePlan("{points:>5}")
+
+def tone_of(message: str, username: str) -> EmotionTone:
+    return next(tone for tone, templates in LucienPersona._templates.items()
+                if any(message.startswith(template.format(username=username)) for template in templates))
+
+def test_tone_follows_the_user_without_events():
+    users = {1: User(id=1, username="ana", role=UserRole.VIP, points=900)}
+    service = PersonaService(get_user=users.get)
+    assert tone_of(service.create_response(1), "ana") == EmotionTone.INTIMATE
+
+    # revoke_vip cambia el rol sin publicar vip_access_revoked
+    users[1] = User(id=1, username="ana", role=UserRole.FREE, points=900)
+    assert tone_of(service.create_response(1), "ana") == EmotionTone.MYSTERIOUS
+    # y update_user_points cambia los puntos sin points_changed
+    users[1] = User(id=1, username="ana", points=10, unlocked_fragments=["fragment_1"])
+    assert tone_of(service.create_responses(users.values())[1], "ana") == EmotionTone.PLAYFUL
+
+def test_batch_render_matches_single_responses():
+    users = [User(id=i, username=f"u{i}", points=i * 10, unlocked_fragments=["f"] if i % 3 else [],
+                  role=UserRole.VIP if i % 7 == 0 else UserRole.FREE)
+             for i in range(100)]
+    service = PersonaService(get_user={u.id: u for u in users}.get)
+
+    random.seed(3)
+    batch = service.create_responses(users)
+    random.seed(3)
+    single = {u.id: service.create_response(u.id) for u in users}
+
+    assert batch == single
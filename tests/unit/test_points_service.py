@@ -0,0 +1,94 @@
+import asyncio
+import os
+import pytest
+from sqlalchemy import func, select
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.database.models import PointTransaction, User
+from src.database.repository import PointTransactionRepository, UserRepository
+from src.services.point_ledger import PointLedgerWriter
+from src.services.points_service import PointsService
+
+@pytest.fixture
+def db_seed():
+    return [User(id=1, username="diana_fan")]
+
+@pytest.mark.asyncio
+async def test_concurrent_awards_do_not_lose_updates(session_factory):
+    ledger = PointLedgerWriter(session_factory, flush_interval_ms=10, batch_size=50)
+    ledger.start()
+
+    async def react():
+        async with session_factory() as session:
+            service = PointsService(UserRepository(session), PointTransactionRepository(session), ledger=ledger)
+            await service.add_points(1, 2, "reaction")
+            await session.commit()
+
+    await asyncio.gather(*(react() for _ in range(200)))
+    await ledger.stop()
+
+    async with session_factory() as session:
+        assert (await session.get(User, 1)).points == 400
+        assert await session.scalar(select(func.count()).select_from(PointTransaction)) == 200
+    assert ledger.get_stats()["written"] == 200
+
+@pytest.mark.asyncio
+async def test_add_points_without_ledger_returns_balance(session_factory):
+    async with session_factory() as session:
+        service = PointsService(UserRepository(session), PointTransactionRepository(session))
+        assert await service.add_points(1, 10, "bonus") == 10
+        assert await service.add_points(1, -3, "spend") == 7
+        assert await service.add_points(999, 5) is None
+
+@pytest.mark.asyncio
+async def test_failed_batches_are_spooled_and_replayed(session_factory, tmp_path):
+    spool = tmp_path / "ledger.spool.jsonl"
+
+    def broken_factory():
+        raise ConnectionError("database unavailable")
+
+    ledger = PointLedgerWriter(broken_factory, spool_path=str(spool))
+    ledger.submit(1, 5, "reaction")
+    ledger.submit(1, 7, "reaction")
+    await ledger.stop()
+    assert ledger.get_stats()["spooled"] == 2
+    assert len(spool.read_text().splitlines()) == 2
+
+    still_down = PointLedgerWriter(broken_factory, spool_path=str(spool))
+    still_down.start()
+    await still_down.stop()
+    assert len((tmp_path / "ledger.spool.jsonl.replay").read_text().splitlines()) == 2  # no se pierde
+
+    recovered = PointLedgerWriter(session_factory, spool_path=str(spool))
+    recovered.start()
+    await recovered.stop()
+
+    assert list(tmp_path.glob("ledger.spool*")) == []
+    async with session_factory() as session:
+        points = (await session.execute(select(PointTransaction.points))).scalars().all()
+    assert sorted(points) == [5, 7]
+
+@pytest.mark.asyncio
+async def test_ledger_rows_follow_the_session_outcome(session_factory):
+    ledger = PointLedgerWriter(session_factory)
+
+    async with session_factory() as session:
+        service = PointsService(UserRepository(session), PointTransactionRepository(session), ledger=ledger)
+        await service.add_points(1, 5, "reaction")
+        assert ledger.get_stats()["buffered"] == 0  # aún sin commit
+        await session.rollback()
+        await service.add_points(1, 7, "reaction")
+        await session.commit()
+    async with session_factory() as session:
+        service = PointsService(UserRepository(session), PointTransactionRepository(session), ledger=ledger)
+        await service.add_points(1, 9, "reaction")
+        await session.close()  # sin commit
+        await service.add_points(1, 11, "reaction")
+        await session.commit()
+    await ledger.stop()
+
+    async with session_factory() as session:
+        assert (await session.get(User, 1)).points == 18
+        points = (await session.execute(select(PointTransaction.points))).scalars().all()
+    assert sorted(points) == [7, 11]
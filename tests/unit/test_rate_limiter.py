@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import pytest
+from datetime import datetime
+
+from aiogram.types import Chat, Message, User
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.security.rate_limiter import MemoryStore, RateLimiter, SlidingWindowLimiter, SqliteStore, TokenBucketLimiter
+from src.telegram_bot.middleware import RateLimitMiddleware
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_sliding_window_limits_and_recovers():
+    clock = FakeClock(1200.0)  # inicio exacto de una ventana de 60s
+    limiter = SlidingWindowLimiter(5, 60, clock=clock)
+
+    assert [limiter.hit(1) for _ in range(6)] == [True] * 5 + [False]
+    assert limiter.hit(2) is True  # cada usuario tiene su propio contador
+
+    # A mitad de la ventana siguiente la anterior pesa la mitad: 2.5 + 1 <= 5
+    clock.now += 90
+    assert [limiter.hit(1) for _ in range(3)] == [True, True, False]
+
+    clock.now += 120
+    assert limiter.hit(1) is True
+
+def test_token_bucket_allows_burst_then_refills():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(60, 60, burst=3, clock=clock)
+
+    assert [limiter.hit(1) for _ in range(4)] == [True, True, True, False]
+    clock.now += 1  # una ficha por segundo
+    assert limiter.hit(1) is True
+    assert limiter.hit(1) is False
+
+def test_idle_keys_are_evicted_and_size_is_bounded():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(10, 60, idle_ttl=30, store=MemoryStore(max_keys=100), clock=clock)
+
+    for user_id in range(100):
+        limiter.hit(user_id)
+    assert len(limiter) == 100
+    limiter.hit(1000)
+    assert len(limiter) == 100  # el más antiguo sale al pasar de max_keys
+
+    clock.now += 31
+    for _ in range(50):
+        limiter.hit(2000)  # cada llamada expulsa unas pocas claves inactivas
+    assert len(limiter) == 1
+
+def test_config_values_from_env_are_coerced(monkeypatch):
+    from src.core.config import Settings
+
+    monkeypatch.setenv("RATE_LIMITS", '{"callback": {"algorithm": "token_bucket", "limit": "60", "period": "60", "burst": "2"}}')
+    limiter = RateLimiter.from_settings(Settings())
+    assert [limiter.allow("callback", 1) for _ in range(3)] == [True, True, False]
+
+    with pytest.raises(ValueError):
+        RateLimiter.from_config({"message": {"limit": "veinte", "period": 60}})
+
+@pytest.mark.asyncio
+async def test_middleware_drops_floods_before_the_handler():
+    limiter = RateLimiter.from_config({"message": {"algorithm": "sliding_window", "limit": 2, "period": 60}})
+    middleware = RateLimitMiddleware(limiter)
+    calls = []
+
+    async def handler(event, data):
+        calls.append(event.message_id)
+        return "ok"
+
+    def message(message_id: int) -> Message:
+        return Message(
+            message_id=message_id, date=datetime.now(), text="hola",
+            chat=Chat(id=7, type="private"), from_user=User(id=7, is_bot=False, first_name="Ana"),
+        )
+
+    results = [await middleware(handler, message(i), {}) for i in range(3)]
+
+    assert results == ["ok", "ok", None]
+    assert calls == [0, 1]
+    assert limiter.get_stats()["message"] == {"tracked_keys": 1, "rejected": 1, "store_errors": 0}
+
+def _hit_shared_bucket(path: str) -> int:
+    limiter = TokenBucketLimiter(50, 3600, store=SqliteStore(path, busy_timeout=5.0), namespace="message")
+    return sum(limiter.hit(42) for _ in range(40))
+
+def test_sqlite_store_matches_memory_store(tmp_path):
+    clock = FakeClock(1200.0)
+    sqlite_store = SqliteStore(str(tmp_path / "limits.sqlite3"))
+    pairs = [
+        (cls(5, 60, idle_ttl=150, clock=clock), cls(5, 60, idle_ttl=150, clock=clock, store=sqlite_store, namespace=name))
+        for name, cls in (("window", SlidingWindowLimiter), ("bucket", TokenBucketLimiter))
+    ]
+    for step in [0, 0, 1, 0, 0, 0, 5, 30, 0, 40, 0, 0, 200, 0, 13, 61, 0]:
+        clock.now += step
+        for memory, shared in pairs:
+            assert memory.hit(7) == shared.hit(7)
+    sqlite_store.close()
+
+def test_sqlite_store_shares_quota_across_processes(tmp_path):
+    from concurrent.futures import ProcessPoolExecutor
+
+    path = str(tmp_path / "limits.sqlite3")
+    SqliteStore(path).close()  # crea el esquema antes de arrancar los procesos
+    with ProcessPoolExecutor(max_workers=3) as pool:
+        allowed = sum(pool.map(_hit_shared_bucket, [path] * 3))
+    assert allowed == 50  # sin compartir serían 3 x 40
+
+def test_locked_sqlite_store_lets_updates_through(tmp_path):
+    path = str(tmp_path / "limits.sqlite3")
+    limiter = RateLimiter({"message": SlidingWindowLimiter(1, 60, store=SqliteStore(path, busy_timeout=0.01), namespace="message")})
+    assert limiter.allow("message", 7)
+    assert not limiter.allow("message", 7)
+
+    other_worker = sqlite3.connect(path, isolation_level=None)
+    other_worker.execute("BEGIN IMMEDIATE")  # otro proceso tiene el bloqueo de escritura
+    try:
+        assert limiter.allow("message", 7)
+    finally:
+        other_worker.execute("ROLLBACK")
+        other_worker.close()
+    assert limiter.get_stats()["message"]["store_errors"] == 1
+    assert not limiter.allow("message", 7)
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import pytest
+from datetime import datetime
+
+from src.core.metrics import SCHEDULER_JOB_SECONDS
+from src.core.scheduler_system import CronExpression, SchedulerSystem
+
+@pytest.mark.parametrize("expression, moment, expected", [
+    ("@daily", datetime(2026, 5, 10, 13, 7), datetime(2026, 5, 11, 0, 0)),
+    ("*/15 9-17 * * mon-fri", datetime(2026, 5, 8, 17, 50), datetime(2026, 5, 11, 9, 0)),  # Friday -> Monday
+    ("0 0 1 * *", datetime(2026, 12, 3), datetime(2027, 1, 1)),
+    ("30 4 13 * 5", datetime(2026, 5, 10), datetime(2026, 5, 13, 4, 30)),  # day 13 OR Friday
+    ("0 12 29 2 *", datetime(2026, 3, 1), datetime(2028, 2, 29, 12, 0)),
+    ("every_minute", datetime(2026, 5, 10, 23, 59, 30), datetime(2026, 5, 11, 0, 0)),
+])
+def test_cron_next_after(expression, moment, expected):
+    assert CronExpression(expression).next_after(moment) == expected
+
+@pytest.mark.parametrize("expression", ["* * *", "61 * * * *", "0 0 31 2 *", "*/0 * * * *"])
+def test_invalid_cron_expressions(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression).next_after(datetime(2026, 1, 1))
+
+@pytest.mark.asyncio
+async def test_missed_runs_catch_up_once_within_concurrency(tmp_path):
+    state_path = tmp_path / "scheduler.json"
+    state_path.write_text(json.dumps({
+        "reset": "2026-05-09T00:00:00", "report": "2026-05-09T00:00:00", "fresh": "2026-05-10T08:00:00",
+    }), encoding="utf-8")
+    scheduler = SchedulerSystem(str(state_path), max_concurrency=1, clock=lambda: datetime(2026, 5, 10, 8, 30))
+    active, peak, calls = 0, 0, []
+
+    async def job(name):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        calls.append(name)
+        active -= 1
+
+    async def reset():
+        await job("reset")
+
+    def report():  # sync jobs run in a thread
+        calls.append("report")
+
+    async def fresh():
+        await job("fresh")
+
+    scheduler.add_job("@daily", reset, name="reset")
+    scheduler.add_job("@daily", report, name="report")
+    scheduler.add_job("@daily", fresh, name="fresh")
+    scheduler.start()
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if len(calls) == 2:
+            break
+    await scheduler.stop()
+
+    assert sorted(calls) == ["report", "reset"]  # "fresh" is not due until midnight
+    assert peak == 1
+    state = json.loads(state_path.read_text(encoding="utf-8"))
+    assert state["reset"] == "2026-05-10T00:00:00"
+    assert scheduler.get_stats()["reset"]["next_run"] == "2026-05-11T00:00:00"
+    assert SCHEDULER_JOB_SECONDS.labels("reset", "ok").count == 1
+
+@pytest.mark.asyncio
+async def test_failed_job_is_recorded():
+    scheduler = SchedulerSystem(clock=lambda: datetime(2026, 5, 10, 8, 30))
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    job = scheduler.add_job("* * * * *", broken, name="broken_job")
+    scheduler.start()
+    job.next_run = datetime(2026, 5, 10, 8, 30)  # due now
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if job.failures:
+            break
+    await scheduler.stop()
+
+    assert job.failures == 1
+    assert SCHEDULER_JOB_SECONDS.labels("broken_job", "error").count == 1
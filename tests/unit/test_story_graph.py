@@ -0,0 +1,56 @@
+import json
+import logging
+import pytest
+
+from src.services.story_service import StoryService
+from src.story_system.choice_manager import ChoiceManager
+from src.story_system.story_graph import compile_story
+
+@pytest.fixture(name="story_data")
+def create_story_data():
+    return {
+        "intro": {
+            "text": "Intro",
+            "choices": [
+                {"id": "left", "text": "Izquierda", "next_scene": "left_path"},
+                {"id": "right", "text": "Derecha", "next_scene": "right_path"},
+            ],
+        },
+        "left_path": {"text": "Izquierda", "choices": [{"id": "back", "text": "Volver", "next_scene": "intro"}]},
+        "right_path": {"text": "Derecha", "choices": []},
+        "epilogue": {"text": "Nadie llega aquí", "choices": [], "meta": {"is_initial": False}},
+    }
+
+def test_compiled_story_indexes_choices_and_adjacency(story_data, caplog):
+    with caplog.at_level(logging.WARNING):
+        story = compile_story(story_data)
+
+    assert story.initial_node == "intro"
+    assert story.adjacency["intro"] == ("left_path", "right_path")
+    assert story.get_choice("intro", "right")["next_scene"] == "right_path"
+    assert story.get_choice_by_text("left_path", "Volver")["id"] == "back"
+    assert story.get_choice("intro", "missing") is None
+    assert story.get_choice("missing", "left") is None
+    assert "epilogue" in caplog.text  # unreachable nodes are reported at load time
+
+def test_dangling_next_scene_fails_at_load(story_data, tmp_path):
+    story_data["right_path"]["choices"].append({"id": "ghost", "text": "?", "next_scene": "nowhere"})
+    path = tmp_path / "story.json"
+    path.write_text(json.dumps(story_data), encoding="utf-8")
+
+    with pytest.raises(ValueError, match="unknown next_scene 'nowhere'"):
+        StoryService(str(path))
+
+def test_initial_node_prefers_meta_flag(story_data):
+    story_data["right_path"]["meta"] = {"is_initial": True}
+    assert compile_story(story_data).initial_node == "right_path"
+
+@pytest.mark.asyncio
+async def test_choice_manager_uses_compiled_story(story_data):
+    story = compile_story(story_data)
+    manager = ChoiceManager(event_bus=None, progress_tracker=None, story=story)
+
+    # The raw scene is not scanned when the compiled story knows the node.
+    next_scene, _ = await manager.process_choice(1, "intro", {}, "left")
+    assert next_scene == "left_path"
+    assert (await manager.process_choice(1, "intro", {}, "nope"))[0] is None
@@ -0,0 +1,39 @@
+import json
+import pytest
+
+from src.core.content_registry import ContentRegistry
+from src.services.story_service import StoryService
+from src.story_system.story_pack import LazyNode, StoryPack, convert_json, write_story_pack
+
+@pytest.fixture(name="story_data")
+def load_story_data():
+    with open("data/story.json", encoding="utf-8") as f:
+        return json.load(f)
+
+def test_pack_round_trips_the_json_story(story_data, tmp_path):
+    pack = StoryPack(convert_json("data/story.json", tmp_path / "story.pack"))
+
+    assert list(pack) == list(story_data)
+    for node_id, node_data in story_data.items():
+        node = pack[node_id]
+        assert isinstance(node, LazyNode)
+        assert dict(node) == node_data
+    assert pack.text_bytes == sum(len(node["text"].encode("utf-8")) for node in story_data.values())
+
+def test_story_service_reads_packs_lazily(story_data, tmp_path):
+    path = write_story_pack(story_data, tmp_path / "story.pack")
+    service = StoryService(str(path), registry=ContentRegistry())
+
+    assert service.get_initial_node() == "start"
+    node = service.get_node("start")
+    assert "text" not in node._fields  # only metadata lives in the index
+    assert node["text"] == story_data["start"]["text"]
+    assert service.get_choice("start", "approach_confident")["next_scene"] == "confidence_path"
+
+def test_rewriting_a_pack_keeps_old_readers_valid(story_data, tmp_path):
+    path = write_story_pack(story_data, tmp_path / "story.pack")
+    old = StoryPack(path)
+    write_story_pack({"start": {"text": "Nuevo", "choices": []}}, path)
+
+    assert old["start"]["text"] == story_data["start"]["text"]
+    assert StoryPack(path)["start"]["text"] == "Nuevo"
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import pytest
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from src.core.event_bus import EventBus
+from src.database.models import User
+from src.models.user import User as UserModel
+from src.services.subscription_service import SubscriptionService
+from src.services.vip_expiry import VipExpiryScheduler
+
+NOW = datetime(2026, 5, 10, 12, 0)
+
+@pytest.fixture
+def db_seed():
+    return [User(id=i, role="vip", vip_expires_at=NOW - timedelta(minutes=i)) for i in range(1, 6)] + [
+        User(id=10, role="vip", vip_expires_at=NOW + timedelta(days=3)),
+        User(id=11, role="free"),
+    ]
+
+async def roles(factory):
+    async with factory() as session:
+        return {user.id: user.role for user in (await session.execute(User.__table__.select())).all()}
+
+@pytest.mark.asyncio
+async def test_rebuild_and_revoke_in_batches(session_factory):
+    kicked = []
+
+    async def kick(user_ids):
+        kicked.append(sorted(user_ids))
+
+    scheduler = VipExpiryScheduler(session_factory, kick=kick, batch_size=2, clock=lambda: NOW)
+    assert await scheduler.rebuild() == 6
+    assert scheduler.get_stats()["next_expiry"] == (NOW - timedelta(minutes=5)).isoformat()
+
+    # User 1 renewed from another process: the heap is stale, the UPDATE guard keeps it VIP.
+    async with session_factory() as session:
+        (await session.get(User, 1)).vip_expires_at = NOW + timedelta(days=30)
+        await session.commit()
+
+    revoked = await scheduler.revoke_due()
+    assert sorted(revoked) == [2, 3, 4, 5]
+    assert kicked == [[4, 5], [2, 3]]  # the batch with user 1 revokes nobody: no kick
+    current = await roles(session_factory)
+    assert current[1] == "vip" and current[10] == "vip"
+    assert all(current[i] == "free" for i in (2, 3, 4, 5))
+
+@pytest.mark.asyncio
+async def test_wakes_at_the_next_expiry(session_factory):
+    revoked = asyncio.Event()
+    bus = EventBus()
+
+    async def on_revoked(user_ids):
+        if 11 in user_ids:
+            revoked.set()
+
+    bus.subscribe("vip_access_revoked", on_revoked)
+    scheduler = VipExpiryScheduler(session_factory, event_bus=bus)
+    await scheduler.start()
+    try:
+        subscriptions = SubscriptionService(bus, session_factory, expiry_scheduler=scheduler)
+        user = UserModel(id=11, username="eleven")
+        await subscriptions.grant_vip(user, days=1)
+        assert subscriptions.is_vip(11)
+        assert (await roles(session_factory))[11] == "vip"
+
+        # Bring the expiry forward: the sleeping task is woken for the earlier deadline.
+        scheduler.schedule(11, datetime.now() + timedelta(milliseconds=50))
+        async with session_factory() as session:
+            (await session.get(User, 11)).vip_expires_at = datetime.now() + timedelta(milliseconds=50)
+            await session.commit()
+        await asyncio.wait_for(revoked.wait(), 2)
+    finally:
+        await scheduler.stop()
+
+    assert not subscriptions.is_vip(11)
+    assert (await roles(session_factory))[11] == "free"